@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ChallengesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'challenges'
+
+    def ready(self) -> None:
+        from . import columnar, feed, histogram, replica, signals, sqlite  # noqa: F401
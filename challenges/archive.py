@@ -0,0 +1,96 @@
+"""
+Hot/archive partitioning of posts.
+
+archive_posts() moves the posts whose last activity (publication, or creation for unpublished posts) is older
+than a cutoff from the hot Post table to ArchivedPost, batch_size rows per transaction: the rows are copied with
+their ids and row versions, then deleted from the hot table (the FTS triggers drop them from the search index).
+The manage.py archive_posts command runs it with the cutoff of settings.CHALLENGES_POST_ARCHIVE["AFTER_DAYS"].
+
+Reads go to the hot table only, unless a request needs the archive:
+- it asks for it explicitly (archive=1, see wants_archive());
+- its date range starts before the archive horizon, now - AFTER_DAYS (see reaches_archive()): every archived
+  post was last active before the cutoff of its run, which is never later than the horizon.
+They then read PostWithArchive, the UNION ALL view of both tables, with the same querysets.
+
+Post search reads the FTS indexes of the hot table only: archived posts are not searched, and the search views
+reject archive=1 with a 400 instead of silently ignoring it.
+"""
+from datetime import datetime, timedelta
+from typing import Any
+
+from django.conf import settings
+from django.db import connections, models, router
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ArchivedPost, Post, PostWithArchive
+from .signals import models_changed
+from .sqlite import write_atomic
+
+DEFAULT_SETTINGS = {"AFTER_DAYS": None, "BATCH_SIZE": 500}
+
+POST_FIELDS = tuple(field.attname for field in Post._meta.concrete_fields)
+
+
+def archive_settings() -> dict[str, Any]:
+    return {**DEFAULT_SETTINGS, **getattr(settings, "CHALLENGES_POST_ARCHIVE", {})}
+
+
+def archive_horizon() -> datetime | None:
+    """
+    Start of the hot partition: no archived post was active since. None when posts are not archived.
+    """
+    after_days = archive_settings()["AFTER_DAYS"]
+    if after_days is None:
+        return None
+    return timezone.now() - timedelta(days=after_days)
+
+
+def reaches_archive(since: datetime | None) -> bool:
+    """
+    Whether rows active since `since` (None: any time) can be archived.
+    """
+    horizon = archive_horizon()
+    return horizon is not None and (since is None or since < horizon)
+
+
+def wants_archive(request_body: Any) -> bool:
+    return request_body.get("archive", "").lower() in ("1", "true", "yes")
+
+
+def post_model(include_archive: bool) -> type[models.Model]:
+    return PostWithArchive if include_archive else Post
+
+
+def archivable_posts(cutoff: datetime) -> models.QuerySet:
+    # published_at always follows created_at, so both are before the cutoff
+    return Post.objects.filter(Q(published_at=None) | Q(published_at__lt=cutoff), created_at__lt=cutoff)
+
+
+def archive_posts(cutoff: datetime, batch_size: int | None = None, using: str | None = None) -> int:
+    """
+    Move the posts last active before cutoff to the archive, in transactions of batch_size posts, walking the
+    hot table by primary key. Returns the number of posts moved.
+    """
+    batch_size = batch_size or archive_settings()["BATCH_SIZE"]
+    using = using or router.db_for_write(Post)
+    moved = 0
+    last_id = 0
+    while True:
+        with write_atomic(using):
+            rows = list(archivable_posts(cutoff).using(using).filter(pk__gt=last_id).order_by("pk")
+                        .values_list(*POST_FIELDS)[:batch_size])
+            if not rows:
+                return moved
+            ids = [row[0] for row in rows]
+            ArchivedPost.objects.using(using).bulk_create(ArchivedPost(**dict(zip(POST_FIELDS, row))) for row in rows)
+            # an explicit DELETE: QuerySet.delete() would select the batch again to send post_delete per row, the
+            # receivers are told once with models_changed below
+            connection = connections[using]
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {connection.ops.quote_name(Post._meta.db_table)} "
+                               f"WHERE {connection.ops.quote_name(Post._meta.pk.column)} "
+                               f"IN ({', '.join(['%s'] * len(ids))})", ids)
+        models_changed.send(sender=Post, ids=ids)
+        moved += len(ids)
+        last_id = ids[-1]
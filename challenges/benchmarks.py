@@ -0,0 +1,65 @@
+"""
+Small timing helpers shared by the bench_* management commands.
+"""
+import math
+import time
+from typing import Any, Callable
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """
+    Latency summary in milliseconds of samples given in seconds.
+    """
+    return {
+        "runs": len(samples),
+        "mean_ms": sum(samples) / len(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples, default=0.0) * 1000,
+    }
+
+
+def time_calls(func: Callable[[], Any], repeat: int, warmup: int = 1) -> list[float]:
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def format_summary(name: str, summary: dict[str, float]) -> str:
+    return (f"{name:<40} p50 {summary['p50_ms']:9.2f} ms  p95 {summary['p95_ms']:9.2f} ms  "
+            f"p99 {summary['p99_ms']:9.2f} ms  ({summary['runs']} runs)")
+
+
+def find_regressions(results: dict[str, dict[str, dict[str, Any]]], baseline: dict[str, dict[str, dict[str, Any]]],
+                     threshold: float, metric: str = "p95_ms", min_delta_ms: float = 1.0) -> list[str]:
+    """
+    Compare {size: {case: measurement}} results with a baseline of the same shape. A case regresses when its metric
+    grows by more than threshold (0.2 = 20%) and by at least min_delta_ms, or when it runs more queries.
+    Cases missing from either side are ignored.
+    """
+    regressions = []
+    for size, cases in results.items():
+        for case, current in cases.items():
+            previous = baseline.get(size, {}).get(case)
+            if previous is None:
+                continue
+            before, after = previous[metric], current[metric]
+            if after > before * (1 + threshold) and after - before >= min_delta_ms:
+                regressions.append(f"{case} @ {size} rows: {metric} {before:.2f} -> {after:.2f} ms")
+            if current.get("queries", 0) > previous.get("queries", 0):
+                regressions.append(f"{case} @ {size} rows: queries {previous['queries']} -> {current['queries']}")
+    return regressions
@@ -0,0 +1,221 @@
+"""
+Response cache for read endpoints.
+
+Entries are keyed by the request and by the current version counter of every model the view reads. Saving or
+deleting a Book, Laptop or Post bumps its counter once the write commits (see challenges.signals), so a process
+stops serving its stale entries; they are left to age out of the LRU / TTL. Responses read from the read replica
+are also keyed by its last refresh (see challenges.replica).
+
+With the "lru" backend the counters are per process: writes made by other workers do not bump them, and their
+stale entries are served until the TTL runs out. The "django" backend shares the counters between workers.
+
+Configured with settings.CHALLENGES_RESPONSE_CACHE:
+    BACKEND      "lru" (bounded in-process LRU, per worker) or "django" (a Django cache, shared between workers)
+    ALIAS        Django cache alias for the "django" backend
+    MAX_ENTRIES  LRU capacity
+    TTL          seconds an entry stays valid
+
+ETag and Last-Modified headers (see challenges.conditional) are cached with the response, and a cache hit for a
+conditional request whose validators still match is answered with 304 Not Modified.
+
+Lookups are synchronous also in async views, so with the "django" backend they block the event loop for one
+cache round trip.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import models
+from django.http import HttpRequest, HttpResponse
+
+from challenges.conditional import conditional_response
+from challenges.replica import response_generation
+
+DEFAULT_SETTINGS = {"BACKEND": "lru", "ALIAS": "default", "MAX_ENTRIES": 1024, "TTL": 60}
+
+CachedResponse = tuple[int, bytes, str, dict[str, str]]  # status, content, content type, CACHED_HEADERS
+CACHED_HEADERS = ("ETag", "Last-Modified")
+
+
+class LRUCache:
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResponseCache:
+    def __init__(self, backend: str = "lru", alias: str = "default", max_entries: int = 1024,
+                 ttl: float = 60.0) -> None:
+        if backend not in ("lru", "django"):
+            raise ValueError(f"unknown response cache backend {backend!r}")
+        self.backend = backend
+        self.ttl = ttl
+        self.lru = LRUCache(max_entries, ttl)
+        self.alias = alias
+        self.versions: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version_key(label: str) -> str:
+        return f"challenges:version:{label}"
+
+    def bump(self, model: type[models.Model]) -> None:
+        label = model._meta.label_lower
+        with self._lock:
+            self.versions[label] = self.versions.get(label, 0) + 1
+        if self.backend == "django":
+            cache = caches[self.alias]
+            key = self._version_key(label)
+            if not cache.add(key, 1, timeout=None):
+                try:
+                    cache.incr(key)
+                except ValueError:  # evicted between add() and incr()
+                    cache.add(key, 1, timeout=None)
+
+    def version_of(self, *models_read: type[models.Model]) -> str:
+        labels = [model._meta.label_lower for model in models_read]
+        if self.backend == "django":
+            shared = caches[self.alias].get_many([self._version_key(label) for label in labels])
+            return ".".join(str(shared.get(self._version_key(label), 0)) for label in labels)
+        return ".".join(str(self.versions.get(label, 0)) for label in labels)
+
+    def get(self, key: str) -> CachedResponse | None:
+        value = self.lru.get(key) if self.backend == "lru" else caches[self.alias].get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        if self.backend == "lru":
+            self.lru.set(key, value)
+        else:
+            caches[self.alias].set(key, value, self.ttl)
+
+    def clear(self) -> None:
+        self.lru.clear()
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "entries": len(self.lru) if self.backend == "lru" else None,
+            "versions": dict(self.versions),
+        }
+
+
+_response_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        options = {**DEFAULT_SETTINGS, **getattr(settings, "CHALLENGES_RESPONSE_CACHE", {})}
+        _response_cache = ResponseCache(options["BACKEND"], options["ALIAS"], options["MAX_ENTRIES"], options["TTL"])
+    return _response_cache
+
+
+def _reset_response_cache(*, setting: str, **kwargs: Any) -> None:
+    global _response_cache
+    if setting == "CHALLENGES_RESPONSE_CACHE":
+        _response_cache = None
+
+
+setting_changed.connect(_reset_response_cache)
+
+
+def cache_response(*models_read: type[models.Model]) -> Callable[[Callable], Callable]:
+    """
+    Cache successful GET responses of a view until one of models_read changes (or the TTL runs out).
+    Works on sync and async views.
+    """
+    def decorator(view: Callable[..., Any]) -> Callable[..., Any]:
+        view_name = f"{view.__module__}.{view.__qualname__}"
+
+        def lookup(request: HttpRequest) -> tuple[str, HttpResponse | None]:
+            cache = get_response_cache()
+            key = (f"challenges:response:{view_name}:{cache.version_of(*models_read)}:{response_generation()}:"
+                   f"{request.get_full_path()}")
+            cached = cache.get(key)
+            if cached is None:
+                return key, None
+            status, content, content_type, headers = cached
+            response = HttpResponse(content, status=status, content_type=content_type, headers=headers)
+            response["X-Cache"] = "HIT"
+            return key, conditional_response(request, response)
+
+        def store(key: str, response: HttpResponse) -> HttpResponse:
+            if response.status_code == 200 and not response.streaming:
+                headers = {name: response[name] for name in CACHED_HEADERS if name in response}
+                get_response_cache().set(key, (response.status_code, response.content, response["Content-Type"],
+                                               headers))
+            response["X-Cache"] = "MISS"
+            return response
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+                if request.method not in ("GET", "HEAD"):
+                    return await view(request, *args, **kwargs)
+                key, cached = lookup(request)
+                if cached is not None:
+                    return cached
+                return store(key, await view(request, *args, **kwargs))
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            key, cached = lookup(request)
+            if cached is not None:
+                return cached
+            return store(key, view(request, *args, **kwargs))
+
+        return wrapper
+    return decorator
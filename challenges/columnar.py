@@ -0,0 +1,278 @@
+"""
+Columnar in-memory snapshot of Laptop for the read-mostly laptop views.
+
+With settings.CHALLENGES_LAPTOP_SNAPSHOT["ENABLED"] each process keeps every laptop in array-backed columns, one
+array per serialized field: numbers as they are, datetimes as microseconds since the epoch and brand
+dictionary-encoded as one byte per row. Two orders are kept next to the columns as arrays of row positions:
+by created_at descending, and per brand by (price, id). The laptop views are then answered without SQL:
+
+    filter    bisect into the brand's (price, id) order for min_price and the cursor, slice limit + 1 rows
+    in stock  one pass over the created_at order keeping count > 0
+    latest    the head of the created_at order
+
+Writes move a change counter: post_save / post_delete of a Laptop record its id once committed, bulk writes
+(models_changed) record the ids they name or else ask for a full reload. A read that finds the counter moved
+re-reads only the recorded rows (one pk__in query) and moves them within the orders; more than MAX_INCREMENTAL
+recorded rows, or a snapshot older than MAX_AGE seconds (writes of other processes), reload everything. Like the
+"lru" response cache, writes of other processes are only seen after MAX_AGE.
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Callable, Iterable, Sequence
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .instrumentation import timed
+from .models import Laptop
+from .pagination import Page, decode_model_cursor, encode_cursor
+from .serializers import Row, serializer_for
+from .signals import models_changed
+
+DEFAULT_SETTINGS = {"ENABLED": False, "MAX_AGE": 60, "MAX_INCREMENTAL": 500}
+PAGE_KEYS = ("price", "id")  # the filter view's keyset, cheapest first
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def snapshot_settings() -> dict[str, Any]:
+    return {**DEFAULT_SETTINGS, **getattr(settings, "CHALLENGES_LAPTOP_SNAPSHOT", {})}
+
+
+def column_codec(field: models.Field) -> tuple[str, Callable[[Any], Any] | None, Callable[[Any], Any] | None]:
+    """
+    Array typecode of a field and its (to column, from column) converters; "B" is a dictionary-encoded column.
+    """
+    if field.choices:
+        return "B", None, None
+    if isinstance(field, models.DateTimeField):
+        return "q", lambda value: (value - EPOCH) // MICROSECOND, lambda value: EPOCH + value * MICROSECOND
+    if isinstance(field, models.FloatField):
+        return "d", None, None
+    if isinstance(field, (models.IntegerField, models.AutoField)):
+        return "q", None, None
+    raise TypeError(f"{field.name}: {type(field).__name__} has no column type")
+
+
+class LaptopSnapshot:
+    def __init__(self, max_age: float, max_incremental: int) -> None:
+        self.max_age = max_age
+        self.max_incremental = max_incremental
+        self.serializer = serializer_for(Laptop)
+        fields = {field.name: field for field in Laptop._meta.concrete_fields}
+        self.codecs = [column_codec(fields[name]) for name in self.serializer.fields]
+        self.index = {name: position for position, name in enumerate(self.serializer.fields)}
+
+        self.changes = 0  # bumped by every recorded write
+        self.changed_ids: set[int] | None = set()  # None: reload everything
+        self.loaded_at: float | None = None
+        self._changes_lock = threading.Lock()
+        self._lock = threading.Lock()  # held while the columns are read or rebuilt
+        self._reset()
+
+    def _reset(self) -> None:
+        self.columns: list[array] = [array(typecode) for typecode, _, _ in self.codecs]
+        self.dictionary: list[str] = []
+        self.codes: dict[str, int] = {}
+        self.positions: dict[int, int] = {}  # id -> row position
+        self.dead = 0  # positions of deleted rows, dropped at the next reload
+        self.applied = 0  # change counter the columns reflect
+        self.by_created = array("q")
+        self.by_brand_price: dict[int, array] = {}
+        self.ids, self.prices = self.columns[self.index["id"]], self.columns[self.index["price"]]
+        self.created, self.counts = self.columns[self.index["created_at"]], self.columns[self.index["count"]]
+        self.brand_codes = self.columns[self.index["brand"]]
+
+    def note_change(self, laptop_ids: Iterable[int] | None) -> None:
+        """
+        Record a committed write of the given laptops, or of unknown rows with None.
+        """
+        with self._changes_lock:
+            self.changes += 1
+            if laptop_ids is None or self.changed_ids is None:
+                self.changed_ids = None
+            else:
+                self.changed_ids.update(laptop_ids)
+
+    # orders
+
+    def _created_key(self, position: int) -> tuple[int, int]:
+        return -self.created[position], -self.ids[position]
+
+    def _price_key(self, position: int) -> tuple[float, int]:
+        return self.prices[position], self.ids[position]
+
+    def _unindex(self, position: int) -> None:
+        for order, key in ((self.by_created, self._created_key),
+                           (self.by_brand_price[self.brand_codes[position]], self._price_key)):
+            del order[bisect_left(order, key(position), key=key)]
+
+    def _index(self, position: int) -> None:
+        insort(self.by_created, position, key=self._created_key)
+        order = self.by_brand_price.setdefault(self.brand_codes[position], array("q"))
+        insort(order, position, key=self._price_key)
+
+    # loading
+
+    def _encode(self, values: Sequence[Any]) -> list[Any]:
+        encoded = []
+        for value, (typecode, to_column, _) in zip(values, self.codecs):
+            if typecode == "B":
+                code = self.codes.get(value)
+                if code is None:
+                    code = self.codes[value] = len(self.dictionary)
+                    self.dictionary.append(value)
+                value = code
+            elif to_column is not None:
+                value = to_column(value)
+            encoded.append(value)
+        return encoded
+
+    def _write(self, position: int | None, values: Sequence[Any]) -> int:
+        encoded = self._encode(values)
+        if position is None:
+            position = len(self.ids)
+            for column, value in zip(self.columns, encoded):
+                column.append(value)
+            self.positions[encoded[self.index["id"]]] = position
+        else:
+            for column, value in zip(self.columns, encoded):
+                column[position] = value
+        return position
+
+    def _load(self) -> None:
+        rows = self.serializer.fetch(Laptop.objects.order_by())
+        self._reset()
+        # column by column: one extend() per field instead of one append() per value
+        for position, (column, (typecode, to_column, _)) in enumerate(zip(self.columns, self.codecs)):
+            values = [row[position] for row in rows]
+            if typecode == "B":
+                self.dictionary.extend(sorted(set(values)))
+                self.codes.update((value, code) for code, value in enumerate(self.dictionary))
+                values = map(self.codes.__getitem__, values)
+            elif to_column is not None:
+                values = map(to_column, values)
+            column.extend(values)
+        self.positions = dict(zip(self.ids, range(len(self.ids))))
+        live = range(len(self.ids))
+        self.by_created = array("q", sorted(live, key=self._created_key))
+        grouped: dict[int, list[int]] = {}
+        for position in live:
+            grouped.setdefault(self.brand_codes[position], []).append(position)
+        self.by_brand_price = {code: array("q", sorted(positions, key=self._price_key))
+                               for code, positions in grouped.items()}
+
+    def _apply(self, laptop_ids: set[int]) -> None:
+        fresh = {values[self.index["id"]]: values
+                 for values in self.serializer.fetch(Laptop.objects.filter(pk__in=laptop_ids).order_by())}
+        for laptop_id in laptop_ids:
+            position = self.positions.get(laptop_id)
+            if position is not None:
+                self._unindex(position)
+            if laptop_id in fresh:
+                self._index(self._write(position, fresh[laptop_id]))
+            elif position is not None:
+                del self.positions[laptop_id]
+                self.dead += 1
+
+    def _refresh(self) -> None:
+        with self._changes_lock:
+            changes, changed_ids = self.changes, self.changed_ids
+            self.changed_ids = set()
+        expired = self.loaded_at is None or time.monotonic() - self.loaded_at > self.max_age
+        if expired or changed_ids is None or len(changed_ids) > self.max_incremental or self.dead > len(self.ids) // 2:
+            self._load()
+            self.loaded_at = time.monotonic()
+        elif changes != self.applied and changed_ids:
+            self._apply(changed_ids)
+        self.applied = changes
+
+    # queries
+
+    def _rows(self, positions: Sequence[int]) -> list[tuple]:
+        """
+        Serializer value tuples of the rows at positions, gathered column by column.
+        """
+        columns = []
+        for column, (typecode, _, from_column) in zip(self.columns, self.codecs):
+            values = [column[position] for position in positions]
+            if typecode == "B":
+                values = map(self.dictionary.__getitem__, values)
+            elif from_column is not None:
+                values = map(from_column, values)
+            columns.append(values)
+        return list(zip(*columns))
+
+    def filter_page(self, brand: str, min_price: float, cursor: str | None, limit: int) -> Page:
+        """
+        laptops_by_brand(brand, min_price) paginated by (price, id), as paginate() returns it.
+        Raises InvalidCursor like paginate().
+        """
+        after = tuple(decode_model_cursor(Laptop, PAGE_KEYS, cursor)) if cursor else None
+        with self._lock, timed("snapshot"):
+            self._refresh()
+            order = self.by_brand_price.get(self.codes.get(brand, -1), array("q"))
+            start = bisect_left(order, (min_price, float("-inf")), key=self._price_key)
+            if after is not None:
+                start = max(start, bisect_right(order, after, key=self._price_key))
+            rows = self._rows(order[start:start + limit + 1])
+        items = self.serializer.encode_rows(rows[:limit])
+        if len(rows) <= limit:
+            return Page(items, None)
+        last = rows[limit - 1]
+        return Page(items, encode_cursor([last[self.index[key]] for key in PAGE_KEYS]))
+
+    def in_stock(self) -> list[Row]:
+        """
+        Laptops with count > 0, newest first.
+        """
+        with self._lock, timed("snapshot"):
+            self._refresh()
+            counts = self.counts
+            rows = self._rows([position for position in self.by_created if counts[position] > 0])
+        return self.serializer.encode_rows(rows)
+
+    def latest(self) -> Row | None:
+        with self._lock, timed("snapshot"):
+            self._refresh()
+            rows = self._rows(self.by_created[:1])
+        return self.serializer.encode_rows(rows)[0] if rows else None
+
+
+_snapshot: LaptopSnapshot | None = None
+_snapshot_lock = threading.Lock()
+
+
+def get_laptop_snapshot() -> LaptopSnapshot | None:
+    global _snapshot
+    options = snapshot_settings()
+    if not options["ENABLED"]:
+        return None
+    with _snapshot_lock:
+        if _snapshot is None or (_snapshot.max_age, _snapshot.max_incremental) != (options["MAX_AGE"],
+                                                                                   options["MAX_INCREMENTAL"]):
+            _snapshot = LaptopSnapshot(options["MAX_AGE"], options["MAX_INCREMENTAL"])
+        return _snapshot
+
+
+def _note_change(laptop_ids: Iterable[int] | None, using: str | None) -> None:
+    snapshot = _snapshot
+    if snapshot is not None:
+        transaction.on_commit(lambda: snapshot.note_change(laptop_ids), using=using)
+
+
+@receiver(post_save, sender=Laptop)
+@receiver(post_delete, sender=Laptop)
+def record_laptop_change(sender: type[Laptop], instance: Laptop, **kwargs: Any) -> None:
+    _note_change((instance.pk,), kwargs.get("using"))
+
+
+@receiver(models_changed, sender=Laptop)
+def record_bulk_laptop_change(sender: type[Laptop], ids: Iterable[int] | None = None, **kwargs: Any) -> None:
+    _note_change(None if ids is None else tuple(ids), None)
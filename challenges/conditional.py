@@ -0,0 +1,122 @@
+"""
+Conditional GET (If-None-Match / If-Modified-Since) for detail and list views.
+
+Book, Laptop and Post rows carry updated_at (auto_now; the bulk write paths set it themselves), which serves as
+their row version. conditional_get(validators_for) reads the validators of the requested resource with one query
+that loads no serialized columns:
+
+    row_validators()   updated_at of one row, a primary key lookup      -> ETag and Last-Modified
+    list_validators()  COUNT, MAX(updated_at) and SUM(id) of the rows  -> ETag
+
+and answers a matching request with 304 Not Modified before the view loads or serializes anything; otherwise
+the view runs and its response carries the validators. Lists get no Last-Modified: deleting a listed row does not
+move MAX(updated_at).
+
+Under cache_response the validators are cached with the response, so a cache hit is answered with 304 as well.
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.db.models import Count, Max, QuerySet, Sum
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+CONDITIONAL_HEADERS = ("HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE")
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: str
+    last_modified: datetime | None = None
+
+    def apply(self, response: HttpResponse) -> HttpResponse:
+        response["ETag"] = self.etag
+        if self.last_modified is not None:
+            response["Last-Modified"] = http_date(self.last_modified.timestamp())
+        return response
+
+
+def make_etag(*parts: Any) -> str:
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def row_validators(queryset: QuerySet) -> Validators | None:
+    """
+    Validators of the single row of queryset, None when there is no such row.
+    """
+    row = queryset.order_by().values_list("pk", "updated_at").first()
+    if row is None:
+        return None
+    pk, updated_at = row
+    return Validators(make_etag(queryset.model._meta.label_lower, pk, updated_at), updated_at)
+
+
+def list_validators(queryset: QuerySet) -> Validators:
+    """
+    Validators of the rows of queryset (sliced querysets are aggregated over the slice). COUNT and SUM(id) change
+    when a row leaves the list, MAX(updated_at) when one is added or updated.
+    """
+    row = queryset.aggregate(rows=Count("pk"), latest=Max("updated_at"), ids=Sum("pk"))
+    return Validators(make_etag(queryset.model._meta.label_lower, row["rows"], row["latest"], row["ids"]))
+
+
+def conditional_response(request: HttpRequest, response: HttpResponse) -> HttpResponse:
+    """
+    304 Not Modified when the ETag / Last-Modified headers of response match the request's conditions,
+    response itself otherwise.
+    """
+    last_modified = response.get("Last-Modified")
+    return get_conditional_response(request, etag=response.get("ETag"),
+                                    last_modified=parse_http_date_safe(last_modified) if last_modified else None,
+                                    response=response)
+
+
+def conditional_get(validators_for: Callable[..., Validators | None]) -> Callable[[Callable], Callable]:
+    """
+    Answer conditional GET requests of a view from validators_for(request, *args, **kwargs), which returns None
+    when the request has no validators (invalid parameters, a missing row, a streamed reply): the view then runs
+    as usual. Works on sync and async views.
+    """
+    def short_circuit(request: HttpRequest, validators: Validators | None) -> HttpResponse | None:
+        if validators is None or not any(header in request.META for header in CONDITIONAL_HEADERS):
+            return None
+        last_modified = int(validators.last_modified.timestamp()) if validators.last_modified else None
+        response = get_conditional_response(request, etag=validators.etag, last_modified=last_modified)
+        return None if response is None else validators.apply(response)
+
+    def with_validators(response: HttpResponse, validators: Validators | None) -> HttpResponse:
+        if validators is not None and response.status_code == 200 and not response.streaming:
+            validators.apply(response)
+        return response
+
+    def decorator(view: Callable[..., Any]) -> Callable[..., Any]:
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+                if request.method not in ("GET", "HEAD"):
+                    return await view(request, *args, **kwargs)
+                validators = await sync_to_async(validators_for)(request, *args, **kwargs)
+                response = short_circuit(request, validators)
+                if response is not None:
+                    return response
+                return with_validators(await view(request, *args, **kwargs), validators)
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            validators = validators_for(request, *args, **kwargs)
+            response = short_circuit(request, validators)
+            if response is not None:
+                return response
+            return with_validators(view(request, *args, **kwargs), validators)
+
+        return wrapper
+    return decorator
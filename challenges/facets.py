@@ -0,0 +1,170 @@
+"""
+Faceted laptop search.
+
+A LaptopSearch filters on several brands, price ranges, memory, disk and year values or ranges, and on stock.
+Values of one parameter are OR-ed, parameters are AND-ed. Numeric values are either exact ("16") or inclusive
+ranges with optional ends ("8-15", "1000-", "-500").
+
+facet_counts() returns the number of matching laptops per brand, memory bucket and year bucket in one query:
+each bucket is a conditional COUNT over the laptops matching the filters that are not faceted (price, disk,
+stock). As usual for facets, the counts of one facet ignore that facet's own filter, so a client also sees what
+picking another brand would add; the other facets' filters still apply. Bucket labels are valid filter values.
+"""
+from dataclasses import dataclass
+from functools import reduce
+from operator import or_
+from typing import Any, Callable
+
+from django.db.models import Count, Q, QuerySet
+from django.utils import timezone
+
+from .models import Laptop
+from .models_choices import LaptopBrand
+
+Range = tuple[float | None, float | None]  # inclusive bounds, None for an open end
+
+FACETS = ("brand", "memory", "year")
+MAX_FILTER_VALUES = 20  # per parameter, bounds the size of the query
+MEMORY_BUCKETS: tuple[Range, ...] = ((None, 7), (8, 15), (16, 31), (32, 63), (64, None))
+YEAR_FACET_YEARS = 10  # one bucket per recent year, older laptops share the last one
+
+BRAND_NAMES = {brand.value: brand.name for brand in LaptopBrand}  # Laptop.brand stores the enum names
+
+
+def range_label(bounds: Range) -> str:
+    low, high = (None if bound is None else f"{bound:g}" for bound in bounds)
+    if low is not None and low == high:
+        return low
+    return f"{low or ''}-{high or ''}"
+
+
+def range_condition(field: str, ranges: tuple[Range, ...]) -> Q:
+    conditions = []
+    for low, high in ranges:
+        condition = Q()
+        if low is not None:
+            condition &= Q(**{f"{field}__gte": low})
+        if high is not None:
+            condition &= Q(**{f"{field}__lte": high})
+        conditions.append(condition)
+    return reduce(or_, conditions) if conditions else Q()
+
+
+@dataclass(frozen=True)
+class LaptopSearch:
+    brands: tuple[str, ...] = ()  # enum names, as stored
+    prices: tuple[Range, ...] = ()
+    memory: tuple[Range, ...] = ()
+    disks: tuple[Range, ...] = ()
+    years: tuple[Range, ...] = ()
+    in_stock: bool | None = None
+
+    def facet_filters(self) -> dict[str, Q]:
+        return {
+            "brand": Q(brand__in=self.brands) if self.brands else Q(),
+            "memory": range_condition("memory", self.memory),
+            "year": range_condition("year", self.years),
+        }
+
+    def base_filter(self) -> Q:
+        condition = range_condition("price", self.prices) & range_condition("disk", self.disks)
+        if self.in_stock is not None:
+            condition &= Q(count__gt=0) if self.in_stock else Q(count__lte=0)
+        return condition
+
+    def queryset(self) -> QuerySet:
+        return Laptop.objects.filter(self.base_filter(), *self.facet_filters().values())
+
+
+def facet_buckets() -> dict[str, list[tuple[str, Q]]]:
+    """
+    Label and condition of every bucket, per facet.
+    """
+    this_year = timezone.localdate().year
+    oldest = this_year - YEAR_FACET_YEARS + 1
+    years: list[Range] = [(this_year, None)]
+    years += [(year, year) for year in range(this_year - 1, oldest - 1, -1)]
+    years.append((None, oldest - 1))
+    return {
+        "brand": [(brand.value, Q(brand=brand.name)) for brand in LaptopBrand],
+        "memory": [(range_label(bounds), range_condition("memory", (bounds,))) for bounds in MEMORY_BUCKETS],
+        "year": [(range_label(bounds), range_condition("year", (bounds,))) for bounds in years],
+    }
+
+
+def facet_aggregates(search: LaptopSearch, facets: tuple[str, ...] = FACETS) -> dict[str, Count]:
+    filters = search.facet_filters()
+    buckets = facet_buckets()
+    aggregates = {}
+    for facet in facets:
+        others = Q(*[condition for name, condition in filters.items() if name != facet])
+        for position, (_, condition) in enumerate(buckets[facet]):
+            aggregates[f"{facet}_{position}"] = Count("id", filter=condition & others)
+    return aggregates
+
+
+def read_facets(row: dict[str, int], facets: tuple[str, ...] = FACETS) -> dict[str, dict[str, int]]:
+    buckets = facet_buckets()
+    return {facet: {label: row[f"{facet}_{position}"] for position, (label, _) in enumerate(buckets[facet])}
+            for facet in facets}
+
+
+def facet_counts(search: LaptopSearch) -> tuple[int, dict[str, dict[str, int]]]:
+    """
+    Number of laptops matching the whole search, and the counts of every facet bucket, in one query.
+    """
+    matched = Q(*search.facet_filters().values())
+    row = Laptop.objects.filter(search.base_filter()).aggregate(
+        total=Count("id", filter=matched) if matched else Count("id"), **facet_aggregates(search))
+    return row["total"], read_facets(row)
+
+
+def parse_values(request_body: Any, name: str, parse: Callable[[str], Any]) -> tuple[Any, ...] | str:
+    raw = request_body.get(name) or ""
+    values = [value.strip() for value in raw.split(",") if value.strip()]
+    if len(values) > MAX_FILTER_VALUES:
+        return f"at most {MAX_FILTER_VALUES} values of '{name}'"
+    try:
+        return tuple(parse(value) for value in values)
+    except ValueError:
+        return f"invalid '{name}': {raw}"
+
+
+def range_parser(number: Callable[[str], float]) -> Callable[[str], Range]:
+    def parse(value: str) -> Range:
+        low, separator, high = value.partition("-")
+        bounds = (number(low) if low else None, number(high) if high else None)
+        if not separator:
+            bounds = (bounds[0], bounds[0])
+        if bounds == (None, None) or any(bound is not None and bound < 0 for bound in bounds):
+            raise ValueError(value)
+        return bounds
+    return parse
+
+
+def parse_brand(value: str) -> str:
+    if value not in BRAND_NAMES:
+        raise ValueError(value)
+    return BRAND_NAMES[value]
+
+
+def parse_laptop_search(request_body: Any) -> LaptopSearch | str:
+    """
+    Search of the brand, price, memory, disk, year and in_stock parameters, comma-separated values each.
+    Returns an error message instead when one is invalid.
+    """
+    parsed = {}
+    for name, field, parse in (("brand", "brands", parse_brand), ("price", "prices", range_parser(float)),
+                               ("memory", "memory", range_parser(int)), ("disk", "disks", range_parser(int)),
+                               ("year", "years", range_parser(int))):
+        values = parse_values(request_body, name, parse)
+        if isinstance(values, str):
+            if name == "brand":
+                return f"{values} - choose from: {', '.join(BRAND_NAMES)}"
+            return values
+        parsed[field] = values
+
+    in_stock = (request_body.get("in_stock") or "").lower()
+    if in_stock not in ("", "1", "true", "yes", "0", "false", "no"):
+        return "'in_stock' should be true or false"
+    return LaptopSearch(**parsed, in_stock=None if not in_stock else in_stock in ("1", "true", "yes"))
@@ -0,0 +1,159 @@
+"""
+Feed of the latest published posts.
+
+latest_published(n) is answered by one bounded query: ORDER BY published_at DESC, id DESC LIMIT n walks
+post_status_published_idx backwards and stops after n rows, whatever the number of published posts.
+
+With settings.CHALLENGES_FEED["RING_SIZE"] > 0 each process also keeps a ring of the (published_at, id) of
+the most recent published posts. Saves and deletes of a Post update it once their transaction commits, bulk
+writes (models_changed) and changes it cannot apply in place mark it for a reload, and it is reloaded at least
+every MAX_AGE seconds to pick up writes made by other processes. Requests for up to RING_SIZE posts then read
+the rows by primary key in ring order, with no index walk or sort.
+
+The feed reads the hot posts only. When they run out, or the oldest of the n was published before the archive
+horizon (challenges.archive), an archived post may be newer: the feed is then read again from PostWithArchive.
+"""
+import bisect
+import threading
+import time
+from datetime import datetime
+from typing import Any
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .archive import reaches_archive
+from .models import Post, PostStatus, PostWithArchive
+from .serializers import Row, serializer_for
+from .signals import models_changed
+
+DEFAULT_SETTINGS = {"RING_SIZE": 0, "MAX_AGE": 5}
+
+FeedKey = tuple[datetime, int]  # published_at, id
+
+
+def published_feed(model: type[models.Model] = Post) -> models.QuerySet:
+    return model.objects.filter(status=PostStatus.published.value).order_by("-published_at", "-id")
+
+
+def feed_settings() -> dict[str, Any]:
+    return {**DEFAULT_SETTINGS, **getattr(settings, "CHALLENGES_FEED", {})}
+
+
+class FeedRing:
+    """
+    The newest published posts, oldest first. Fewer than size entries means there are no more published posts.
+    """
+    def __init__(self, size: int, max_age: float) -> None:
+        self.size = size
+        self.max_age = max_age
+        self.keys: list[FeedKey] = []
+        self.loaded_at: float | None = None  # None: reload before the next read
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.loaded_at = None
+
+    def latest_ids(self, n: int) -> list[int]:
+        with self._lock:
+            if self.loaded_at is None or time.monotonic() - self.loaded_at > self.max_age:
+                self.keys = list(published_feed().values_list("published_at", "id")[:self.size])[::-1]
+                self.loaded_at = time.monotonic()
+            return [post_id for _, post_id in self.keys[-n:][::-1]]
+
+    def update(self, post_id: int, key: FeedKey | None) -> None:
+        """
+        Apply a committed change of one post: key is its new position, None when it is no longer published.
+        """
+        with self._lock:
+            if self.loaded_at is None:
+                return
+            was_full = len(self.keys) >= self.size
+            removed = False
+            for index, (_, ring_id) in enumerate(self.keys):
+                if ring_id == post_id:
+                    del self.keys[index]
+                    removed = True
+                    break
+            if key is not None and (not was_full or not self.keys or key > self.keys[0]):
+                bisect.insort(self.keys, key)
+                if len(self.keys) > self.size:
+                    del self.keys[0]
+            elif removed:
+                # a slot was freed and the post that should take it is unknown
+                self.loaded_at = None
+
+
+_ring: FeedRing | None = None
+_ring_lock = threading.Lock()
+
+
+def get_feed_ring() -> FeedRing | None:
+    global _ring
+    options = feed_settings()
+    if not options["RING_SIZE"]:
+        return None
+    with _ring_lock:
+        if _ring is None or (_ring.size, _ring.max_age) != (options["RING_SIZE"], options["MAX_AGE"]):
+            _ring = FeedRing(options["RING_SIZE"], options["MAX_AGE"])
+        return _ring
+
+
+def latest_published(n: int, include_archive: bool = False) -> list[Row]:
+    """
+    Serialized latest n published posts, newest first; archived posts are included when they may be among them.
+    """
+    serializer = serializer_for(Post)
+    if include_archive:
+        return serializer.serialize(published_feed(PostWithArchive)[:n])
+    posts = None
+    ring = get_feed_ring()
+    if ring is not None and n <= ring.size:
+        ids = ring.latest_ids(n)
+        rows = serializer.in_bulk(ids)
+        if len(rows) == len(ids):
+            posts = [rows[post_id] for post_id in ids]
+        else:
+            ring.invalidate()  # deleted by another process
+    if posts is None:
+        posts = serializer.serialize(published_feed()[:n])
+    oldest = posts[-1]["published_at"] if len(posts) == n else None  # None: no more published hot posts
+    if reaches_archive(datetime.fromisoformat(oldest) if oldest else None):
+        return serializer.serialize(published_feed(PostWithArchive)[:n])
+    return posts
+
+
+def feed_key(post: Post) -> FeedKey | None:
+    if post.status != PostStatus.published.value or post.published_at is None:
+        return None
+    published_at = post.published_at
+    if timezone.is_naive(published_at):
+        published_at = timezone.make_aware(published_at)
+    return published_at, post.pk
+
+
+@receiver(post_save, sender=Post)
+def update_feed_ring(sender: type[Post], instance: Post, **kwargs: Any) -> None:
+    ring = get_feed_ring()
+    if ring is not None:
+        post_id, key = instance.pk, feed_key(instance)
+        transaction.on_commit(lambda: ring.update(post_id, key), using=kwargs.get("using"))
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_feed_ring(sender: type[Post], instance: Post, **kwargs: Any) -> None:
+    ring = get_feed_ring()
+    if ring is not None:
+        post_id = instance.pk
+        transaction.on_commit(lambda: ring.update(post_id, None), using=kwargs.get("using"))
+
+
+@receiver(models_changed, sender=Post)
+def reload_feed_ring(sender: type[Post], **kwargs: Any) -> None:
+    ring = get_feed_ring()
+    if ring is not None:
+        ring.invalidate()
@@ -0,0 +1,190 @@
+"""
+Publication histogram: number of posts per published_at day (in the current time zone), category and status.
+
+Counts are grouped in SQL. A past day's counts only change when a post published that day is written, so they
+are kept in a per-process day cache for DAY_TTL seconds. Writes of this process invalidate it once committed:
+- creating or deleting a post evicts its day;
+- saving an existing post clears the cache, since its old day is unknown;
+- bulk writes (models_changed) clear it too.
+With the "django" response cache backend the cache is also cleared whenever the shared response cache version of
+Post changes (see challenges.cache), so writes of other processes clear it too. With the per-process "lru" backend
+they show after at most DAY_TTL seconds.
+
+Cached days are always counted on the primary database, never on the lagging read replica (challenges.replica).
+Today is always recomputed. A window of any length therefore costs one query for today plus, at most, one
+grouped query over the days not cached yet.
+
+Days before the archive horizon (challenges.archive) are counted over PostWithArchive. Archiving moves posts
+without changing the counts, and announces itself with models_changed anyway.
+"""
+import threading
+import time as clock
+from datetime import date, datetime, time, timedelta
+from typing import Any, Iterable
+
+from django.db import connections, router, transaction
+from django.db.models import Count, Func
+from django.db.models.functions import Substr, TruncDate
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .archive import post_model, reaches_archive
+from .cache import get_response_cache
+from .models import Post
+from .models_choices import PostStatus
+from .signals import models_changed
+
+Bucket = dict[str, Any]  # date, category, status, count
+
+# unpublished posts never have a published_at: listing the other statuses lets the range use
+# post_status_pub_cat_idx (status, published_at, category), which covers the query
+DATED_STATUSES = [status.value for status in PostStatus if status is not PostStatus.unpublished]
+MAX_CACHED_DAYS = 20_000
+DAY_TTL = 60  # seconds, bounds how long writes of other processes go unseen
+
+
+class DayCache:
+    def __init__(self, max_days: int = MAX_CACHED_DAYS, ttl: float = DAY_TTL) -> None:
+        self.max_days = max_days
+        self.ttl = ttl
+        self.days: dict[date, list[Bucket]] = {}
+        self.expires_at: dict[date, float] = {}
+        self.version: str | None = None  # response cache version of Post the days were counted at
+        self.generation = 0  # bumped by every invalidation, see set_many()
+        self._lock = threading.Lock()
+
+    def sync(self, version: str) -> None:
+        """
+        Clear the cache when the shared version of Post moved since the days were counted.
+        """
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+            self.generation += 1
+            self.days.clear()
+            self.expires_at.clear()
+
+    def get_many(self, days: Iterable[date]) -> dict[date, list[Bucket]]:
+        now = clock.monotonic()
+        with self._lock:
+            return {day: self.days[day] for day in days if day in self.days and self.expires_at[day] > now}
+
+    def set_many(self, buckets: dict[date, list[Bucket]], generation: int) -> None:
+        """
+        Store counts computed while the cache was at generation; dropped if a write committed meanwhile.
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+            if len(self.days) + len(buckets) > self.max_days:
+                self.days.clear()
+                self.expires_at.clear()
+            self.days.update(buckets)
+            expires_at = clock.monotonic() + self.ttl
+            self.expires_at.update((day, expires_at) for day in buckets)
+
+    def evict(self, days: Iterable[date]) -> None:
+        with self._lock:
+            self.generation += 1
+            for day in days:
+                self.days.pop(day, None)
+                self.expires_at.pop(day, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self.days.clear()
+            self.expires_at.clear()
+
+
+day_cache = DayCache()
+
+
+def day_start(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def published_day(using: str) -> Func:
+    # TruncDate is a Python function called per row on SQLite; in UTC the stored text already starts with the day
+    if connections[using].vendor == "sqlite" and timezone.get_current_timezone_name() == "UTC":
+        return Substr("published_at", 1, 10)
+    return TruncDate("published_at")
+
+
+def count_buckets(first_day: date, last_day: date, using: str | None = None) -> dict[date, list[Bucket]]:
+    """
+    Counts of every day from first_day to last_day inclusive, days without posts included.
+    """
+    model = post_model(reaches_archive(day_start(first_day)))
+    using = using or router.db_for_read(model)
+    rows = (model.objects
+            .using(using)
+            .filter(status__in=DATED_STATUSES, published_at__gte=day_start(first_day),
+                    published_at__lt=day_start(last_day + timedelta(days=1)))
+            .annotate(day=published_day(using))
+            .order_by()
+            .values("day", "category", "status")
+            .annotate(count=Count("id"))
+            .values_list("day", "category", "status", "count"))
+    buckets: dict[date, list[Bucket]] = {first_day + timedelta(days=offset): []
+                                         for offset in range((last_day - first_day).days + 1)}
+    for day, category, status, count in rows:
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        buckets[day].append({"date": day.isoformat(), "category": category, "status": status, "count": count})
+    for day_buckets in buckets.values():
+        day_buckets.sort(key=lambda bucket: (bucket["category"] or "", bucket["status"]))
+    return buckets
+
+
+def publication_histogram(days: int) -> list[Bucket]:
+    """
+    Buckets of the last days days, today included, oldest first.
+    """
+    today = timezone.localdate()
+    first_day = today - timedelta(days=days - 1)
+    past_days = [first_day + timedelta(days=offset) for offset in range(days - 1)]
+
+    response_cache = get_response_cache()
+    if response_cache.backend == "django":
+        day_cache.sync(response_cache.version_of(Post))
+    generation = day_cache.generation
+    cached = day_cache.get_many(past_days)
+    missing = [day for day in past_days if day not in cached]
+    if missing:
+        # kept for DAY_TTL seconds: counted on the primary, a lagging replica would cache stale counts
+        computed = count_buckets(missing[0], missing[-1], using=router.db_for_write(Post))
+        day_cache.set_many(computed, generation)
+        cached.update(computed)
+    cached.update(count_buckets(today, today))
+    return [bucket for day in sorted(cached) if first_day <= day <= today for bucket in cached[day]]
+
+
+def post_day(post: Post) -> date | None:
+    if post.published_at is None:
+        return None
+    return timezone.localdate(post.published_at) if timezone.is_aware(post.published_at) else post.published_at.date()
+
+
+@receiver(post_save, sender=Post)
+def invalidate_saved_post_day(sender: type[Post], instance: Post, created: bool, **kwargs: Any) -> None:
+    if created:
+        day = post_day(instance)
+        if day is not None:
+            transaction.on_commit(lambda: day_cache.evict([day]), using=kwargs.get("using"))
+    else:
+        transaction.on_commit(day_cache.clear, using=kwargs.get("using"))
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post_day(sender: type[Post], instance: Post, **kwargs: Any) -> None:
+    day = post_day(instance)
+    if day is not None:
+        transaction.on_commit(lambda: day_cache.evict([day]), using=kwargs.get("using"))
+
+
+@receiver(models_changed, sender=Post)
+def clear_histogram_days(sender: type[Post], **kwargs: Any) -> None:
+    day_cache.clear()
@@ -0,0 +1,122 @@
+"""
+Batch validation of incoming post rows.
+
+validate_posts() applies the rules Post.full_clean() would (field types and lengths, the status and category
+choices, and the publication rules of Post.clean()) to a whole batch, one column at a time, with frozenset
+choice lookups. Rows that pass are returned as unsaved Post instances ready for bulk_create(); the others get
+an error dict shaped like ValidationError.message_dict.
+"""
+from datetime import datetime
+from typing import Any, Callable
+
+from django.core.exceptions import NON_FIELD_ERRORS
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Post
+from .models_choices import CATEGORY_VALUES, STATUS_VALUES, PostStatus
+
+RowErrors = dict[str, list[str]]
+Check = Callable[[Any], tuple[Any, str | None]]  # value -> (cleaned value, error)
+
+POST_FIELDS = ("title", "content", "author", "status", "created_at", "published_at", "category")
+REQUIRED_FIELDS = frozenset({"title", "content", "author", "created_at"})
+MAX_LENGTHS = {field.name: field.max_length for field in Post._meta.concrete_fields if field.max_length}
+
+MISSING = object()
+
+
+def check_text(name: str) -> Check:
+    max_length = MAX_LENGTHS.get(name)
+
+    def check(value: Any) -> tuple[Any, str | None]:
+        if not isinstance(value, str) or not value:
+            return None, "a non-empty string is required"
+        if max_length is not None and len(value) > max_length:
+            return None, f"at most {max_length} characters"
+        return value, None
+    return check
+
+
+def check_datetime(value: Any) -> tuple[datetime | None, str | None]:
+    if value is None:
+        return None, None
+    try:
+        parsed = parse_datetime(value) if isinstance(value, str) else None
+    except ValueError:  # well formed but impossible, e.g. February 30th
+        parsed = None
+    if parsed is None:
+        return None, "an ISO 8601 datetime is required"
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed, None
+
+
+def check_status(value: Any) -> tuple[str | None, str | None]:
+    if isinstance(value, str) and value in STATUS_VALUES:
+        return value, None
+    return None, f"{value} is not a valid status"
+
+
+def check_category(value: Any) -> tuple[str | None, str | None]:
+    if (value is None or isinstance(value, str)) and value in CATEGORY_VALUES:
+        return value, None
+    return None, f"{value} is not a valid category"
+
+
+CHECKS: dict[str, Check] = {
+    "title": check_text("title"),
+    "content": check_text("content"),
+    "author": check_text("author"),
+    "status": check_status,
+    "created_at": check_datetime,
+    "published_at": check_datetime,
+    "category": check_category,
+}
+DEFAULTS = {"status": PostStatus.unpublished.value, "published_at": None, "category": None}
+
+
+def validate_posts(rows: list[Any]) -> tuple[list[tuple[int, Post]], dict[int, RowErrors]]:
+    """
+    (index, Post) for the valid rows and {index: errors} for the others, indexes into rows.
+    """
+    errors: dict[int, RowErrors] = {}
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors[index] = {NON_FIELD_ERRORS: ["a JSON object is required"]}
+        elif unknown := set(row) - set(POST_FIELDS):
+            errors[index] = {NON_FIELD_ERRORS: [f"unknown fields: {', '.join(sorted(map(str, unknown)))}"]}
+
+    candidates = [index for index in range(len(rows)) if index not in errors]
+    columns: dict[str, list[Any]] = {}
+    for name in POST_FIELDS:
+        check = CHECKS[name]
+        column = []
+        for index in candidates:
+            value = rows[index].get(name, MISSING)
+            if value is MISSING or (value is None and name in REQUIRED_FIELDS):
+                if name in REQUIRED_FIELDS:
+                    errors.setdefault(index, {})[name] = ["this field is required"]
+                    column.append(None)
+                    continue
+                value = DEFAULTS[name]
+            cleaned, error = check(value)
+            if error is not None:
+                errors.setdefault(index, {})[name] = [error]
+            column.append(cleaned)
+        columns[name] = column
+
+    # Post.clean(): unpublished posts have no publication date, the others are published after creation
+    published_at = columns["published_at"]
+    for position, (index, status, created_at) in enumerate(zip(candidates, columns["status"], columns["created_at"])):
+        if status == PostStatus.unpublished.value:
+            published_at[position] = None
+        elif published_at[position] is not None and created_at is not None and published_at[position] <= created_at:
+            errors.setdefault(index, {}).setdefault(NON_FIELD_ERRORS, []).append(
+                "publication date shall be after creation date.")
+
+    valid = []
+    for position, index in enumerate(candidates):
+        if index not in errors:
+            valid.append((index, Post(**{name: columns[name][position] for name in POST_FIELDS})))
+    return valid, errors
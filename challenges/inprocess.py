@@ -0,0 +1,103 @@
+"""
+Minimal in-process WSGI and ASGI clients.
+
+Unlike django.test.Client / AsyncClient they call the deployed application objects (orm_challenges.wsgi /
+orm_challenges.asgi) the way a server would, so e.g. ASGIHandler runs each request's sync code in its own
+thread as it does under uvicorn or daphne.
+"""
+import asyncio
+import io
+import sys
+from typing import Any, Callable
+from urllib.parse import urlencode
+
+Response = tuple[int, bytes]
+
+
+def _query_string(query: dict[str, Any] | None) -> str:
+    return urlencode(query or {}, doseq=True)
+
+
+def wsgi_request(application: Callable, method: str, path: str, query: dict[str, Any] | None = None,
+                 body: bytes = b"", content_type: str = "application/octet-stream",
+                 headers: dict[str, str] | None = None) -> Response:
+    environ = {
+        "REQUEST_METHOD": method.upper(),
+        "SCRIPT_NAME": "",
+        "PATH_INFO": path,
+        "QUERY_STRING": _query_string(query),
+        "CONTENT_TYPE": content_type,
+        "CONTENT_LENGTH": str(len(body)),
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "REMOTE_ADDR": "127.0.0.1",
+        "HTTP_HOST": "localhost",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+        **{"HTTP_" + name.upper().replace("-", "_"): value for name, value in (headers or {}).items()},
+    }
+    status_line = []
+
+    def start_response(status: str, headers: list, exc_info: Any = None) -> Callable[[bytes], None]:
+        status_line.append(status)
+        return lambda data: None
+
+    result = application(environ, start_response)
+    try:
+        content = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return int(status_line[0].split(" ", 1)[0]), content
+
+
+async def asgi_request(application: Callable, method: str, path: str, query: dict[str, Any] | None = None,
+                       body: bytes = b"", content_type: str = "application/octet-stream",
+                       headers: dict[str, str] | None = None) -> Response:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method.upper(),
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": _query_string(query).encode(),
+        "root_path": "",
+        "headers": [(b"host", b"localhost"), (b"content-type", content_type.encode()),
+                    (b"content-length", str(len(body)).encode()),
+                    *((name.lower().encode(), value.encode()) for name, value in (headers or {}).items())],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    request_sent = False
+    disconnected = asyncio.Event()
+    status = 0
+    chunks: list[bytes] = []
+
+    async def receive() -> dict[str, Any]:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await application(scope, receive, send)
+    finally:
+        disconnected.set()
+    return status, b"".join(chunks)
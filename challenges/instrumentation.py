@@ -0,0 +1,252 @@
+"""
+Per-request database and timing instrumentation.
+
+instrument() records query count, SQL time and fetched rows on every database connection for the duration of
+the block; timed() adds named wall-clock timings to the metrics of the running block. The hot paths are timed as
+"orm" (evaluating querysets in challenges.serializers, SQL time included), "snapshot" (reads of the columnar
+laptop snapshot), "to_json" (rows to JSON-ready dicts) and "encode" (building and JSON-encoding the reply), the
+whole view as "view".
+InstrumentationMiddleware reports them as a Server-Timing header and one structured log line per request.
+"""
+import json
+import logging
+import time
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Iterator
+from urllib.parse import urlsplit
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger("challenges.requests")
+
+
+@dataclass(eq=False)
+class RequestMetrics:
+    queries: int = 0
+    sql_time: float = 0.0
+    rows: int = 0
+    timings: dict[str, float] = field(default_factory=dict)
+    statements: list[str] = field(default_factory=list)
+    capture_sql: bool = False
+
+    def server_timing(self) -> str:
+        entries = [f'db;dur={self.sql_time * 1000:.2f};desc="{self.queries} queries, {self.rows} rows"']
+        entries += [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.timings.items()]
+        return ", ".join(entries)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "queries": self.queries,
+            "sql_ms": round(self.sql_time * 1000, 2),
+            "rows": self.rows,
+            **{f"{name}_ms": round(seconds * 1000, 2) for name, seconds in self.timings.items()},
+        }
+
+
+_current_metrics: ContextVar[RequestMetrics | None] = ContextVar("challenges_request_metrics", default=None)
+
+
+def current_metrics() -> RequestMetrics | None:
+    return _current_metrics.get()
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """
+    Add the time spent in the block to the named timing of the current metrics (no-op outside instrument()).
+    """
+    metrics = _current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] = metrics.timings.get(name, 0.0) + time.perf_counter() - started
+
+
+class _RowCountingCursor:
+    """
+    Proxy around a DB-API cursor counting the rows handed to Django (into every active instrument() block).
+    """
+
+    def __init__(self, cursor: Any) -> None:
+        self.cursor = cursor
+        self.sinks: list[RequestMetrics] = []
+
+    def _count(self, rows: int) -> None:
+        for metrics in self.sinks:
+            metrics.rows += rows
+
+    def fetchone(self) -> Any:
+        row = self.cursor.fetchone()
+        if row is not None:
+            self._count(1)
+        return row
+
+    def fetchmany(self, *args: Any) -> list[Any]:
+        rows = self.cursor.fetchmany(*args)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self) -> list[Any]:
+        rows = self.cursor.fetchall()
+        self._count(len(rows))
+        return rows
+
+    def __iter__(self) -> Iterator[Any]:
+        for row in self.cursor:
+            self._count(1)
+            yield row
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.cursor, attr)
+
+
+class _QueryRecorder:
+    def __init__(self, metrics: RequestMetrics) -> None:
+        self.metrics = metrics
+
+    def __call__(self, execute: Callable, sql: str, params: Any, many: bool, context: dict[str, Any]) -> Any:
+        cursor_wrapper = context["cursor"]
+        if not isinstance(cursor_wrapper.cursor, _RowCountingCursor):
+            cursor_wrapper.cursor = _RowCountingCursor(cursor_wrapper.cursor)
+        if self.metrics not in cursor_wrapper.cursor.sinks:
+            cursor_wrapper.cursor.sinks.append(self.metrics)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.metrics.sql_time += time.perf_counter() - started
+            self.metrics.queries += 1
+            if self.metrics.capture_sql:
+                self.metrics.statements.append(sql)
+
+
+def _wrap_connections(stack: ExitStack, recorder: _QueryRecorder) -> None:
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(recorder))
+
+
+@contextmanager
+def instrument(capture_sql: bool = False, metrics: RequestMetrics | None = None) -> Iterator[RequestMetrics]:
+    """
+    Record queries, SQL time and fetched rows on all configured databases while the block runs.
+    Pass an existing metrics object to keep adding to it (e.g. while a streaming response is consumed).
+    """
+    if metrics is None:
+        metrics = RequestMetrics(capture_sql=capture_sql)
+    recorder = _QueryRecorder(metrics)
+    token = _current_metrics.set(metrics)
+    try:
+        with ExitStack() as stack:
+            _wrap_connections(stack, recorder)
+            yield metrics
+    finally:
+        _current_metrics.reset(token)
+
+
+@asynccontextmanager
+async def ainstrument(capture_sql: bool = False,
+                      metrics: RequestMetrics | None = None) -> AsyncIterator[RequestMetrics]:
+    """
+    instrument() for async code. Database connections belong to the thread the async ORM runs its queries in
+    (one per request under ASGIHandler), so the wrappers are installed and removed from that thread.
+    """
+    if metrics is None:
+        metrics = RequestMetrics(capture_sql=capture_sql)
+    recorder = _QueryRecorder(metrics)
+    token = _current_metrics.set(metrics)
+    stack = ExitStack()
+    try:
+        await sync_to_async(_wrap_connections)(stack, recorder)
+        yield metrics
+    finally:
+        await sync_to_async(stack.close)()
+        _current_metrics.reset(token)
+
+
+def query_budget(max_queries: int) -> Callable[[Callable], Callable]:
+    """
+    Declare the maximum number of queries one response of a view may run. Streamed responses (stream=1 exports,
+    which read in chunks) are not held to it. Checked by challenges.testing.assert_query_budget and logged as a
+    warning when exceeded.
+    """
+    def decorator(view: Callable) -> Callable:
+        view.query_budget = max_queries  # type: ignore[attr-defined]
+        return view
+    return decorator
+
+
+def view_query_budget(path: str) -> int | None:
+    try:
+        return getattr(resolve(urlsplit(path).path).func, "query_budget", None)
+    except Resolver404:
+        return None
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        with instrument() as metrics:
+            with timed("view"):
+                response = self.get_response(request)
+        return self._finish(request, response, metrics)
+
+    async def _acall(self, request: HttpRequest) -> HttpResponse:
+        async with ainstrument() as metrics:
+            with timed("view"):
+                response = await self.get_response(request)
+        return self._finish(request, response, metrics)
+
+    def _finish(self, request: HttpRequest, response: HttpResponse, metrics: RequestMetrics) -> HttpResponse:
+        response["Server-Timing"] = metrics.server_timing()
+        if response.streaming and response.is_async:
+            response.streaming_content = self._astream(request, response, response.streaming_content, metrics)
+        elif response.streaming:
+            response.streaming_content = self._stream(request, response, response.streaming_content, metrics)
+        else:
+            self._log(request, response, metrics)
+        return response
+
+    def _stream(self, request: HttpRequest, response: HttpResponse, content: Iterator[bytes],
+                metrics: RequestMetrics) -> Iterator[bytes]:
+        # queries run while the body is consumed happen after the headers went out: they only reach the log line
+        with instrument(metrics=metrics):
+            with timed("stream"):
+                yield from content
+        self._log(request, response, metrics)
+
+    async def _astream(self, request: HttpRequest, response: HttpResponse, content: AsyncIterator[bytes],
+                       metrics: RequestMetrics) -> AsyncIterator[bytes]:
+        async with ainstrument(metrics=metrics):
+            with timed("stream"):
+                async for chunk in content:
+                    yield chunk
+        self._log(request, response, metrics)
+
+    def _log(self, request: HttpRequest, response: HttpResponse, metrics: RequestMetrics) -> None:
+        # stream=1 exports run a query per chunk, however many rows they read
+        budget = None if response.streaming else view_query_budget(request.path_info)
+        record = {"method": request.method, "path": request.path_info, "status": response.status_code,
+                  **metrics.as_dict()}
+        if budget is not None and metrics.queries > budget:
+            record["query_budget"] = budget
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
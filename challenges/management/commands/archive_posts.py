@@ -0,0 +1,53 @@
+"""
+Move posts last active (published, or created when unpublished) before the cutoff to the archive table, see
+challenges/archive.py.
+
+    manage.py archive_posts                      cutoff: CHALLENGES_POST_ARCHIVE["AFTER_DAYS"] days ago
+    manage.py archive_posts --days 730 --batch-size 1000
+    manage.py archive_posts --dry-run            only count the posts that would move
+
+The views include the archive for date ranges older than AFTER_DAYS days: archiving with a --days shorter than
+AFTER_DAYS hides the posts in between from those ranges unless the requests pass archive=1.
+"""
+import time
+from datetime import timedelta
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+
+from challenges.archive import archivable_posts, archive_posts, archive_settings
+from challenges.models import ArchivedPost, Post
+
+
+class Command(BaseCommand):
+    help = "Move old posts from the hot table to the archive table in batches."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--days", type=int, help="archive posts last active more than this many days ago")
+        parser.add_argument("--batch-size", type=int, help="posts moved per transaction")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        after_days = archive_settings()["AFTER_DAYS"]
+        days = options["days"] or after_days
+        if not days or days < 0:
+            raise CommandError("pass --days or set CHALLENGES_POST_ARCHIVE['AFTER_DAYS']")
+        if after_days is None:
+            self.stderr.write("CHALLENGES_POST_ARCHIVE['AFTER_DAYS'] is not set: the views read archived posts only "
+                              "with archive=1")
+        elif days < after_days:
+            self.stderr.write(f"--days {days} is below AFTER_DAYS ({after_days}): the views find the posts archived "
+                              f"in between by date range only with archive=1")
+        cutoff = timezone.now() - timedelta(days=days)
+
+        if options["dry_run"]:
+            self.stdout.write(f"{archivable_posts(cutoff).count()} posts last active before {cutoff:%Y-%m-%d %H:%M} "
+                              f"would be archived")
+            return
+
+        started = time.perf_counter()
+        moved = archive_posts(cutoff, options["batch_size"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"archived {moved} posts last active before {cutoff:%Y-%m-%d %H:%M} in {elapsed:.2f}s; "
+                          f"{Post.objects.count()} hot, {ArchivedPost.objects.count()} archived")
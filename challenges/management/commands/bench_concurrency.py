@@ -0,0 +1,113 @@
+"""
+Mixed slow / fast load against the WSGI and the ASGI deployment, driven in process (challenges.inprocess):
+
+    wsgi        orm_challenges.wsgi, sync views, one thread per concurrent request
+    asgi        orm_challenges.asgi, async views under async/, one event loop
+    asgi-sync   orm_challenges.asgi, sync views (each runs in the request's thread via sync_to_async)
+
+The same request sequence is sent to each deployment. Every request carries a unique query parameter, so the
+response cache never answers it.
+"""
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from challenges.benchmarks import format_summary, summarize
+from challenges.inprocess import asgi_request, wsgi_request
+from challenges.models import Laptop
+from orm_challenges.asgi import application as asgi_application
+from orm_challenges.wsgi import application as wsgi_application
+
+PlannedRequest = tuple[str, str, dict[str, Any]]  # kind ("fast" / "slow"), path, query
+Outcome = tuple[str, float, int]  # kind, seconds, status
+
+SLOW_REQUESTS = [
+    ("/posts/search/", {"query": "dolor,amet", "limit": "1000"}),
+    ("/laptops/in-stock/", {}),
+]
+FAST_REQUESTS = [
+    ("/laptops/{laptop_id}/", {}),
+    ("/laptops/last/", {}),
+    ("/posts/latest/", {}),
+]
+
+
+def plan_requests(count: int, slow_share: float, rng: random.Random, laptop_ids: list[int]) -> list[PlannedRequest]:
+    planned = []
+    for number in range(count):
+        kind = "slow" if rng.random() < slow_share else "fast"
+        path, query = rng.choice(SLOW_REQUESTS if kind == "slow" else FAST_REQUESTS)
+        planned.append((kind, path.format(laptop_id=rng.choice(laptop_ids)), {**query, "_": str(number)}))
+    return planned
+
+
+def run_wsgi(planned: list[PlannedRequest], concurrency: int) -> list[Outcome]:
+    def send(request: PlannedRequest) -> Outcome:
+        kind, path, query = request
+        started = time.perf_counter()
+        status, _ = wsgi_request(wsgi_application, "GET", path, query)
+        return kind, time.perf_counter() - started, status
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(send, planned))
+
+
+async def run_asgi(planned: list[PlannedRequest], concurrency: int, prefix: str) -> list[Outcome]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(request: PlannedRequest) -> Outcome:
+        kind, path, query = request
+        async with semaphore:
+            started = time.perf_counter()
+            status, _ = await asgi_request(asgi_application, "GET", prefix + path, query)
+            return kind, time.perf_counter() - started, status
+
+    return await asyncio.gather(*(send(request) for request in planned))
+
+
+class Command(BaseCommand):
+    help = "Compare the WSGI and the ASGI deployment under a mix of slow and fast requests."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--requests", type=int, default=400, help="requests sent to each deployment")
+        parser.add_argument("--concurrency", type=int, default=16, help="requests in flight at once")
+        parser.add_argument("--slow-share", type=float, default=0.1, help="share of slow requests in the mix")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options) -> None:
+        laptop_ids = list(Laptop.objects.values_list("id", flat=True)[:1000])
+        if not laptop_ids:
+            raise CommandError("no laptops to request, run the seed command first")
+        planned = plan_requests(options["requests"], options["slow_share"], random.Random(options["seed"]),
+                                laptop_ids)
+        concurrency = options["concurrency"]
+
+        deployments = {
+            "wsgi": lambda: run_wsgi(planned, concurrency),
+            "asgi": lambda: asyncio.run(run_asgi(planned, concurrency, "/async")),
+            "asgi-sync": lambda: asyncio.run(run_asgi(planned, concurrency, "")),
+        }
+        request_log = logging.getLogger("challenges.requests")
+        request_log.disabled = True
+        try:
+            for name, run in deployments.items():
+                started = time.perf_counter()
+                outcomes = run()
+                elapsed = time.perf_counter() - started
+                self.report(name, outcomes, elapsed, concurrency)
+        finally:
+            request_log.disabled = False
+
+    def report(self, name: str, outcomes: list[Outcome], elapsed: float, concurrency: int) -> None:
+        errors = sum(status >= 500 for _, _, status in outcomes)
+        self.stdout.write(f"{name}: {len(outcomes) / elapsed:,.1f} requests/s with {concurrency} in flight"
+                          + (self.style.ERROR(f", {errors} errors") if errors else ""))
+        for kind in ("fast", "slow"):
+            samples = [seconds for outcome_kind, seconds, _ in outcomes if outcome_kind == kind]
+            if samples:
+                self.stdout.write(format_summary(f"  {kind}", summarize(samples)))
@@ -0,0 +1,71 @@
+"""
+Facet counts of the laptop search computed in one conditional-aggregate query (challenges.facets.facet_counts)
+against one query per facet, on a fresh test database seeded with --laptops laptops.
+"""
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from challenges.benchmarks import format_summary, summarize, time_calls
+from challenges.facets import FACETS, LaptopSearch, facet_aggregates, facet_counts, read_facets
+from challenges.models import Laptop
+from challenges.seeding import seed
+
+SEARCHES = {
+    "no filters": LaptopSearch(),
+    "two brands, in stock": LaptopSearch(brands=("HP", "DELL"), in_stock=True),
+    "price ranges, memory 16+": LaptopSearch(prices=((None, 500), (1500, 2500)), memory=((16, None),)),
+    "every filter": LaptopSearch(brands=("LENOVO", "ASUS", "ACER"), prices=((800, 3000),), memory=((8, 31),),
+                                 disks=((512, None),), years=((2018, 2022),), in_stock=True),
+}
+
+
+def per_facet_counts(search: LaptopSearch) -> tuple[int, dict[str, dict[str, int]]]:
+    # the baseline: the total and every facet in a query of its own
+    total = search.queryset().count()
+    facets = {}
+    for facet in FACETS:
+        others = Q(*[condition for name, condition in search.facet_filters().items() if name != facet])
+        row = Laptop.objects.filter(search.base_filter(), others).aggregate(**facet_aggregates(search, (facet,)))
+        facets.update(read_facets(row, (facet,)))
+    return total, facets
+
+
+class Command(BaseCommand):
+    help = "Compare single-pass facet counts of the laptop search with one query per facet."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--laptops", type=int, default=200_000, help="laptops seeded into the test database")
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument("--workers", type=int, default=0, help="processes generating the seed rows")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options) -> None:
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CHALLENGES_REPLICA=None):
+                report = seed("laptops", options["laptops"], workers=options["workers"], seed=options["seed"],
+                              validate=False)
+                self.stdout.write(f"  {report}")
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options: dict[str, Any]) -> None:
+        for name, search in SEARCHES.items():
+            with CaptureQueriesContext(connection) as single_queries:
+                single = facet_counts(search)
+            with CaptureQueriesContext(connection) as split_queries:
+                split = per_facet_counts(search)
+            if single != split:
+                raise CommandError(f"{name}: single-pass facet counts differ from the per-facet queries")
+
+            one_pass = summarize(time_calls(lambda: facet_counts(search), options["repeat"]))
+            per_facet = summarize(time_calls(lambda: per_facet_counts(search), options["repeat"]))
+            self.stdout.write(f"{name}: {single[0]} matches")
+            self.stdout.write(format_summary(f"  one query ({len(single_queries)})", one_pass))
+            self.stdout.write(format_summary(f"  query per facet ({len(split_queries)})", per_facet))
+            self.stdout.write(self.style.SUCCESS(f"  speedup x{per_facet['p50_ms'] / one_pass['p50_ms']:.2f}"))
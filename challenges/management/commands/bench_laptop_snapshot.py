@@ -0,0 +1,97 @@
+"""
+The laptop filter, in-stock and latest listings answered by the columnar snapshot (challenges.columnar) against
+the ORM, on a fresh test database seeded with --laptops laptops, plus the cost of the snapshot's incremental
+refresh after --updates saved laptops against a full reload.
+"""
+import random
+from typing import Any, Callable
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from challenges.benchmarks import format_summary, summarize, time_calls
+from challenges.columnar import LaptopSnapshot, get_laptop_snapshot
+from challenges.models import Laptop
+from challenges.pagination import paginate
+from challenges.seeding import seed
+from challenges.views.level_2.a_laptops import LAPTOP_JSON, LAPTOP_PAGE_KEYS, in_stock_laptops, laptops_by_brand, \
+    latest_laptops
+
+FILTER_BRAND = "HP"
+FILTER_MIN_PRICE = 1000.0
+PAGE_SIZE = 50
+
+
+def by_id(rows: list[dict[str, Any]]) -> dict[int, dict[str, Any]]:
+    # what the in-stock view returns; rows created at the same moment come in any order
+    return {row["id"]: row for row in rows}
+
+
+class Command(BaseCommand):
+    help = "Compare the columnar laptop snapshot with the ORM on the laptop listings."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--laptops", type=int, default=200_000, help="laptops seeded into the test database")
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument("--updates", type=int, default=100, help="laptops saved before an incremental refresh")
+        parser.add_argument("--workers", type=int, default=0, help="processes generating the seed rows")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options) -> None:
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        snapshot_options = {"ENABLED": True, "MAX_AGE": 3600, "MAX_INCREMENTAL": options["updates"]}
+        try:
+            with override_settings(CHALLENGES_REPLICA=None, CHALLENGES_LAPTOP_SNAPSHOT=snapshot_options):
+                report = seed("laptops", options["laptops"], workers=options["workers"], seed=options["seed"],
+                              validate=False)
+                self.stdout.write(f"  {report}")
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def compare(self, name: str, orm: Callable[[], Any], columnar: Callable[[], Any], repeat: int) -> None:
+        if orm() != columnar():
+            raise CommandError(f"{name}: the snapshot differs from the ORM")
+        orm_timings = summarize(time_calls(orm, repeat))
+        snapshot_timings = summarize(time_calls(columnar, repeat))
+        self.stdout.write(f"{name}:")
+        self.stdout.write(format_summary("  orm", orm_timings))
+        self.stdout.write(format_summary("  snapshot", snapshot_timings))
+        self.stdout.write(self.style.SUCCESS(f"  speedup x{orm_timings['p50_ms'] / snapshot_timings['p50_ms']:.2f}"))
+
+    def run(self, options: dict[str, Any]) -> None:
+        snapshot = get_laptop_snapshot()
+        load = summarize(time_calls(lambda: LaptopSnapshot(3600, 0).latest(), 1, warmup=0))
+        self.stdout.write(format_summary("full load", load))
+        repeat = options["repeat"]
+
+        first_page = snapshot.filter_page(FILTER_BRAND, FILTER_MIN_PRICE, None, PAGE_SIZE)
+        cursor = first_page.next_cursor
+        self.compare(
+            "filter, first page",
+            lambda: paginate(laptops_by_brand(FILTER_BRAND, FILTER_MIN_PRICE), LAPTOP_PAGE_KEYS, None, PAGE_SIZE,
+                             serializer=LAPTOP_JSON),
+            lambda: snapshot.filter_page(FILTER_BRAND, FILTER_MIN_PRICE, None, PAGE_SIZE), repeat)
+        self.compare(
+            "filter, next page",
+            lambda: paginate(laptops_by_brand(FILTER_BRAND, FILTER_MIN_PRICE), LAPTOP_PAGE_KEYS, cursor, PAGE_SIZE,
+                             serializer=LAPTOP_JSON),
+            lambda: snapshot.filter_page(FILTER_BRAND, FILTER_MIN_PRICE, cursor, PAGE_SIZE), repeat)
+        self.compare("in stock", lambda: by_id(LAPTOP_JSON.serialize(in_stock_laptops())),
+                     lambda: by_id(snapshot.in_stock()), repeat)
+        self.compare("latest", lambda: LAPTOP_JSON.one(latest_laptops()), snapshot.latest, repeat)
+
+        rng = random.Random(options["seed"])
+        ids = list(Laptop.objects.values_list("pk", flat=True))
+        refreshes = []
+        for _ in range(repeat):
+            with transaction.atomic():
+                for laptop in Laptop.objects.filter(pk__in=rng.sample(ids, options["updates"])):
+                    laptop.price = round(rng.uniform(100, 5000), 2)
+                    laptop.count = rng.randint(0, 50)
+                    laptop.save()
+            refreshes.extend(time_calls(snapshot.latest, 1, warmup=0))
+        self.stdout.write(format_summary(f"refresh after {options['updates']} saves", summarize(refreshes)))
+        if by_id(snapshot.in_stock()) != by_id(LAPTOP_JSON.serialize(in_stock_laptops())):
+            raise CommandError("the refreshed snapshot differs from the ORM")
@@ -0,0 +1,70 @@
+"""
+Concurrent POST /posts/create/ through orm_challenges.wsgi (in process, challenges.inprocess), with every request
+inserting its own posts and through the write-behind queue (challenges.writebehind), on the configured database.
+The posts created by the run are deleted afterwards.
+
+    manage.py bench_post_writes --threads 16 --requests 400
+    manage.py bench_post_writes --no-wait      replies before the commit (202)
+"""
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import Max
+from django.test.utils import override_settings
+
+from challenges.benchmarks import format_summary, summarize
+from challenges.inprocess import wsgi_request
+from challenges.models import Post
+from challenges.views.level_2.b_blog import CREATED_POSTS
+from challenges.writebehind import get_post_writer, write_behind_settings
+from orm_challenges.wsgi import application
+
+
+class Command(BaseCommand):
+    help = "Compare direct and write-behind post creation under concurrent requests."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument("--no-wait", action="store_true", help="do not wait for the commit of queued posts")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        logging.getLogger("challenges.requests").setLevel(logging.ERROR)
+        first_id = (Post.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+        try:
+            with override_settings(CHALLENGES_POST_WRITE_BEHIND={**write_behind_settings(), "ENABLED": False}):
+                self.run("direct", options)
+            with override_settings(CHALLENGES_POST_WRITE_BEHIND={**write_behind_settings(), "ENABLED": True,
+                                                                 "WAIT": not options["no_wait"]}):
+                self.run("write-behind", options)
+                writer = get_post_writer()
+                writer.stop()
+                stats = writer.stats()
+                self.stdout.write(f"  {stats['batches']} batches of {stats['mean_batch']} posts on average, "
+                                  f"queue depth up to {stats['max_depth']}, {stats['failed']} posts failed")
+                self.stdout.write(format_summary("  flush", stats["flush_latency"]))
+                self.stdout.write(format_summary("  queued to committed", stats["commit_latency"]))
+        finally:
+            Post.objects.filter(pk__gte=first_id).delete()
+
+    def run(self, name: str, options: dict[str, Any]) -> None:
+        def send(number: int) -> tuple[float, int]:
+            started = time.perf_counter()
+            status, _ = wsgi_request(application, "POST", "/posts/create/")
+            return time.perf_counter() - started, status
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+            outcomes = list(executor.map(send, range(options["requests"])))
+        elapsed = time.perf_counter() - started
+
+        statuses = Counter(status for _, status in outcomes)
+        served = statuses[200] + statuses[202]
+        self.stdout.write(f"{name}: {options['requests']} requests from {options['threads']} threads in "
+                          f"{elapsed:.2f}s, {served * CREATED_POSTS / elapsed:,.0f} posts/s, "
+                          f"statuses {dict(sorted(statuses.items()))}")
+        self.stdout.write(format_summary("  latency", summarize([seconds for seconds, _ in outcomes])))
@@ -0,0 +1,283 @@
+"""
+Latency / query / memory benchmark of every route in orm_challenges/urls.py at several dataset sizes.
+
+For each size a fresh test database is created and seeded with that many posts, laptops and books, then every
+route is requested through the test client. The response cache is cleared before each request, so the numbers
+are those of the view itself. Results are written to JSON and can be compared with a stored baseline:
+
+    manage.py bench_routes --sizes 1000 100000 --baseline bench/baseline.json --save-baseline
+    manage.py bench_routes --sizes 1000 100000 --baseline bench/baseline.json --threshold 0.2
+"""
+import json
+import logging
+import platform
+import random
+import sqlite3
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import django
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from challenges.benchmarks import find_regressions, format_summary, summarize
+from challenges.cache import get_response_cache
+from challenges.instrumentation import instrument
+from challenges.models import Book, Laptop, Post
+from challenges.seeding import seed
+from challenges.testing import iter_views
+
+Request = tuple[str, str, dict[str, Any] | list[Any] | bytes | None]  # a list is sent as JSON, bytes as NDJSON
+
+
+class Fixtures:
+    """
+    Random existing primary keys to request detail routes with.
+    """
+    def __init__(self, rng: random.Random, sample_size: int = 1000) -> None:
+        self.rng = rng
+        self.ids = {model: list(model.objects.order_by("?").values_list("pk", flat=True)[:sample_size])
+                    for model in (Book, Laptop, Post)}
+
+    def pick(self, model: type) -> int:
+        return self.rng.choice(self.ids[model]) if self.ids[model] else 0
+
+
+def new_book(fixtures: Fixtures) -> Request:
+    # created outside the timed request
+    book = Book.objects.create(title="To be deleted", author_full_name="Bench Mark", isbn="0000000000")
+    return "post", f"/book/{book.pk}/delete/", None
+
+
+def new_books(fixtures: Fixtures) -> Request:
+    books = Book.objects.bulk_create(Book(title="To be deleted", author_full_name="Bench Mark", isbn="0000000000")
+                                     for _ in range(BATCH_SIZE))
+    return "post", "/book/batch/delete/", [book.pk for book in books]
+
+
+def stocked_laptops(fixtures: Fixtures) -> Request:
+    # created outside the timed request
+    laptops = [Laptop.objects.create(brand="HP", year=2024, memory=16, disk=512, price=999.0, count=10,
+                                     created_at=datetime.now(timezone.utc)) for _ in range(3)]
+    return "post", "/laptops/reserve/", [{"laptop_id": laptop.pk, "quantity": 2} for laptop in laptops]
+
+
+BOOK_DATA = {"title": "Bench", "author_full_name": "Bench Mark", "isbn": "1234567890"}
+BATCH_SIZE = 100
+INGEST_BODY = b"".join(json.dumps({"title": "Bench", "content": "Bench post", "author": "Bench Mark",
+                                   "created_at": "2024-01-01T10:00:00Z", "status": "published",
+                                   "published_at": "2024-01-02T10:00:00Z", "category": "modi"}).encode() + b"\n"
+                       for _ in range(1000))
+
+# route in urlpatterns -> named requests against it
+ROUTE_CASES: dict[str, dict[str, Callable[[Fixtures], Request]]] = {
+    "book/create/": {"POST /book/create/": lambda f: ("post", "/book/create/", BOOK_DATA)},
+    "book/<int:book_id>/": {"GET /book/<id>/": lambda f: ("get", f"/book/{f.pick(Book)}/", None)},
+    "book/<int:book_id>/delete/": {"POST /book/<id>/delete/": new_book},
+    "book/<int:book_id>/update/": {
+        "POST /book/<id>/update/": lambda f: ("post", f"/book/{f.pick(Book)}/update/", BOOK_DATA),
+    },
+    "book/batch/create/": {
+        "POST /book/batch/create/": lambda f: ("post", "/book/batch/create/", [BOOK_DATA] * BATCH_SIZE),
+    },
+    "book/batch/update/": {
+        "POST /book/batch/update/": lambda f: ("post", "/book/batch/update/",
+                                               [{"id": f.pick(Book), **BOOK_DATA} for _ in range(BATCH_SIZE)]),
+    },
+    "book/batch/delete/": {"POST /book/batch/delete/": new_books},
+    "laptops/<int:laptop_id>/": {"GET /laptops/<id>/": lambda f: ("get", f"/laptops/{f.pick(Laptop)}/", None)},
+    "laptops/in-stock/": {
+        "GET /laptops/in-stock/": lambda f: ("get", "/laptops/in-stock/", None),
+        "GET /laptops/in-stock/?stream=1": lambda f: ("get", "/laptops/in-stock/", {"stream": "1"}),
+    },
+    "laptops/": {"GET /laptops/?brand=HP": lambda f: ("get", "/laptops/", {"brand": "HP", "min_price": "1000"})},
+    "laptops/last/": {"GET /laptops/last/": lambda f: ("get", "/laptops/last/", None)},
+    "laptops/inventory/": {"GET /laptops/inventory/": lambda f: ("get", "/laptops/inventory/", None)},
+    "laptops/search/": {
+        "GET /laptops/search/": lambda f: ("get", "/laptops/search/", None),
+        "GET /laptops/search/ filtered": lambda f: ("get", "/laptops/search/",
+                                                    {"brand": "HP,Dell", "price": "500-1500", "memory": "16-",
+                                                     "in_stock": "1"}),
+    },
+    "laptops/reserve/": {"POST /laptops/reserve/": stocked_laptops},
+    "posts/create/": {"POST /posts/create/": lambda f: ("post", "/posts/create/", None)},
+    "posts/latest/": {"GET /posts/latest/": lambda f: ("get", "/posts/latest/", None)},
+    "posts/feed/": {
+        "GET /posts/feed/?n=50": lambda f: ("get", "/posts/feed/", {"n": "50"}),
+        "GET /posts/feed/?n=50&archive=1": lambda f: ("get", "/posts/feed/", {"n": "50", "archive": "1"}),
+    },
+    "posts/ingest/": {"POST /posts/ingest/": lambda f: ("post", "/posts/ingest/", INGEST_BODY)},
+    "posts/search/": {
+        "GET /posts/search/?query=dolor": lambda f: ("get", "/posts/search/", {"query": "dolor"}),
+        "GET /posts/search/ strict": lambda f: ("get", "/posts/search/",
+                                                {"query": "dolor,amet", "behavior": "strict"}),
+    },
+    "posts/untagged/": {
+        "GET /posts/untagged/": lambda f: ("get", "/posts/untagged/", None),
+        "GET /posts/untagged/?archive=1": lambda f: ("get", "/posts/untagged/", {"archive": "1"}),
+    },
+    "posts/by-categories/": {
+        "GET /posts/by-categories/": lambda f: ("get", "/posts/by-categories/", {"category": "amet,modi"}),
+    },
+    "posts/last-published/": {
+        "GET /posts/last-published/": lambda f: ("get", "/posts/last-published/", {"last_days": "3650"}),
+    },
+    "posts/histogram/": {
+        "GET /posts/histogram/?last_days=30": lambda f: ("get", "/posts/histogram/", {"last_days": "30"}),
+        "GET /posts/histogram/?last_days=3650": lambda f: ("get", "/posts/histogram/", {"last_days": "3650"}),
+    },
+    "stats/response-cache/": {"GET /stats/response-cache/": lambda f: ("get", "/stats/response-cache/", None)},
+    "stats/post-writer/": {"GET /stats/post-writer/": lambda f: ("get", "/stats/post-writer/", None)},
+}
+
+
+def async_cases(cases: dict[str, Callable[[Fixtures], Request]]) -> dict[str, Callable[[Fixtures], Request]]:
+    def prefixed(build: Callable[[Fixtures], Request]) -> Callable[[Fixtures], Request]:
+        def build_async(fixtures: Fixtures) -> Request:
+            method, path, data = build(fixtures)
+            return method, "/async" + path, data
+        return build_async
+    return {f"{name.split(' ', 1)[0]} /async{name.split(' ', 1)[1]}": prefixed(build) for name, build in cases.items()}
+
+
+# the async views under async/ take the same requests as their sync counterparts
+ASYNC_ROUTES = {route for route, _ in iter_views() if route.startswith("async/")}
+ROUTE_CASES.update({f"async/{route}": async_cases(cases) for route, cases in list(ROUTE_CASES.items())
+                    if f"async/{route}" in ASYNC_ROUTES})
+
+
+def send(client: Client, request: Request) -> tuple[int, float, Any]:
+    method, path, data = request
+    get_response_cache().clear()
+    with instrument() as metrics:
+        started = time.perf_counter()
+        if isinstance(data, list):
+            response = getattr(client, method)(path, data, content_type="application/json")
+        elif isinstance(data, bytes):
+            response = getattr(client, method)(path, data, content_type="application/x-ndjson")
+        else:
+            response = getattr(client, method)(path, data)
+        if response.streaming:
+            b"".join(response)  # async streaming content too
+        elapsed = time.perf_counter() - started
+    return response.status_code, elapsed, metrics
+
+
+def measure(client: Client, fixtures: Fixtures, build: Callable[[Fixtures], Request], repeat: int,
+            warmup: int) -> dict[str, Any]:
+    for _ in range(warmup):
+        send(client, build(fixtures))
+
+    samples = []
+    for _ in range(repeat):
+        status, elapsed, metrics = send(client, build(fixtures))
+        samples.append(elapsed)
+
+    # one more run under tracemalloc, it slows execution down too much to be timed
+    request = build(fixtures)
+    tracemalloc.start()
+    try:
+        send(client, request)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {**summarize(samples), "status": status, "queries": metrics.queries, "rows": metrics.rows,
+            "peak_memory_kb": round(peak / 1024, 1)}
+
+
+class Command(BaseCommand):
+    help = "Benchmark every route in orm_challenges/urls.py against seeded databases of several sizes."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100_000, 1_000_000],
+                            help="rows of each model to seed, one test database per size")
+        parser.add_argument("--repeat", type=int, default=20, help="timed requests per case")
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--only", default=None, help="substring of the case names to run")
+        parser.add_argument("--workers", type=int, default=0, help="processes generating the seed rows")
+        parser.add_argument("--seed", type=int, default=0, help="random seed of the data and the requests")
+        parser.add_argument("--output", default="bench_routes.json", help="where to write the results")
+        parser.add_argument("--baseline", default=None, help="results file to compare with")
+        parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+        parser.add_argument("--threshold", type=float, default=0.2,
+                            help="allowed relative p95 slowdown against the baseline")
+
+    def handle(self, *args, **options) -> None:
+        missing = sorted({route for route, _ in iter_views()} - set(ROUTE_CASES))
+        if missing:
+            raise CommandError(f"no benchmark cases for routes: {', '.join(missing)}")
+
+        results: dict[str, dict[str, dict[str, Any]]] = {}
+        request_log = logging.getLogger("challenges.requests")
+        request_log.disabled = True
+        setup_test_environment(debug=False)
+        try:
+            # the test database is created for default only, the replica would still be the real one
+            with override_settings(CHALLENGES_REPLICA=None):
+                for size in options["sizes"]:
+                    results[str(size)] = self.run_size(size, options)
+        finally:
+            teardown_test_environment()
+            request_log.disabled = False
+
+        report = {
+            "meta": {
+                "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "repeat": options["repeat"],
+            },
+            "results": results,
+        }
+        Path(options["output"]).write_text(json.dumps(report, indent=2))
+        self.stdout.write(f"results written to {options['output']}")
+
+        baseline_path = Path(options["baseline"]) if options["baseline"] else None
+        if baseline_path is None:
+            return
+        if options["save_baseline"]:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"baseline saved to {baseline_path}")
+            return
+        if not baseline_path.exists():
+            raise CommandError(f"baseline {baseline_path} does not exist, create it with --save-baseline")
+
+        baseline = json.loads(baseline_path.read_text())["results"]
+        regressions = find_regressions(results, baseline, options["threshold"])
+        if regressions:
+            raise CommandError("regressions against the baseline:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"no regressions against {baseline_path}"))
+
+    def run_size(self, size: int, options: dict[str, Any]) -> dict[str, dict[str, Any]]:
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f"seeding {size} rows per model")
+            for kind in ("posts", "laptops", "books"):
+                report = seed(kind, size, workers=options["workers"], seed=options["seed"], validate=False)
+                self.stdout.write(f"  {report}")
+
+            client = Client()
+            fixtures = Fixtures(random.Random(options["seed"]))
+            measurements = {}
+            for cases in ROUTE_CASES.values():
+                for name, build in cases.items():
+                    if options["only"] and options["only"] not in name:
+                        continue
+                    measurement = measure(client, fixtures, build, options["repeat"], options["warmup"])
+                    measurements[name] = measurement
+                    line = (format_summary(f"  {name}", measurement)
+                            + f"  {measurement['queries']} queries, peak {measurement['peak_memory_kb']:.0f} KiB")
+                    if measurement["status"] >= 400:
+                        line = self.style.WARNING(f"{line}  status {measurement['status']}")
+                    self.stdout.write(line)
+            return measurements
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.core.serializers.json import DjangoJSONEncoder
+
+from challenges.benchmarks import format_summary, summarize, time_calls
+from challenges.models import Laptop, Post
+from challenges.serializers import serializer_for
+
+
+class Command(BaseCommand):
+    help = "Compare the per-instance to_json() path with the compiled values_list() serializers."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--rows", type=int, default=10000, help="rows serialized per run")
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options) -> None:
+        for model in (Post, Laptop):
+            queryset = model.objects.all()[:options["rows"]]
+            serializer = serializer_for(model)
+
+            def with_to_json() -> str:
+                return json.dumps([instance.to_json() for instance in queryset.all()], cls=DjangoJSONEncoder)
+
+            def with_serializer() -> str:
+                return json.dumps(serializer.serialize(queryset), cls=DjangoJSONEncoder)
+
+            rows = queryset.count()
+            if rows == 0:
+                raise CommandError(f"no {model.__name__} rows to serialize, run the seed command first")
+            if with_to_json() != with_serializer():
+                raise CommandError(f"{model.__name__}: serializer output differs from to_json()")
+
+            baseline = summarize(time_calls(with_to_json, options["repeat"]))
+            compiled = summarize(time_calls(with_serializer, options["repeat"]))
+            self.stdout.write(f"{model.__name__}, {rows} rows")
+            self.stdout.write(format_summary("  to_json()", baseline))
+            self.stdout.write(format_summary("  compiled serializer", compiled))
+            self.stdout.write(self.style.SUCCESS(f"  speedup x{baseline['p50_ms'] / compiled['p50_ms']:.2f}"))
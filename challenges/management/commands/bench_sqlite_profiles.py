@@ -0,0 +1,155 @@
+"""
+Effect of the SQLite connection profiles (challenges/sqlite.py) and of CONN_MAX_AGE on the blog and laptop
+endpoints, driven through orm_challenges.wsgi in process (challenges.inprocess).
+
+Every combination runs against its own copy of the database, so journal modes and inserted rows do not leak
+between runs:
+
+    load    seed posts in one thread (the bulk-load case)
+    serve   reader threads on the read endpoints while one writer keeps creating posts
+
+    manage.py bench_sqlite_profiles --profiles default serving bulk_load --conn-max-age 0 600
+"""
+import logging
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection, connections
+from django.test.utils import override_settings
+
+from challenges.benchmarks import format_summary, summarize
+from challenges.inprocess import wsgi_request
+from challenges.models import Laptop
+from challenges.seeding import seed
+from challenges.sqlite import PRESETS
+from orm_challenges.wsgi import application
+
+READ_REQUESTS = [
+    ("/posts/latest/", {}),
+    ("/posts/untagged/", {}),
+    ("/posts/by-categories/", {"category": "amet,modi"}),
+    ("/posts/last-published/", {"last_days": "30"}),
+    ("/laptops/{laptop_id}/", {}),
+    ("/laptops/", {"brand": "HP", "min_price": "1000"}),
+    ("/laptops/last/", {}),
+]
+WRITE_REQUEST = ("/posts/create/", {})
+
+Outcome = tuple[float, int]  # seconds, status
+
+
+def copy_database(source: str, target: Path) -> None:
+    with closing(sqlite3.connect(source)) as src, closing(sqlite3.connect(target)) as dst:
+        src.backup(dst)
+
+
+def read_worker(planned: list[tuple[str, dict[str, Any]]], outcomes: list[Outcome]) -> None:
+    try:
+        for path, query in planned:
+            started = time.perf_counter()
+            status, _ = wsgi_request(application, "GET", path, query)
+            outcomes.append((time.perf_counter() - started, status))
+    finally:
+        connections.close_all()
+
+
+def write_worker(stop: threading.Event, outcomes: list[Outcome]) -> None:
+    path, query = WRITE_REQUEST
+    try:
+        while not stop.is_set():
+            started = time.perf_counter()
+            status, _ = wsgi_request(application, "POST", path, query)
+            outcomes.append((time.perf_counter() - started, status))
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Compare SQLite connection profiles and CONN_MAX_AGE on bulk loading and on the read/write endpoints."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--profiles", nargs="+", default=["default", *PRESETS],
+                            choices=["default", *PRESETS], help='"default" runs without pragmas')
+        parser.add_argument("--conn-max-age", type=int, nargs="+", default=[0, 600])
+        parser.add_argument("--load-rows", type=int, default=20_000, help="posts seeded by the load phase")
+        parser.add_argument("--requests", type=int, default=300, help="read requests per reader thread")
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--no-writer", action="store_false", dest="writer",
+                            help="serve reads without a concurrent writer")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options) -> None:
+        if connection.vendor != "sqlite":
+            raise CommandError("the default database is not SQLite")
+        laptop_ids = list(Laptop.objects.values_list("id", flat=True)[:1000])
+        if not laptop_ids:
+            raise CommandError("no laptops to request, run the seed command first")
+
+        source = str(connection.settings_dict["NAME"])
+        original = {key: connection.settings_dict[key] for key in ("NAME", "CONN_MAX_AGE")}
+        request_log = logging.getLogger("challenges.requests")
+        request_log.disabled = True
+        connection.close()
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                for profile in options["profiles"]:
+                    for max_age in options["conn_max_age"]:
+                        target = Path(directory) / f"{profile}-{max_age}.sqlite3"
+                        copy_database(source, target)
+                        connection.settings_dict.update(NAME=str(target), CONN_MAX_AGE=max_age)
+                        # on the copy alone, without the read replica
+                        with override_settings(CHALLENGES_SQLITE_PROFILE=None if profile == "default" else profile,
+                                               CHALLENGES_REPLICA=None):
+                            self.run_profile(f"{profile}, CONN_MAX_AGE={max_age}", laptop_ids, options)
+                        connection.close()
+        finally:
+            connection.settings_dict.update(original)
+            request_log.disabled = False
+
+    def run_profile(self, name: str, laptop_ids: list[int], options: dict[str, Any]) -> None:
+        self.stdout.write(name)
+        started = time.perf_counter()
+        seed("posts", options["load_rows"], seed=options["seed"], validate=False)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"  load  {options['load_rows'] / elapsed:,.0f} posts/s")
+        connection.close()
+
+        rng = random.Random(options["seed"])
+        plans = []
+        for reader in range(options["readers"]):
+            plan = []
+            for number in range(options["requests"]):
+                path, query = rng.choice(READ_REQUESTS)
+                # a unique parameter keeps the response cache out of the measurement
+                plan.append((path.format(laptop_id=rng.choice(laptop_ids)), {**query, "_": f"{reader}-{number}"}))
+            plans.append(plan)
+
+        reads: list[Outcome] = []
+        writes: list[Outcome] = []
+        stop = threading.Event()
+        readers = [threading.Thread(target=read_worker, args=(plan, reads)) for plan in plans]
+        writer = threading.Thread(target=write_worker, args=(stop, writes)) if options["writer"] else None
+        started = time.perf_counter()
+        for thread in readers + ([writer] if writer else []):
+            thread.start()
+        for thread in readers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        stop.set()
+        if writer:
+            writer.join()
+
+        for kind, outcomes in (("reads", reads), ("writes", writes)):
+            if not outcomes:
+                continue
+            errors = sum(status >= 500 for _, status in outcomes)
+            line = (format_summary(f"  {kind}", summarize([seconds for seconds, _ in outcomes]))
+                    + f"  {len(outcomes) / elapsed:,.0f}/s")
+            self.stdout.write(line + (self.style.ERROR(f"  {errors} errors") if errors else ""))
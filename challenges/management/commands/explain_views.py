@@ -0,0 +1,93 @@
+import statistics
+import time
+from datetime import timedelta
+from typing import Callable
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from challenges.feed import published_feed
+from challenges.models import LoremCategory
+from challenges.pagination import encode_cursor, page_queryset
+from challenges.views.level_2.a_laptops import LAPTOP_PAGE_KEYS, in_stock_laptops, latest_laptops, laptops_by_brand
+from challenges.views.level_2.b_blog import MAX_FEED_SIZE, posts_in_categories, posts_published_since, \
+    untagged_posts
+from challenges.views.level_2.utils import POST_PAGE_KEYS
+
+FULL_SCAN = "full table scan"
+INDEX_SCAN = "full index scan"
+TEMP_SORT = "temp b-tree sort"
+
+
+def paged(queryset: QuerySet, keys: list[str], second_page: bool = False) -> QuerySet:
+    """
+    The query a paginated view runs for its first page, or for the page after it.
+    """
+    page = page_queryset(queryset, keys)
+    if not second_page:
+        return page
+    rows = list(page.values_list(*keys))
+    return page_queryset(queryset, keys, encode_cursor(rows[-2])) if len(rows) > 1 else page
+
+
+def query_shapes() -> dict[str, Callable[[], QuerySet]]:
+    week_ago = timezone.now() - timedelta(days=7)
+    two_categories = [LoremCategory.amet.value, LoremCategory.modi.value]
+    return {
+        "laptops/in-stock/": lambda: in_stock_laptops(),
+        "laptops/ (page 1)": lambda: paged(laptops_by_brand("HP", 1000), LAPTOP_PAGE_KEYS),
+        "laptops/ (page 2)": lambda: paged(laptops_by_brand("HP", 1000), LAPTOP_PAGE_KEYS, second_page=True),
+        "laptops/last/": lambda: latest_laptops()[:1],
+        "posts/latest/, posts/feed/": lambda: published_feed()[:MAX_FEED_SIZE],
+        "posts/untagged/ (page 1)": lambda: paged(untagged_posts(), POST_PAGE_KEYS),
+        "posts/untagged/ (page 2)": lambda: paged(untagged_posts(), POST_PAGE_KEYS, second_page=True),
+        "posts/by-categories/ (one)": lambda: paged(posts_in_categories(two_categories[:1]), POST_PAGE_KEYS),
+        "posts/by-categories/ (two)": lambda: paged(posts_in_categories(two_categories), POST_PAGE_KEYS),
+        "posts/last-published/ (7 days)": lambda: paged(posts_published_since(week_ago), POST_PAGE_KEYS),
+    }
+
+
+def plan_flags(plan: str) -> list[str]:
+    flags = []
+    for line in plan.splitlines():
+        if "SCAN " in line and "USING" not in line and "VIRTUAL TABLE" not in line:
+            flags.append(FULL_SCAN)
+        elif "SCAN " in line and "USING" in line:
+            flags.append(INDEX_SCAN)
+        if "USE TEMP B-TREE" in line:
+            flags.append(TEMP_SORT)
+    return flags
+
+
+class Command(BaseCommand):
+    help = ("Run EXPLAIN QUERY PLAN on the queries behind the list and detail views and flag full scans "
+            "and temporary B-tree sorts.")
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--repeat", type=int, default=5, help="timed executions per query")
+        parser.add_argument("--only", default=None, help="substring of the query shapes to check")
+
+    def handle(self, *args, **options) -> None:
+        problems = 0
+        for name, build in query_shapes().items():
+            if options["only"] and options["only"] not in name:
+                continue
+            queryset = build()
+            plan = queryset.explain()
+            flags = plan_flags(plan)
+
+            samples = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                list(queryset.all())
+                samples.append(time.perf_counter() - started)
+
+            style = self.style.WARNING if FULL_SCAN in flags or TEMP_SORT in flags else self.style.SUCCESS
+            problems += style is self.style.WARNING
+            self.stdout.write(style(f"{name}: {statistics.median(samples) * 1000:.2f} ms"
+                                    + (f"  [{', '.join(flags)}]" if flags else "")))
+            if options["verbosity"] > 1 or flags:
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+        self.stdout.write(f"{problems} queries with full table scans or temp b-tree sorts")
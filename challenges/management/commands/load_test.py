@@ -0,0 +1,357 @@
+"""
+Concurrent load on a mix of orm_challenges/urls.py routes, reads and writes, at several concurrency levels.
+
+Clients:
+    threads     a thread per request in flight, blocking calls
+    asyncio     one event loop with up to --concurrency requests in flight
+Targets:
+    inprocess   the application objects called in process (challenges.inprocess): orm_challenges.wsgi for the
+                thread client, orm_challenges.asgi for the asyncio one (an event loop calls a WSGI application
+                only from threads)
+    server      orm_challenges.wsgi behind runserver's threaded server, started on a free local port, over HTTP
+
+    manage.py load_test --concurrency 1 8 32 --requests 1000
+    manage.py load_test --mix "posts/latest/=5,posts/create/=1,book/create/=1" --clients threads
+    manage.py load_test --targets inprocess server --by-route --output load.json
+
+The requests are those of bench_routes (ROUTE_CASES, keyed by the urls.py route), picked with the --mix weights.
+Every run gets its own copy of the SQLite database, so the rows written by one run do not change the next, and
+the request plan (rows to delete, laptops to reserve) is prepared on it before the clock starts. GET requests
+carry a unique parameter unless --cached, so the response cache does not answer them.
+
+Each run reports the throughput, p50 / p99 latency and the share of requests that failed on a database lock
+("database is locked": SQLite's busy timeout ran out, or a reading transaction could not take the write lock),
+failed otherwise (5xx, connection errors) or were refused (4xx, e.g. 409 out of stock).
+"""
+import asyncio
+import http.client
+import json
+import logging
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.signals import got_request_exception
+from django.db import OperationalError, connection, connections
+from django.test.utils import override_settings
+
+from challenges.benchmarks import summarize
+from challenges.inprocess import Response, asgi_request, wsgi_request
+from challenges.management.commands.bench_routes import ROUTE_CASES, Fixtures, Request
+from challenges.management.commands.bench_sqlite_profiles import copy_database
+from orm_challenges.asgi import application as asgi_application
+from orm_challenges.wsgi import application as wsgi_application
+
+DEFAULT_MIX = ("posts/latest/=4,posts/feed/=2,posts/untagged/=2,posts/by-categories/=1,posts/last-published/=1,"
+               "laptops/<int:laptop_id>/=4,laptops/=2,laptops/last/=1,book/<int:book_id>/=3,"
+               "book/create/=1,posts/create/=1,laptops/reserve/=1")
+REQUEST_ID_HEADER = "X-Load-Test-Request"
+LOCK_MESSAGES = (b"database is locked", b"database table is locked")
+OUTCOMES = ("ok", "refused", "locked", "error")
+HTTP_TIMEOUT = 60.0
+
+
+@dataclass(frozen=True)
+class PlannedRequest:
+    request_id: str
+    route: str
+    method: str
+    path: str
+    query: dict[str, Any]
+    body: bytes
+    content_type: str
+
+
+Outcome = tuple[str, float, str]  # route, seconds, one of OUTCOMES
+Client = Callable[[PlannedRequest], Response]
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        route, _, weight = item.strip().rpartition("=")
+        if route not in ROUTE_CASES:
+            raise CommandError(f"unknown route {route!r}, choose from: {', '.join(ROUTE_CASES)}")
+        try:
+            weights[route] = float(weight)
+        except ValueError:
+            raise CommandError(f"weight of {route} should be a number") from None
+    return weights
+
+
+def plan_request(number: int, route: str, request: Request, cached: bool) -> PlannedRequest:
+    method, path, data = request
+    query: dict[str, Any] = {}
+    body, content_type = b"", "application/octet-stream"
+    if method == "get":
+        query = dict(data or {})
+        if not cached:
+            query["_"] = str(number)
+    elif isinstance(data, list):
+        body, content_type = json.dumps(data).encode(), "application/json"
+    elif isinstance(data, bytes):
+        body, content_type = data, "application/x-ndjson"
+    elif data:
+        body, content_type = urlencode(data, doseq=True).encode(), "application/x-www-form-urlencoded"
+    return PlannedRequest(str(number), route, method.upper(), path, query, body, content_type)
+
+
+def plan_requests(count: int, weights: dict[str, float], rng: random.Random, cached: bool) -> list[PlannedRequest]:
+    # the builders write the rows some requests need (books to delete, stocked laptops) right away
+    fixtures = Fixtures(rng)
+    routes = rng.choices(list(weights), weights=list(weights.values()), k=count)
+    planned = []
+    for number, route in enumerate(routes):
+        build = rng.choice(list(ROUTE_CASES[route].values()))
+        planned.append(plan_request(number, route, build(fixtures), cached))
+    return planned
+
+
+def request_headers(request: PlannedRequest) -> dict[str, str]:
+    return {REQUEST_ID_HEADER: request.request_id}
+
+
+def inprocess_request(request: PlannedRequest) -> Response:
+    return wsgi_request(wsgi_application, request.method, request.path, request.query, request.body,
+                        request.content_type, request_headers(request))
+
+
+async def ainprocess_request(request: PlannedRequest) -> Response:
+    return await asgi_request(asgi_application, request.method, request.path, request.query, request.body,
+                              request.content_type, request_headers(request))
+
+
+def http_target(request: PlannedRequest) -> str:
+    return request.path + ("?" + urlencode(request.query, doseq=True) if request.query else "")
+
+
+def http_request(address: tuple[str, int], request: PlannedRequest) -> Response:
+    client = http.client.HTTPConnection(*address, timeout=HTTP_TIMEOUT)
+    try:
+        client.request(request.method, http_target(request), request.body,
+                       {"Content-Type": request.content_type, "Connection": "close", **request_headers(request)})
+        response = client.getresponse()
+        return response.status, response.read()
+    except (OSError, http.client.HTTPException) as e:
+        return 0, str(e).encode()
+    finally:
+        client.close()
+
+
+async def ahttp_request(address: tuple[str, int], request: PlannedRequest) -> Response:
+    # HTTP/1.1 with Connection: close, the body runs until the server closes the connection
+    head = [f"{request.method} {http_target(request)} HTTP/1.1", "Host: localhost", "Connection: close",
+            f"Content-Type: {request.content_type}", f"Content-Length: {len(request.body)}",
+            *(f"{name}: {value}" for name, value in request_headers(request).items())]
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(*address), HTTP_TIMEOUT)
+        try:
+            writer.write("\r\n".join(head).encode() + b"\r\n\r\n" + request.body)
+            await writer.drain()
+            raw = await asyncio.wait_for(reader.read(), HTTP_TIMEOUT)
+        finally:
+            writer.close()
+    except (OSError, asyncio.TimeoutError) as e:
+        return 0, str(e).encode()
+    status_line, _, rest = raw.partition(b"\r\n")
+    try:
+        status = int(status_line.split(b" ", 2)[1])
+    except (IndexError, ValueError):
+        return 0, raw
+    return status, rest.partition(b"\r\n\r\n")[2]
+
+
+class LoadTestServer(ThreadedWSGIServer):
+    request_queue_size = 1024  # listen backlog: every client may connect at once
+
+
+def start_server() -> LoadTestServer:
+    server = LoadTestServer(("127.0.0.1", 0), WSGIRequestHandler)
+    server.set_app(wsgi_application)
+    threading.Thread(target=server.serve_forever, name="load-test-server", daemon=True).start()
+    return server
+
+
+def is_lock_error(error: BaseException | None) -> bool:
+    return isinstance(error, OperationalError) and "locked" in str(error)
+
+
+class FailureLog:
+    """
+    Exceptions raised by the views (got_request_exception), by request id: an unhandled "database is locked"
+    ends as a generic 500 page.
+    """
+
+    def __init__(self) -> None:
+        self.errors: dict[str, BaseException | None] = {}
+
+    def record(self, sender: Any, request: Any = None, **kwargs: Any) -> None:
+        request_id = request.headers.get(REQUEST_ID_HEADER) if request is not None else None
+        if request_id is not None:
+            self.errors[request_id] = sys.exc_info()[1]
+
+    def classify(self, request: PlannedRequest, status: int, body: bytes) -> str:
+        if 0 < status < 400:
+            return "ok"
+        if 400 <= status < 500:
+            return "refused"
+        if is_lock_error(self.errors.get(request.request_id)) or any(message in body for message in LOCK_MESSAGES):
+            return "locked"
+        return "error"
+
+
+def run_threads(planned: list[PlannedRequest], concurrency: int, send: Client, failures: FailureLog) -> list[Outcome]:
+    outcomes: list[Outcome] = []
+    lock = threading.Lock()
+    remaining = iter(planned)
+
+    def worker() -> None:
+        try:
+            while True:
+                with lock:
+                    request = next(remaining, None)
+                if request is None:
+                    return
+                started = time.perf_counter()
+                status, body = send(request)
+                outcome = (request.route, time.perf_counter() - started, failures.classify(request, status, body))
+                with lock:
+                    outcomes.append(outcome)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker, name=f"load-test-{number}") for number in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+async def run_asyncio(planned: list[PlannedRequest], concurrency: int,
+                      send: Callable[[PlannedRequest], Awaitable[Response]], failures: FailureLog) -> list[Outcome]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(request: PlannedRequest) -> Outcome:
+        async with semaphore:
+            started = time.perf_counter()
+            status, body = await send(request)
+            return request.route, time.perf_counter() - started, failures.classify(request, status, body)
+
+    return await asyncio.gather(*(one(request) for request in planned))
+
+
+def summarize_outcomes(outcomes: list[Outcome], elapsed: float) -> dict[str, Any]:
+    counts = Counter(outcome for _, _, outcome in outcomes)
+    return {
+        **summarize([seconds for _, seconds, _ in outcomes]),
+        "requests": len(outcomes),
+        "throughput": len(outcomes) / elapsed if elapsed else 0.0,
+        **{f"{outcome}_rate": counts[outcome] / len(outcomes) if outcomes else 0.0 for outcome in OUTCOMES},
+    }
+
+
+class Command(BaseCommand):
+    help = "Load-test a mix of routes, reads and writes, with concurrent clients and report errors and lock timeouts."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64],
+                            help="requests in flight at once, one run per level")
+        parser.add_argument("--requests", type=int, default=500, help="requests per run")
+        parser.add_argument("--clients", nargs="+", choices=("threads", "asyncio"), default=["threads", "asyncio"])
+        parser.add_argument("--targets", nargs="+", choices=("inprocess", "server"), default=["inprocess"])
+        parser.add_argument("--mix", default=DEFAULT_MIX, help="comma separated urls.py route=weight pairs")
+        parser.add_argument("--cached", action="store_true", help="let the response cache answer repeated GETs")
+        parser.add_argument("--by-route", action="store_true", help="also report every route of the mix")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", default=None, help="write the results to this JSON file")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if connection.vendor != "sqlite":
+            raise CommandError("the default database is not SQLite")
+        weights = parse_mix(options["mix"])
+
+        source = str(connection.settings_dict["NAME"])
+        original_name = connection.settings_dict["NAME"]
+        failures = FailureLog()
+        got_request_exception.connect(failures.record)
+        quiet = [logging.getLogger(name) for name in ("challenges.requests", "django.request", "django.server")]
+        for logger in quiet:
+            logger.disabled = True
+        connection.close()
+        results = []
+        try:
+            with tempfile.TemporaryDirectory() as directory, override_settings(CHALLENGES_REPLICA=None):
+                for target in options["targets"]:
+                    for client in options["clients"]:
+                        for concurrency in options["concurrency"]:
+                            copy = Path(directory) / f"{target}-{client}-{concurrency}.sqlite3"
+                            copy_database(source, copy)
+                            connection.settings_dict["NAME"] = str(copy)
+                            results.append(self.run(target, client, concurrency, weights, failures, options))
+                            connections.close_all()
+        finally:
+            connection.settings_dict["NAME"] = original_name
+            got_request_exception.disconnect(failures.record)
+            for logger in quiet:
+                logger.disabled = False
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(results, indent=2))
+            self.stdout.write(f"results written to {options['output']}")
+
+    def run(self, target: str, client: str, concurrency: int, weights: dict[str, float], failures: FailureLog,
+            options: dict[str, Any]) -> dict[str, Any]:
+        planned = plan_requests(options["requests"], weights, random.Random(options["seed"]), options["cached"])
+        connection.close()
+
+        server = None
+        if target == "server":
+            server = start_server()
+        failures.errors.clear()  # request ids restart with every plan
+        try:
+            started = time.perf_counter()
+            if client == "threads":
+                send = partial(http_request, server.server_address[:2]) if server is not None else inprocess_request
+                outcomes = run_threads(planned, concurrency, send, failures)
+            else:
+                asend = partial(ahttp_request, server.server_address[:2]) if server is not None else ainprocess_request
+                outcomes = asyncio.run(run_asyncio(planned, concurrency, asend, failures))
+            elapsed = time.perf_counter() - started
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+        summary = summarize_outcomes(outcomes, elapsed)
+        line = (f"{client:<8} {target:<10} {concurrency:>4} in flight  {summary['throughput']:9,.1f} req/s  "
+                f"p50 {summary['p50_ms']:8.2f} ms  p99 {summary['p99_ms']:8.2f} ms  "
+                f"errors {summary['error_rate']:6.1%}  lock timeouts {summary['locked_rate']:6.1%}  "
+                f"4xx {summary['refused_rate']:6.1%}")
+        failed = summary["error_rate"] or summary["locked_rate"]
+        self.stdout.write(self.style.WARNING(line) if failed else line)
+
+        routes = {}
+        for route in weights:
+            route_outcomes = [outcome for outcome in outcomes if outcome[0] == route]
+            if route_outcomes:
+                routes[route] = summarize_outcomes(route_outcomes, elapsed)
+        if options["by_route"]:
+            for route, route_summary in routes.items():
+                self.stdout.write(f"    {route:<28} {route_summary['requests']:>6}  "
+                                  f"p50 {route_summary['p50_ms']:8.2f} ms  p99 {route_summary['p99_ms']:8.2f} ms  "
+                                  f"errors {route_summary['error_rate']:6.1%}  "
+                                  f"lock timeouts {route_summary['locked_rate']:6.1%}  "
+                                  f"4xx {route_summary['refused_rate']:6.1%}")
+        return {"client": client, "target": target, "concurrency": concurrency, "seconds": elapsed, **summary,
+                "routes": routes}
@@ -0,0 +1,58 @@
+"""
+Hot-function report of the pstats dumps written by challenges.profiling.ProfilingMiddleware: the dumps of each
+route are merged and its top functions listed by cumulative or own time, with the mean per profiled request.
+"""
+import pstats
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from challenges.profiling import PROFILE_SUFFIX, profiling_settings, route_of
+
+SORT_COLUMNS = {"cumulative": 3, "tottime": 2, "calls": 1}  # positions in pstats (cc, nc, tt, ct, callers)
+
+
+def function_label(function: tuple[str, int, str]) -> str:
+    filename, line, name = function
+    if filename == "~":  # built-in
+        return name
+    parts = Path(filename).parts
+    return f"{'/'.join(parts[-3:])}:{line}({name})"
+
+
+class Command(BaseCommand):
+    help = "Aggregate the request profiles into a top-N hot-function report per route."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--directory", help="directory of the dumps, CHALLENGES_PROFILING['DIRECTORY'] by default")
+        parser.add_argument("--top", type=int, default=15, help="functions listed per route")
+        parser.add_argument("--sort", choices=sorted(SORT_COLUMNS), default="cumulative")
+        parser.add_argument("--route", help="only routes containing this text")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        directory = Path(options["directory"] or profiling_settings()["DIRECTORY"])
+        if not directory.is_dir():
+            raise CommandError(f"{directory} does not exist, no request was profiled yet")
+
+        dumps: dict[str, list[Path]] = defaultdict(list)
+        for path in sorted(directory.glob(f"*{PROFILE_SUFFIX}")):
+            route = route_of(path)
+            if options["route"] is None or options["route"] in route:
+                dumps[route].append(path)
+        if not dumps:
+            raise CommandError(f"no profiles in {directory}")
+
+        column = SORT_COLUMNS[options["sort"]]
+        for route, paths in sorted(dumps.items()):
+            stats = pstats.Stats(*map(str, paths))
+            requests = len(paths)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{route}  {requests} profiles, {stats.total_tt / requests * 1000:.2f} ms per request"))
+            self.stdout.write(f"  {'calls':>10} {'own ms':>10} {'cum ms':>10} {'cum %':>6}  function (per request)")
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][column], reverse=True)[:options["top"]]
+            for function, (_, calls, own, cumulative, _) in rows:
+                share = cumulative / stats.total_tt * 100 if stats.total_tt else 0.0
+                self.stdout.write(f"  {calls / requests:>10.1f} {own / requests * 1000:>10.3f} "
+                                  f"{cumulative / requests * 1000:>10.3f} {share:>5.1f}%  {function_label(function)}")
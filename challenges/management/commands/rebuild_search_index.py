@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import DEFAULT_DB_ALIAS
+
+from challenges import search
+from challenges.models import Post
+
+
+class Command(BaseCommand):
+    help = "Drop and rebuild the FTS5 full-text index over Post.title and Post.content."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options) -> None:
+        using = options["database"]
+        if not search.index_supported(using):
+            raise CommandError(f"full-text index requires SQLite, '{using}' is not an SQLite database")
+        search.rebuild_indexes(using)
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt for {Post.objects.using(using).count()} posts"))
@@ -0,0 +1,58 @@
+"""
+Rebuild LaptopBrandInventory from the Laptop table and report where the incrementally maintained rows had
+drifted: writes that bypass Laptop.save() / delete() (queryset update() / delete(), raw SQL) and float rounding.
+
+    manage.py reconcile_inventory            rebuild, print the drift
+    manage.py reconcile_inventory --dry-run  only print the drift, exit with an error if there is any
+"""
+import math
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
+
+from challenges.models import Laptop, LaptopBrandInventory
+
+COMPARED_FIELDS = ("laptops", "units", "price_sum", "inventory_value", "min_price", "max_price")
+
+
+def same(stored: Any, expected: Any) -> bool:
+    if stored is None or expected is None:
+        return stored is expected
+    return math.isclose(stored, expected, rel_tol=1e-9, abs_tol=1e-6)
+
+
+def find_drift(stored: dict[str, dict[str, Any]], expected: dict[str, dict[str, Any]]) -> list[str]:
+    drift = []
+    for brand in sorted(set(stored) | set(expected)):
+        # a brand without laptops is equivalent to a row of zeros
+        empty = {"laptops": 0, "units": 0, "price_sum": 0.0, "inventory_value": 0.0, "min_price": None,
+                 "max_price": None}
+        have, want = stored.get(brand, empty), expected.get(brand, empty)
+        for field in COMPARED_FIELDS:
+            if not same(have[field], want[field]):
+                drift.append(f"{brand}.{field}: stored {have[field]}, actual {want[field]}")
+    return drift
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-brand laptop inventory from scratch and report drift of the stored totals."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--dry-run", action="store_true", help="report the drift without rebuilding")
+
+    def handle(self, *args, **options) -> None:
+        with transaction.atomic():
+            stored = {row["brand"]: row for row in LaptopBrandInventory.objects.values("brand", *COMPARED_FIELDS)}
+            expected = {row["brand"]: row for row in LaptopBrandInventory.aggregates(Laptop.objects.all())}
+            drift = find_drift(stored, expected)
+            if not options["dry_run"]:
+                LaptopBrandInventory.objects.all().delete()
+                LaptopBrandInventory.objects.bulk_create(LaptopBrandInventory(**row) for row in expected.values())
+
+        for line in drift:
+            self.stdout.write(self.style.WARNING(line))
+        if options["dry_run"] and drift:
+            raise CommandError(f"{len(drift)} drifted values in {len(stored)} brands")
+        summary = f"{len(expected)} brands, {len(drift)} drifted values"
+        self.stdout.write(self.style.SUCCESS(summary + ("" if options["dry_run"] else ", rebuilt")))
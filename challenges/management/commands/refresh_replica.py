@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from challenges.replica import refresh_replica, replica_settings
+
+
+class Command(BaseCommand):
+    help = "Copy the default database into the read replica (CHALLENGES_REPLICA), once or on a schedule."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--every", type=float, default=None,
+                            help="keep refreshing, starting a new copy this many seconds after the last one started")
+
+    def handle(self, *args, **options) -> None:
+        replica = replica_settings()
+        if replica is None:
+            raise CommandError("no replica configured, see CHALLENGES_REPLICA")
+        if options["every"] is not None and options["every"] >= replica["MAX_LAG"]:
+            self.stderr.write(self.style.WARNING(
+                f"--every {options['every']} is not below MAX_LAG {replica['MAX_LAG']}: "
+                "the replica will be skipped between refreshes"))
+
+        while True:
+            started = time.monotonic()
+            elapsed = refresh_replica(replica["ALIAS"])
+            if options["verbosity"] > 0:
+                self.stdout.write(f"replica {replica['ALIAS']} refreshed in {elapsed * 1000:.0f} ms")
+            if options["every"] is None:
+                return
+            time.sleep(max(options["every"] - (time.monotonic() - started), 0))
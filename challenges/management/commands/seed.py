@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+
+from challenges.seeding import SEEDERS, SeedReport, seed
+from challenges.sqlite import PRESETS, apply_profile
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate fixture rows (posts, laptops, books) for capacity tests."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("kind", choices=sorted(SEEDERS))
+        parser.add_argument("count", type=int)
+        parser.add_argument("--batch-size", type=int, default=5000, help="rows per INSERT transaction")
+        parser.add_argument("--workers", type=int, default=0, help="generator processes (0 = generate in-process)")
+        parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible fixtures")
+        parser.add_argument("--no-validate", action="store_false", dest="validate",
+                            help="skip full_clean() on generated rows")
+        parser.add_argument("--profile", choices=sorted(PRESETS), default=None,
+                            help="SQLite profile for this load instead of CHALLENGES_SQLITE_PROFILE")
+
+    def handle(self, *args, **options) -> None:
+        def progress(report: SeedReport) -> None:
+            if options["verbosity"] > 1:
+                self.stdout.write(str(report))
+
+        if options["profile"] and connection.vendor == "sqlite":
+            apply_profile(connection, options["profile"])
+        report = seed(options["kind"], options["count"], batch_size=options["batch_size"],
+                      workers=options["workers"], seed=options["seed"], validate=options["validate"],
+                      progress=progress)
+        self.stdout.write(self.style.SUCCESS(str(report)))
@@ -0,0 +1,121 @@
+"""
+Concurrent orders against a few laptops of limited stock, from --threads threads on the configured database.
+
+    manage.py stress_reservations                 reserve() with its conditional UPDATE: never oversells
+    manage.py stress_reservations --mode save     read, check and save(): the race reserve() closes
+
+Each thread places random orders of one to --lines lines until --orders orders were placed in total. The laptops
+are created for the run and deleted afterwards. The report gives the orders per second, how many were served,
+refused for lack of stock or failed on a database lock ("locked"), and the units sold against the stock: more
+units sold than there were is an oversell.
+
+On SQLite the save() path does not oversell, it fails instead: a transaction that read the stock cannot take the
+write lock while another one holds it, so most of its orders end "locked". Under PostgreSQL's read committed the
+same code oversells.
+"""
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import OperationalError, connection, transaction
+
+from challenges.models import Laptop
+from challenges.reservations import OrderLine, OutOfStock, merge_lines, reserve
+
+
+def reserve_with_save(lines: list[OrderLine]) -> None:
+    # the naive order: check the stock read before, then write it back
+    with transaction.atomic():
+        quantities = merge_lines(lines)
+        laptops = Laptop.objects.in_bulk(quantities)
+        if any(laptop_id not in laptops or laptops[laptop_id].count < quantity
+               for laptop_id, quantity in quantities.items()):
+            raise OutOfStock([])
+        for laptop_id, quantity in quantities.items():
+            laptop = laptops[laptop_id]
+            laptop.count -= quantity
+            laptop.save()
+
+
+class Command(BaseCommand):
+    help = "Stress the stock reservation with concurrent orders and check that nothing is oversold."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--mode", choices=("reserve", "save"), default="reserve")
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--orders", type=int, default=2000, help="orders placed in total")
+        parser.add_argument("--laptops", type=int, default=5)
+        parser.add_argument("--stock", type=int, default=1000, help="initial count of every laptop")
+        parser.add_argument("--lines", type=int, default=3, help="maximum order lines per order")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        laptops = [Laptop.objects.create(brand="HP", year=2024, memory=16, disk=512, price=999.0,
+                                         count=options["stock"], created_at=datetime.now(timezone.utc))
+                   for _ in range(options["laptops"])]
+        try:
+            self.run([laptop.pk for laptop in laptops], options)
+        finally:
+            for laptop in laptops:
+                laptop.delete()
+
+    def run(self, laptop_ids: list[int], options: dict[str, Any]) -> None:
+        place = reserve if options["mode"] == "reserve" else reserve_with_save
+        outcomes: Counter[str] = Counter()
+        sold: Counter[int] = Counter()
+        lock = threading.Lock()
+        remaining = iter(range(options["orders"]))
+
+        def worker(number: int) -> None:
+            rng = random.Random(options["seed"] * 1000 + number)
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    lines = [OrderLine(rng.choice(laptop_ids), rng.randint(1, 3))
+                             for _ in range(rng.randint(1, options["lines"]))]
+                    try:
+                        place(lines)
+                    except OutOfStock:
+                        outcome = "out of stock"
+                    except OperationalError:
+                        # "database is locked": the busy timeout ran out, or on SQLite a transaction that read
+                        # first could not take the write lock
+                        outcome = "locked"
+                    else:
+                        outcome = "served"
+                    with lock:
+                        outcomes[outcome] += 1
+                        if outcome == "served":
+                            sold.update(merge_lines(lines))
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+            list(executor.map(worker, range(options["threads"])))
+        elapsed = time.perf_counter() - started
+
+        orders = sum(outcomes.values())
+        self.stdout.write(f"{options['mode']}: {orders} orders from {options['threads']} threads in {elapsed:.2f}s, "
+                          f"{orders / elapsed:,.0f} orders/s")
+        for outcome in ("served", "out of stock", "locked"):
+            self.stdout.write(f"  {outcome:<14} {outcomes[outcome]:>7} ({outcomes[outcome] / orders:.1%})")
+
+        counts = dict(Laptop.objects.filter(pk__in=laptop_ids).values_list("pk", "count"))
+        oversold = []
+        for laptop_id in laptop_ids:
+            units = sold[laptop_id]
+            self.stdout.write(f"  laptop {laptop_id}: {units} of {options['stock']} units sold, "
+                              f"{counts[laptop_id]} left")
+            if units > options["stock"] or units + counts[laptop_id] != options["stock"]:
+                oversold.append(laptop_id)
+        if oversold:
+            raise CommandError(f"stock of laptops {oversold} does not add up: oversold or lost updates")
+        self.stdout.write(self.style.SUCCESS("  no oversell"))
@@ -0,0 +1,56 @@
+from django.db import migrations
+
+# The FTS5 tables and sync triggers as of this migration, frozen here rather than imported from challenges.search
+# so that later changes to that module do not rewrite migration history.
+INDEXES = {
+    "challenges_post_fts": "unicode61 remove_diacritics 2",
+    "challenges_post_fts_trigram": "trigram",
+}
+
+CREATE_INDEX_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5("
+    "title, content, content='challenges_post', content_rowid='id', tokenize='{tokenizer}')",
+    "CREATE TRIGGER IF NOT EXISTS {index}_ai AFTER INSERT ON challenges_post BEGIN "
+    "INSERT INTO {index}(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS {index}_ad AFTER DELETE ON challenges_post BEGIN "
+    "INSERT INTO {index}({index}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS {index}_au AFTER UPDATE OF title, content ON challenges_post BEGIN "
+    "INSERT INTO {index}({index}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); "
+    "INSERT INTO {index}(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+    "INSERT INTO {index}({index}) VALUES ('rebuild')",
+    "INSERT INTO {index}({index}) VALUES ('optimize')",
+]
+
+DROP_INDEX_SQL = [
+    "DROP TRIGGER IF EXISTS {index}_ai",
+    "DROP TRIGGER IF EXISTS {index}_ad",
+    "DROP TRIGGER IF EXISTS {index}_au",
+    "DROP TABLE IF EXISTS {index}",
+]
+
+
+def create_post_fts(apps, schema_editor) -> None:
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for index, tokenizer in INDEXES.items():
+        for statement in DROP_INDEX_SQL + CREATE_INDEX_SQL:
+            schema_editor.execute(statement.format(index=index, tokenizer=tokenizer))
+
+
+def drop_post_fts(apps, schema_editor) -> None:
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for index in INDEXES:
+        for statement in DROP_INDEX_SQL:
+            schema_editor.execute(statement.format(index=index))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0009_alter_post_category'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_post_fts, drop_post_fts),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.3 on 2026-10-18 13:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0010_post_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='laptop',
+            index=models.Index(fields=['brand', 'price'], name='laptop_brand_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='laptop',
+            index=models.Index(fields=['-created_at'], name='laptop_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='laptop',
+            index=models.Index(condition=models.Q(('count__gt', 0)), fields=['-created_at'], name='laptop_in_stock_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', 'published_at'], name='post_status_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['category', 'author', 'created_at'], name='post_category_author_idx'),
+        ),
+    ]
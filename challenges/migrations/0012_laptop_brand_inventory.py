@@ -0,0 +1,38 @@
+# Generated by Django 4.2.3 on 2026-10-18 13:33
+
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Min, Sum
+
+
+def fill_inventory(apps, schema_editor):
+    Laptop = apps.get_model('challenges', 'Laptop')
+    LaptopBrandInventory = apps.get_model('challenges', 'LaptopBrandInventory')
+    using = schema_editor.connection.alias
+    rows = (Laptop.objects.using(using).order_by().values('brand')
+            .annotate(laptops=Count('id'), units=Sum('count'), price_sum=Sum('price'),
+                      inventory_value=Sum(F('price') * F('count'), output_field=models.FloatField()),
+                      min_price=Min('price'), max_price=Max('price')))
+    LaptopBrandInventory.objects.using(using).bulk_create(LaptopBrandInventory(**row) for row in rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0011_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LaptopBrandInventory',
+            fields=[
+                ('brand', models.CharField(choices=[('HP', 'HP'), ('DELL', 'Dell'), ('LENOVO', 'Lenovo'), ('ASUS', 'Asus'), ('ACER', 'Acer')], max_length=256, primary_key=True, serialize=False)),
+                ('laptops', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('price_sum', models.FloatField(default=0)),
+                ('inventory_value', models.FloatField(default=0)),
+                ('min_price', models.FloatField(null=True)),
+                ('max_price', models.FloatField(null=True)),
+            ],
+        ),
+        migrations.RunPython(fill_inventory, migrations.RunPython.noop),
+    ]
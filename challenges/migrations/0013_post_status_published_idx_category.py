@@ -0,0 +1,22 @@
+# Generated by Django 4.2.3 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0012_laptop_brand_inventory'),
+    ]
+
+    operations = [
+        # category makes the index cover the publication histogram
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_status_published_idx',
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', 'published_at', 'category'], name='post_status_published_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.3 on 2026-10-18 13:44
+
+from django.db import migrations, models
+
+# The FTS sync triggers of migration 0010, frozen here rather than imported from challenges.search
+FTS_INDEXES = ("challenges_post_fts", "challenges_post_fts_trigram")
+
+CREATE_TRIGGER_SQL = [
+    "CREATE TRIGGER IF NOT EXISTS {index}_ai AFTER INSERT ON challenges_post BEGIN "
+    "INSERT INTO {index}(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS {index}_ad AFTER DELETE ON challenges_post BEGIN "
+    "INSERT INTO {index}({index}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS {index}_au AFTER UPDATE OF title, content ON challenges_post BEGIN "
+    "INSERT INTO {index}({index}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); "
+    "INSERT INTO {index}(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+]
+
+
+def restore_post_fts_triggers(apps, schema_editor) -> None:
+    # SQLite adds the column by rebuilding challenges_post, which drops the triggers that keep the FTS tables in sync
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for index in FTS_INDEXES:
+        for statement in CREATE_TRIGGER_SQL:
+            schema_editor.execute(statement.format(index=index))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0013_post_status_published_idx_category'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='laptop',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(restore_post_fts_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.3 on 2026-10-18 14:01
+
+import challenges.models_choices
+from django.db import migrations, models
+
+POST_COLUMNS = "id, title, content, author, status, created_at, published_at, category, updated_at"
+
+# the table of PostWithArchive: list the same columns of both tables when a post field is added or removed
+POST_WITH_ARCHIVE_VIEW = f"""
+CREATE VIEW challenges_post_with_archive AS
+SELECT {POST_COLUMNS} FROM challenges_post
+UNION ALL
+SELECT {POST_COLUMNS} FROM challenges_archivedpost
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0014_row_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPost',
+            fields=[
+                ('title', models.CharField(max_length=256)),
+                ('content', models.TextField()),
+                ('author', models.CharField(max_length=256)),
+                ('status', models.CharField(choices=[('published', 'published'), ('unpublished', 'unpublished'), ('banned', 'banned')], default=challenges.models_choices.PostStatus['unpublished'], max_length=16, validators=[challenges.models_choices.PostStatus.validate_status])),
+                ('created_at', models.DateTimeField(blank=True)),
+                ('published_at', models.DateTimeField(blank=True, null=True)),
+                ('category', models.CharField(blank=True, choices=[('quaerat', 'quaerat'), ('etincidunt', 'etincidunt'), ('dolorem', 'dolorem'), ('modi', 'modi'), ('amet', 'amet'), ('none', None)], max_length=64, null=True, validators=[challenges.models_choices.LoremCategory.validate_category])),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'published_at', 'category'], name='archive_status_published_idx'), models.Index(fields=['category', 'author', 'created_at'], name='archive_category_author_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostWithArchive',
+            fields=[
+                ('title', models.CharField(max_length=256)),
+                ('content', models.TextField()),
+                ('author', models.CharField(max_length=256)),
+                ('status', models.CharField(choices=[('published', 'published'), ('unpublished', 'unpublished'), ('banned', 'banned')], default=challenges.models_choices.PostStatus['unpublished'], max_length=16, validators=[challenges.models_choices.PostStatus.validate_status])),
+                ('created_at', models.DateTimeField(blank=True)),
+                ('published_at', models.DateTimeField(blank=True, null=True)),
+                ('category', models.CharField(blank=True, choices=[('quaerat', 'quaerat'), ('etincidunt', 'etincidunt'), ('dolorem', 'dolorem'), ('modi', 'modi'), ('amet', 'amet'), ('none', None)], max_length=64, null=True, validators=[challenges.models_choices.LoremCategory.validate_category])),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'challenges_post_with_archive',
+                'ordering': ['-created_at'],
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(POST_WITH_ARCHIVE_VIEW, 'DROP VIEW challenges_post_with_archive'),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.3 on 2026-10-18 14:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0015_post_archive'),
+    ]
+
+    operations = [
+        # (status, published_at) again serves ORDER BY published_at, id of the feed, which 0013 broke by appending
+        # category; the three-column index stays, under a new name, to cover the publication histogram
+        migrations.RenameIndex(
+            model_name='archivedpost',
+            new_name='archive_status_pub_cat_idx',
+            old_name='archive_status_published_idx',
+        ),
+        migrations.RenameIndex(
+            model_name='post',
+            new_name='post_status_pub_cat_idx',
+            old_name='post_status_published_idx',
+        ),
+        migrations.AddIndex(
+            model_name='archivedpost',
+            index=models.Index(fields=['status', 'published_at'], name='archive_status_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', 'published_at'], name='post_status_published_idx'),
+        ),
+    ]
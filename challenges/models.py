@@ -1,4 +1,8 @@
-from django.db import models
+from collections import defaultdict
+from typing import Iterable
+
+from django.db import models, router, transaction
+from django.db.models import F, OuterRef, Subquery
 from django.core.exceptions import ValidationError
 
 from .models_choices import LaptopBrand, LoremCategory, PostStatus
@@ -8,6 +12,7 @@ class Book(models.Model):
     title = models.CharField(max_length=256)
     author_full_name = models.CharField(max_length=256)
     isbn = models.CharField(max_length=10)
+    updated_at = models.DateTimeField(auto_now=True)  # row version, see challenges.conditional
 
     def __str__(self) -> str:
         return self.title
@@ -16,6 +21,11 @@ class Book(models.Model):
 class Laptop(models.Model):
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["brand", "price"], name="laptop_brand_price_idx"),
+            models.Index(fields=["-created_at"], name="laptop_created_idx"),
+            models.Index(fields=["-created_at"], name="laptop_in_stock_created_idx", condition=models.Q(count__gt=0)),
+        ]
 
     brand = models.CharField(max_length=256, choices=[(brand.name, brand.value) for brand in LaptopBrand])
     year = models.IntegerField()
@@ -24,6 +34,7 @@ class Laptop(models.Model):
     price = models.FloatField()
     count = models.IntegerField()
     created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return self.brand
@@ -34,11 +45,99 @@ class Laptop(models.Model):
             json[field.name] = getattr(self, field.name)
         return json
 
+    def save(self, *args, **kwargs) -> None:
+        using = kwargs.get("using") or router.db_for_write(Laptop, instance=self)
+        with transaction.atomic(using=using):
+            removed = []
+            if self.pk is not None:
+                removed = list(Laptop.objects.using(using).filter(pk=self.pk).values_list("brand", "price", "count"))
+            super().save(*args, **kwargs)
+            if kwargs.get("update_fields") is None:
+                added = [(self.brand, self.price, self.count)]
+            else:  # fields left out were not written, the row may differ from self
+                added = list(Laptop.objects.using(using).filter(pk=self.pk).values_list("brand", "price", "count"))
+            LaptopBrandInventory.apply_changes(added=added, removed=removed, using=using)
+
+    def delete(self, *args, **kwargs) -> tuple[int, dict[str, int]]:
+        using = kwargs.get("using") or router.db_for_write(Laptop, instance=self)
+        with transaction.atomic(using=using):
+            removed = list(Laptop.objects.using(using).filter(pk=self.pk).values_list("brand", "price", "count"))
+            deleted = super().delete(*args, **kwargs)
+            LaptopBrandInventory.apply_changes(removed=removed, using=using)
+        return deleted
+
+
+InventoryEntry = tuple[str, float, int]  # brand, price, count of one laptop row
+
+
+class LaptopBrandInventory(models.Model):
+    """
+    Stock totals of Laptop per brand. Laptop.save() / delete() and bulk writers (apply_changes) keep it in step
+    within their transaction; the reconcile_inventory command rebuilds it and reports drift.
+    """
+    brand = models.CharField(max_length=256, primary_key=True,
+                             choices=[(brand.name, brand.value) for brand in LaptopBrand])
+    laptops = models.IntegerField(default=0)  # Laptop rows
+    units = models.IntegerField(default=0)  # sum of count
+    price_sum = models.FloatField(default=0)  # for the average price
+    inventory_value = models.FloatField(default=0)  # sum of price * count
+    min_price = models.FloatField(null=True)
+    max_price = models.FloatField(null=True)
+
+    def __str__(self) -> str:
+        return self.brand
 
-class Post(models.Model):
+    @property
+    def avg_price(self) -> float | None:
+        return self.price_sum / self.laptops if self.laptops else None
+
+    @classmethod
+    def aggregates(cls, laptops: models.QuerySet) -> models.QuerySet:
+        """
+        Rows of this table computed from scratch, as values() dicts.
+        """
+        return (laptops.order_by().values("brand")
+                .annotate(laptops=models.Count("id"), units=models.Sum("count"), price_sum=models.Sum("price"),
+                          inventory_value=models.Sum(F("price") * F("count"), output_field=models.FloatField()),
+                          min_price=models.Min("price"), max_price=models.Max("price")))
+
+    @classmethod
+    def apply_changes(cls, added: Iterable[InventoryEntry] = (), removed: Iterable[InventoryEntry] = (),
+                      using: str = "default") -> None:
+        """
+        Add the laptop rows in added and subtract those in removed: one UPDATE per touched brand. Call it in the
+        transaction that changed Laptop, after the change; min and max price are read back from
+        laptop_brand_price_idx.
+        """
+        deltas: dict[str, list[float]] = defaultdict(lambda: [0, 0, 0.0, 0.0])
+        for sign, entries in ((1, added), (-1, removed)):
+            for brand, price, count in entries:
+                delta = deltas[brand]
+                delta[0] += sign
+                delta[1] += sign * count
+                delta[2] += sign * price
+                delta[3] += sign * price * count
+
+        brand_laptops = Laptop.objects.using(using).filter(brand=OuterRef("brand"))
+        for brand, (laptops, units, price_sum, value) in deltas.items():
+            updated = cls.objects.using(using).filter(brand=brand).update(
+                laptops=F("laptops") + laptops, units=F("units") + units, price_sum=F("price_sum") + price_sum,
+                inventory_value=F("inventory_value") + value,
+                min_price=Subquery(brand_laptops.order_by("price").values("price")[:1]),
+                max_price=Subquery(brand_laptops.order_by("-price").values("price")[:1]),
+            )
+            if not updated:  # first laptop of a brand missing from the table
+                for row in cls.aggregates(Laptop.objects.using(using).filter(brand=brand)):
+                    cls.objects.using(using).create(**row)
+
+
+class PostFields(models.Model):
+    """
+    Columns shared by the hot Post table, its archive and the view over both (see challenges.archive).
+    """
 
     class Meta:
-        ordering = ["-created_at"]
+        abstract = True
 
     title = models.CharField(max_length=256)
     content = models.TextField()
@@ -49,6 +148,7 @@ class Post(models.Model):
     published_at = models.DateTimeField(null=True, blank=True)
     category = models.CharField(choices=[(category.name, category.value) for category in LoremCategory],
                                 max_length=64, null=True, blank=True, validators=[LoremCategory.validate_category])
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return self.title
@@ -59,6 +159,17 @@ class Post(models.Model):
             json[field.name] = getattr(self, field.name)
         return json
 
+
+class Post(PostFields):
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "published_at"], name="post_status_published_idx"),
+            models.Index(fields=["status", "published_at", "category"], name="post_status_pub_cat_idx"),
+            models.Index(fields=["category", "author", "created_at"], name="post_category_author_idx"),
+        ]
+
     def clean(self, *args, **kwargs) -> None:
         if self.status == PostStatus.unpublished:
             self.published_at = None
@@ -69,3 +180,34 @@ class Post(models.Model):
     def save(self, *args, **kwargs) -> None:
         self.full_clean()
         super().save(*args, **kwargs)
+
+
+class ArchivedPost(PostFields):
+    """
+    Posts moved out of the hot table by challenges.archive.archive_posts(), with their ids and row versions.
+    """
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "published_at"], name="archive_status_published_idx"),
+            models.Index(fields=["status", "published_at", "category"], name="archive_status_pub_cat_idx"),
+            models.Index(fields=["category", "author", "created_at"], name="archive_category_author_idx"),
+        ]
+
+    id = models.BigIntegerField(primary_key=True)
+    updated_at = models.DateTimeField()
+
+
+class PostWithArchive(PostFields):
+    """
+    Read-only: the UNION ALL of Post and ArchivedPost (a database view, created in migration 0015).
+    """
+
+    class Meta:
+        managed = False
+        db_table = "challenges_post_with_archive"
+        ordering = ["-created_at"]
+
+    id = models.BigIntegerField(primary_key=True)
+    updated_at = models.DateTimeField()
@@ -21,7 +21,7 @@ class LoremCategory(Enum):
 
     @classmethod
     def is_valid(cls, value: str) -> bool:
-        return value in [category.value for category in cls]
+        return isinstance(value, (str, type(None))) and value in CATEGORY_VALUES
 
     @classmethod
     def validate_category(cls, value: str) -> None:
@@ -36,9 +36,14 @@ class PostStatus(Enum):
 
     @classmethod
     def is_valid(cls, value: str) -> bool:
-        return value in [status.value for status in cls]
+        return isinstance(value, str) and value in STATUS_VALUES
 
     @classmethod
     def validate_status(cls, value: str) -> None:
-        if value not in [status.value for status in cls]:
+        if not PostStatus.is_valid(value):
             raise ValidationError(f"{value} is not a valid status")
+
+
+# built once: validators run for every saved post
+CATEGORY_VALUES = frozenset(category.value for category in LoremCategory)
+STATUS_VALUES = frozenset(status.value for status in PostStatus)
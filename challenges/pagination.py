@@ -0,0 +1,136 @@
+"""
+Keyset (cursor) pagination.
+
+A page is fetched with one query: WHERE (k1, k2, ..., id) > (cursor values) ORDER BY k1, k2, ..., id LIMIT n + 1.
+The cursor is an opaque url-safe token holding the ordering values of the last row of the previous page.
+"""
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Generic, Sequence, TypeVar
+
+from django.core.exceptions import ValidationError
+from django.db.models import Model, Q, QuerySet
+
+from .serializers import ModelSerializer
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+T = TypeVar("T")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class Page(Generic[T]):
+    items: list[T]
+    next_cursor: str | None
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()  # full precision, unlike DjangoJSONEncoder which drops microseconds
+    raise TypeError(f"{type(value).__name__} cannot be used in a cursor")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), default=_encode_value, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError as e:
+        raise InvalidCursor("malformed cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("cursor does not match this listing")
+    return values
+
+
+def decode_model_cursor(model: type[Model], keys: Sequence[str], cursor: str) -> list[Any]:
+    values = decode_cursor(cursor, len(keys))
+    try:
+        return [model._meta.get_field(key).to_python(value) for key, value in zip(keys, values)]
+    except ValidationError as e:
+        raise InvalidCursor("cursor does not match this listing") from e
+
+
+def keyset_condition(keys: Sequence[str], values: Sequence[Any]) -> Q:
+    """
+    Row-value comparison (keys) > (values), spelled as an OR chain. The leading `key >= value` term is
+    redundant but lets the database seek into an index on the ordering columns instead of scanning it.
+    """
+    condition = Q()
+    for position, key in enumerate(keys):
+        equal_prefix = {keys[index]: values[index] for index in range(position)}
+        condition |= Q(**equal_prefix, **{f"{key}__gt": values[position]})
+    return Q(**{f"{keys[0]}__gte": values[0]}) & condition
+
+
+def page_queryset(queryset: QuerySet, keys: Sequence[str], cursor: str | None = None,
+                  limit: int = DEFAULT_PAGE_SIZE) -> QuerySet:
+    """
+    The query behind one page: rows after the cursor, ordered by keys, limit + 1 rows (to detect a next page).
+    """
+    queryset = queryset.order_by(*keys)
+    if cursor:
+        queryset = queryset.filter(keyset_condition(keys, decode_model_cursor(queryset.model, keys, cursor)))
+    return queryset[:limit + 1]
+
+
+def paginate(queryset: QuerySet, keys: Sequence[str], cursor: str | None = None,
+             limit: int = DEFAULT_PAGE_SIZE, serializer: ModelSerializer | None = None) -> Page:
+    """
+    Return one page of the queryset ordered by keys (the last key must be unique, e.g. id).
+    With a serializer the page holds its JSON-ready rows (keys must be among its fields), otherwise model instances.
+    Raises InvalidCursor for a cursor that was not produced for these keys.
+    """
+    queryset = page_queryset(queryset, keys, cursor, limit)
+
+    if serializer is not None:
+        return _serialized_page(serializer.fetch(queryset), keys, limit, serializer)
+
+    items = list(queryset)
+    if len(items) <= limit:
+        return Page(items, None)
+    return Page(items[:limit], encode_cursor([getattr(items[limit - 1], key) for key in keys]))
+
+
+async def apaginate(queryset: QuerySet, keys: Sequence[str], serializer: ModelSerializer, cursor: str | None = None,
+                    limit: int = DEFAULT_PAGE_SIZE) -> Page:
+    """
+    paginate() for async views, serialized rows only.
+    """
+    queryset = page_queryset(queryset, keys, cursor, limit)
+    return _serialized_page(await serializer.afetch(queryset), keys, limit, serializer)
+
+
+def _serialized_page(rows: list[Sequence[Any]], keys: Sequence[str], limit: int, serializer: ModelSerializer) -> Page:
+    items = serializer.encode_rows(rows[:limit])
+    if len(rows) <= limit:
+        return Page(items, None)
+    positions = [serializer.fields.index(key) for key in keys]
+    return Page(items, encode_cursor([rows[limit - 1][position] for position in positions]))
+
+
+def parse_page_params(request_body: Any) -> tuple[str | None, int] | str:
+    """
+    Read 'cursor' and 'limit' request parameters. Returns an error message instead when they are invalid.
+    """
+    cursor = request_body.get("cursor") or None
+    limit_str = request_body.get("limit")
+    if limit_str is None or limit_str == "":
+        return cursor, DEFAULT_PAGE_SIZE
+    try:
+        limit = int(limit_str)
+    except ValueError:
+        return "'limit' should be an integer"
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        return f"'limit' should be between 1 and {MAX_PAGE_SIZE}"
+    return cursor, limit
@@ -0,0 +1,120 @@
+"""
+On-demand cProfile of single requests.
+
+ProfilingMiddleware runs a request under cProfile when it carries settings.CHALLENGES_PROFILING["HEADER"] with
+the configured TOKEN (any value when DEBUG is on and no token is set), or when it is sampled at SAMPLE_RATE. The
+stats are dumped as a pstats file into DIRECTORY, named after the route, and the file name is returned in the
+X-Profile-File header. The profile_report command aggregates the dumps into a hot-function report per route.
+
+cProfile sees only the thread that enables it, and only one request per process is profiled at a time (others
+run unprofiled meanwhile). For async views that thread is the event loop's: queries the view runs through
+sync_to_async are not in the profile while other requests served by the loop meanwhile are, so profile the
+sync twin of the route instead. A streamed body is produced after the view returns and is not in the profile
+either. Once DIRECTORY holds MAX_FILES dumps nothing more is profiled until files are removed.
+"""
+import cProfile
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import quote, unquote
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+DEFAULT_SETTINGS = {"DIRECTORY": "profiles", "SAMPLE_RATE": 0.0, "HEADER": "X-Profile", "TOKEN": None,
+                    "MAX_FILES": 1000}
+PROFILE_SUFFIX = ".prof"
+
+_profiling = threading.Lock()  # held while a request is profiled
+
+
+def profiling_settings() -> dict[str, Any]:
+    return {**DEFAULT_SETTINGS, **getattr(settings, "CHALLENGES_PROFILING", {})}
+
+
+def profile_name(route: str) -> str:
+    return f"{time.time_ns()}-{os.getpid()}-{quote(route, safe='')}{PROFILE_SUFFIX}"
+
+
+def route_of(path: Path) -> str:
+    """
+    Route of a dump written by ProfilingMiddleware.
+    """
+    return unquote(path.name[:-len(PROFILE_SUFFIX)].split("-", 2)[2])
+
+
+def wants_profile(request: HttpRequest, options: dict[str, Any]) -> bool:
+    requested = request.headers.get(options["HEADER"])
+    if requested is not None:
+        token = options["TOKEN"]
+        if (token is None and settings.DEBUG) or (token is not None and requested == token):
+            return True
+    return options["SAMPLE_RATE"] > 0 and random.random() < options["SAMPLE_RATE"]
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _start(self, request: HttpRequest) -> tuple[cProfile.Profile, Path] | None:
+        options = profiling_settings()
+        if not wants_profile(request, options):
+            return None
+        directory = Path(options["DIRECTORY"])
+        directory.mkdir(parents=True, exist_ok=True)
+        if len(os.listdir(directory)) >= options["MAX_FILES"]:
+            return None
+        if not _profiling.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler, directory
+
+    @staticmethod
+    def _stop(profiler: cProfile.Profile) -> None:
+        try:
+            profiler.disable()
+        finally:
+            _profiling.release()
+
+    @staticmethod
+    def _dump(request: HttpRequest, response: HttpResponse, profiler: cProfile.Profile,
+              directory: Path) -> HttpResponse:
+        match = request.resolver_match
+        path = directory / profile_name(match.route if match is not None else request.path_info)
+        profiler.dump_stats(path)
+        response["X-Profile-File"] = path.name
+        return response
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        started = self._start(request)
+        if started is None:
+            return self.get_response(request)
+        profiler, directory = started
+        try:
+            response = self.get_response(request)
+        finally:
+            self._stop(profiler)
+        return self._dump(request, response, profiler, directory)
+
+    async def _acall(self, request: HttpRequest) -> HttpResponse:
+        started = self._start(request)
+        if started is None:
+            return await self.get_response(request)
+        profiler, directory = started
+        try:
+            response = await self.get_response(request)
+        finally:
+            self._stop(profiler)
+        return self._dump(request, response, profiler, directory)
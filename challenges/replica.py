@@ -0,0 +1,199 @@
+"""
+Read replica of the default SQLite database.
+
+ReplicaRouter sends the reads of the configured models to a read-only copy of the default database and every
+write to default. The copy is refreshed with SQLite's online backup API by the refresh_replica command:
+
+    manage.py refresh_replica --every 5
+
+Configured with settings.CHALLENGES_REPLICA:
+    ALIAS    DATABASES alias of the copy
+    MODELS   labels of the models whose reads go to the copy
+    MAX_LAG  seconds; a copy refreshed longer ago than this is not read from (e.g. the refresher is not running),
+             and a client that wrote keeps reading from default for as long (read your writes)
+
+Reads go to the copy only while ReplicaMiddleware serves a request that did not write: unsafe methods, requests
+carrying the pin cookie set after a write, and queries outside requests (commands, shells) all use default.
+Each refresh copies the whole database, so its cost grows with the database size.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from contextvars import ContextVar
+from dataclasses import dataclass
+from math import ceil
+from pathlib import Path
+from typing import Any, Callable
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpRequest, HttpResponse
+
+DEFAULT_SETTINGS = {
+    "ALIAS": "replica",
+    "MODELS": ["challenges.Book", "challenges.Laptop", "challenges.Post"],
+    "MAX_LAG": 10,
+}
+PIN_COOKIE = "read_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+FRESHNESS_CHECK_INTERVAL = 1.0  # seconds between stat() calls on the refresh marker
+
+
+@dataclass
+class RoutingState:
+    pinned: bool  # read from default for the rest of the request
+    wrote: bool = False
+
+
+_state: ContextVar[RoutingState | None] = ContextVar("challenges_replica_state", default=None)
+_freshness = threading.local()
+
+
+def replica_settings() -> dict[str, Any] | None:
+    configured = getattr(settings, "CHALLENGES_REPLICA", None)
+    if configured is None:
+        return None
+    options = {**DEFAULT_SETTINGS, **configured}
+    return options if options["ALIAS"] in settings.DATABASES else None
+
+
+def marker_path(alias: str) -> Path:
+    return Path(f"{connections[alias].settings_dict['NAME']}-refreshed")
+
+
+def replica_lag(alias: str) -> float | None:
+    """
+    Seconds since the copy was last refreshed, None when it never was.
+    """
+    if connections[alias].settings_dict["NAME"] == connections[DEFAULT_DB_ALIAS].settings_dict["NAME"]:
+        return 0.0  # a test mirror of default
+    try:
+        return max(time.time() - os.stat(marker_path(alias)).st_mtime, 0.0)
+    except FileNotFoundError:
+        return None
+
+
+def replica_is_fresh(alias: str, max_lag: float) -> bool:
+    now = time.monotonic()
+    checked_at, alias_checked, fresh = getattr(_freshness, "last", (0.0, None, False))
+    if alias_checked != alias or now - checked_at > FRESHNESS_CHECK_INTERVAL:
+        lag = replica_lag(alias)
+        fresh = lag is not None and lag <= max_lag
+        _freshness.last = (now, alias, fresh)
+    return fresh
+
+
+def read_alias() -> str:
+    """
+    Where reads of the replicated models go in the current context.
+    """
+    options = replica_settings()
+    state = _state.get()
+    if options is None or state is None or state.pinned or not replica_is_fresh(options["ALIAS"], options["MAX_LAG"]):
+        return DEFAULT_DB_ALIAS
+    return options["ALIAS"]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model: type[models.Model], **hints: Any) -> str | None:
+        options = replica_settings()
+        if options is None or model._meta.label not in options["MODELS"] or "instance" in hints:
+            return None  # related lookups stay on the database their instance came from
+        alias = read_alias()
+        return None if alias == DEFAULT_DB_ALIAS else alias
+
+    def db_for_write(self, model: type[models.Model], **hints: Any) -> str | None:
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: models.Model, obj2: models.Model, **hints: Any) -> bool | None:
+        options = replica_settings()
+        if options is None:
+            return None
+        aliases = {DEFAULT_DB_ALIAS, options["ALIAS"]}
+        return True if {obj1._state.db, obj2._state.db} <= aliases else None
+
+    def allow_migrate(self, db: str, app_label: str, model_name: str | None = None, **hints: Any) -> bool | None:
+        options = replica_settings()
+        # the copy gets its schema from default with every refresh
+        return False if options is not None and db == options["ALIAS"] else None
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        state = self._begin(request)
+        return self._finish(state, self.get_response(request))
+
+    async def _acall(self, request: HttpRequest) -> HttpResponse:
+        state = self._begin(request)
+        return self._finish(state, await self.get_response(request))
+
+    def _begin(self, request: HttpRequest) -> RoutingState:
+        state = RoutingState(pinned=request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES)
+        # left in place after the response, so a streamed body is read where the view read;
+        # the next request on this thread or task replaces it
+        _state.set(state)
+        return state
+
+    def _finish(self, state: RoutingState, response: HttpResponse) -> HttpResponse:
+        options = replica_settings()
+        if state.wrote and options is not None:
+            response.set_cookie(PIN_COOKIE, "1", max_age=ceil(options["MAX_LAG"]), httponly=True, samesite="Lax")
+        return response
+
+
+def response_generation() -> str:
+    """
+    Part of the response cache key: responses read from the copy are only reused until the next refresh,
+    and never for clients that read from default.
+    """
+    alias = read_alias()
+    if alias == DEFAULT_DB_ALIAS:
+        return "primary"
+    try:
+        return str(os.stat(marker_path(alias)).st_mtime_ns)
+    except FileNotFoundError:
+        return "primary"
+
+
+def refresh_replica(alias: str | None = None) -> float:
+    """
+    Copy default into the replica with the backup API; returns the seconds it took.
+    Readers of the copy keep their snapshot until the copy commits.
+    """
+    options = replica_settings()
+    alias = alias or (options["ALIAS"] if options else None)
+    if alias is None:
+        raise ValueError("no replica configured, see CHALLENGES_REPLICA")
+    source = connections[DEFAULT_DB_ALIAS].settings_dict["NAME"]
+    target = connections[alias].settings_dict["NAME"]
+    started = time.perf_counter()
+    with closing(sqlite3.connect(source)) as src, closing(sqlite3.connect(target, timeout=30)) as dst:
+        src.backup(dst)  # in one step: a source changing between steps would restart the copy
+    marker_path(alias).touch()
+    return time.perf_counter() - started
+
+
+@receiver(connection_created)
+def make_replica_read_only(sender: type, connection: BaseDatabaseWrapper, **kwargs: Any) -> None:
+    options = replica_settings()
+    if options is not None and connection.alias == options["ALIAS"] and connection.vendor == "sqlite":
+        connection.connection.execute("PRAGMA query_only = ON")
@@ -0,0 +1,102 @@
+"""
+Stock reservation for Laptop.count.
+
+reserve() takes the order lines (laptop, quantity) of one order from stock with a single conditional UPDATE:
+
+    UPDATE laptop SET count = count - CASE id WHEN 1 THEN 2 WHEN 7 THEN 1 END, updated_at = ...
+    WHERE (id = 1 AND count >= 2) OR (id = 7 AND count >= 1)
+
+The stock check and the decrement are one statement, so concurrent orders cannot oversell the way a
+read-modify-write through save() does. All lines of an order are applied in one transaction: when the UPDATE
+matched fewer rows than the order has lines, the rows it did not touch (their updated_at is not this order's
+stamp) are reported in OutOfStock and the whole order is rolled back.
+
+A queryset update bypasses Laptop.save(), so reserve() sets updated_at itself, moves the units of
+LaptopBrandInventory with apply_changes() and announces the rows with models_changed(ids=...).
+"""
+from dataclasses import dataclass
+from functools import reduce
+from operator import or_
+from typing import Iterable
+
+from django.db import router, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from .models import Laptop, LaptopBrandInventory
+from .signals import models_changed
+
+MAX_ORDER_LINES = 100  # keeps the UPDATE well under SQLite's 999 parameters
+
+
+@dataclass(frozen=True)
+class OrderLine:
+    laptop_id: int
+    quantity: int
+
+
+@dataclass(frozen=True)
+class Shortage:
+    laptop_id: int
+    requested: int
+    available: int | None  # None: no such laptop
+
+    def __str__(self) -> str:
+        if self.available is None:
+            return f"laptop {self.laptop_id}: no such laptop"
+        return f"laptop {self.laptop_id}: {self.requested} requested, {self.available} available"
+
+
+class OutOfStock(Exception):
+    def __init__(self, shortages: list[Shortage]) -> None:
+        super().__init__("; ".join(map(str, shortages)))
+        self.shortages = shortages
+
+
+def merge_lines(lines: Iterable[OrderLine]) -> dict[int, int]:
+    """
+    Quantity per laptop id, lines of the same laptop added up, in id order.
+    """
+    quantities: dict[int, int] = {}
+    for line in lines:
+        if line.quantity <= 0:
+            raise ValueError(f"laptop {line.laptop_id}: quantity should be positive")
+        quantities[line.laptop_id] = quantities.get(line.laptop_id, 0) + line.quantity
+    return dict(sorted(quantities.items()))
+
+
+def reserve(lines: Iterable[OrderLine], using: str | None = None) -> dict[int, int]:
+    """
+    Take the order lines from stock, all or none. Returns the remaining count per laptop id;
+    raises OutOfStock when a line cannot be served.
+    """
+    quantities = merge_lines(lines)
+    if not quantities:
+        return {}
+    if len(quantities) > MAX_ORDER_LINES:
+        raise ValueError(f"an order should hold at most {MAX_ORDER_LINES} laptops")
+    using = using or router.db_for_write(Laptop)
+    laptops = Laptop.objects.using(using)
+    stamp = timezone.now()
+
+    with transaction.atomic(using=using):
+        taken = Case(*[When(pk=laptop_id, then=Value(quantity)) for laptop_id, quantity in quantities.items()],
+                     output_field=IntegerField())
+        in_stock = reduce(or_, [Q(pk=laptop_id, count__gte=quantity) for laptop_id, quantity in quantities.items()])
+        updated = laptops.filter(in_stock).update(count=F("count") - taken, updated_at=stamp)
+
+        rows = {pk: (brand, price, count, updated_at) for pk, brand, price, count, updated_at
+                in laptops.filter(pk__in=quantities).values_list("pk", "brand", "price", "count", "updated_at")}
+        if updated < len(quantities):
+            raise OutOfStock([Shortage(laptop_id, quantity, rows[laptop_id][2] if laptop_id in rows else None)
+                              for laptop_id, quantity in quantities.items()
+                              if laptop_id not in rows or rows[laptop_id][3] != stamp])
+
+        # units only: the laptop is removed with its old count and added back with the new one
+        LaptopBrandInventory.apply_changes(
+            added=[(brand, price, count) for brand, price, count, _ in rows.values()],
+            removed=[(brand, price, count + quantities[pk]) for pk, (brand, price, count, _) in rows.items()],
+            using=using,
+        )
+    models_changed.send(sender=Laptop, ids=list(quantities))
+    return {pk: count for pk, (_, _, count, _) in rows.items()}
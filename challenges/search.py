@@ -0,0 +1,147 @@
+"""
+Full-text search over Post.title and Post.content backed by SQLite FTS5.
+
+Two external-content FTS5 tables shadow challenges_post and are kept in sync by triggers, so every write path
+(save, delete, bulk_create, queryset update/delete) maintains them:
+
+- challenges_post_fts (unicode61 tokenizer) answers "strict" whole-word search;
+- challenges_post_fts_trigram (trigram tokenizer) answers "loose" substring search.
+
+On other database backends search falls back to the icontains/iregex ORM filters.
+"""
+from typing import Any
+
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.models import Q, QuerySet
+
+from .models import Post
+
+POST_TABLE = "challenges_post"
+WORD_INDEX = "challenges_post_fts"
+TRIGRAM_INDEX = "challenges_post_fts_trigram"
+INDEXES = {WORD_INDEX: "unicode61 remove_diacritics 2", TRIGRAM_INDEX: "trigram"}
+
+# bm25 column weights: a hit in the title counts more than one in the content
+TITLE_WEIGHT = 10.0
+CONTENT_WEIGHT = 1.0
+
+# trigram index cannot match terms shorter than one trigram
+MIN_TRIGRAM_TERM = 3
+
+
+def create_index_sql(index: str, tokenizer: str) -> list[str]:
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5("
+        f"title, content, content='{POST_TABLE}', content_rowid='id', tokenize='{tokenizer}')",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_ai AFTER INSERT ON {POST_TABLE} BEGIN "
+        f"INSERT INTO {index}(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_ad AFTER DELETE ON {POST_TABLE} BEGIN "
+        f"INSERT INTO {index}({index}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_au AFTER UPDATE OF title, content ON {POST_TABLE} BEGIN "
+        f"INSERT INTO {index}({index}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); "
+        f"INSERT INTO {index}(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+    ]
+
+
+def drop_index_sql(index: str) -> list[str]:
+    return [f"DROP TRIGGER IF EXISTS {index}_{suffix}" for suffix in ("ai", "ad", "au")] + \
+        [f"DROP TABLE IF EXISTS {index}"]
+
+
+def index_supported(using: str = DEFAULT_DB_ALIAS) -> bool:
+    return connections[using].vendor == "sqlite"
+
+
+def create_indexes(using: str = DEFAULT_DB_ALIAS) -> None:
+    with connections[using].cursor() as cursor:
+        for index, tokenizer in INDEXES.items():
+            for statement in create_index_sql(index, tokenizer):
+                cursor.execute(statement)
+
+
+def drop_indexes(using: str = DEFAULT_DB_ALIAS) -> None:
+    with connections[using].cursor() as cursor:
+        for index in INDEXES:
+            for statement in drop_index_sql(index):
+                cursor.execute(statement)
+
+
+def rebuild_indexes(using: str = DEFAULT_DB_ALIAS) -> None:
+    drop_indexes(using)
+    create_indexes(using)
+    with connections[using].cursor() as cursor:
+        for index in INDEXES:
+            cursor.execute(f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {index}({index}) VALUES ('optimize')")
+
+
+def _match_expression(words: list[str]) -> str:
+    return " OR ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+
+def _like_pattern(word: str) -> str:
+    return "%" + word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _ranked_sql(index: str, words: list[str], like_words: list[str]) -> tuple[str, list[Any]]:
+    matches: list[str] = []
+    params: list[Any] = []
+    if words:
+        matches.append(f"SELECT rowid AS id, bm25({index}, %s, %s) AS score FROM {index} WHERE {index} MATCH %s")
+        params += [TITLE_WEIGHT, CONTENT_WEIGHT, _match_expression(words)]
+    if like_words:
+        # terms the trigram index cannot match: scanned with LIKE, ranked after every indexed hit
+        likes = " OR ".join(["title LIKE %s ESCAPE '\\' OR content LIKE %s ESCAPE '\\'"] * len(like_words))
+        matches.append(f"SELECT id, 0.0 AS score FROM {POST_TABLE} WHERE {likes}")
+        params += [_like_pattern(word) for word in like_words for _ in range(2)]
+    # materialized so that bm25() is evaluated inside the full-text query, not in the outer filter
+    return (f"WITH hits(id, score) AS MATERIALIZED ({' UNION ALL '.join(matches)}) "
+            f"SELECT id, MIN(score) AS best FROM hits GROUP BY id"), params
+
+
+def orm_search(words: list[str], strict: bool = False) -> QuerySet:
+    condition = Q(pk__in=[])
+    for word in words:
+        if strict:
+            pattern = r'\b' + word + r'\b'
+            condition |= Q(title__iregex=pattern) | Q(content__iregex=pattern)
+        else:
+            condition |= Q(title__icontains=word) | Q(content__icontains=word)
+    return Post.objects.filter(condition).order_by('created_at')
+
+
+def search_posts(words: list[str], strict: bool = False, after: tuple[float, int] | None = None,
+                 limit: int | None = None, using: str = DEFAULT_DB_ALIAS) -> list[tuple[int, float]]:
+    """
+    Return (post id, score) pairs of posts matching any of the words, most relevant (lowest score) first.
+    after is the (score, id) of the last row already seen and limit bounds the number of rows returned,
+    so results can be paged through with one query per page.
+    """
+    words = [word for word in words if word]
+    if not words:
+        return []
+
+    if not index_supported(using):
+        queryset = orm_search(words, strict).using(using).order_by('id')
+        if after is not None:
+            queryset = queryset.filter(id__gt=after[1])
+        if limit is not None:
+            queryset = queryset[:limit]
+        return [(post_id, 0.0) for post_id in queryset.values_list('id', flat=True)]
+
+    if strict:
+        sql, params = _ranked_sql(WORD_INDEX, words, [])
+    else:
+        sql, params = _ranked_sql(TRIGRAM_INDEX, [word for word in words if len(word) >= MIN_TRIGRAM_TERM],
+                                  [word for word in words if len(word) < MIN_TRIGRAM_TERM])
+    if after is not None:
+        sql += " HAVING (best, id) > (%s, %s)"
+        params += list(after)
+    sql += " ORDER BY best, id"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(post_id, score) for post_id, score in cursor.fetchall()]
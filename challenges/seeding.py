@@ -0,0 +1,167 @@
+"""
+Generation of large fixture datasets.
+
+Rows are produced as plain dicts by a row factory (optionally in a process pool), then validated and
+written by a single writer with bulk_create, one transaction per batch.
+"""
+import random
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Callable, Iterator
+
+import django
+from lorem.data import WORDS  # type: ignore
+from django.db import models
+
+from .models import Book, Laptop, LaptopBrandInventory, Post
+from .models_choices import LaptopBrand, LoremCategory, PostStatus
+from .signals import models_changed
+from .sqlite import write_atomic
+
+Row = dict[str, Any]
+
+SEED_START = datetime(2018, 1, 1, 13, 30, tzinfo=dt_timezone.utc)
+SEED_END = datetime(2024, 1, 3, 4, 50, tzinfo=dt_timezone.utc)
+
+STATUSES = [status.value for status in PostStatus]
+CATEGORIES = [category.value for category in LoremCategory]
+BRANDS = [brand.name for brand in LaptopBrand]
+MEMORY_SIZES = [4, 8, 16, 32, 64]
+DISK_SIZES = [128, 256, 512, 1024, 2048]
+
+
+def lorem_word(rng: random.Random | None = None) -> str:
+    return (rng or random).choice(WORDS)
+
+
+def lorem_sentence(rng: random.Random, min_words: int = 4, max_words: int = 8) -> str:
+    sentence = " ".join(rng.choices(WORDS, k=rng.randint(min_words, max_words)))
+    return sentence[0].upper() + sentence[1:] + "."
+
+
+def lorem_paragraph(rng: random.Random, min_sentences: int = 5, max_sentences: int = 10) -> str:
+    return " ".join(lorem_sentence(rng) for _ in range(rng.randint(min_sentences, max_sentences)))
+
+
+def random_date(rng: random.Random | None = None, start: datetime = SEED_START, end: datetime = SEED_END) -> datetime:
+    minutes = int((end - start).total_seconds() // 60)
+    return start + timedelta(minutes=(rng or random).randint(1, max(minutes, 1)))
+
+
+def post_row(rng: random.Random) -> Row:
+    created_at = random_date(rng)
+    status = rng.choice(STATUSES)
+    return {
+        "title": lorem_sentence(rng),
+        "content": lorem_paragraph(rng),
+        "author": lorem_word(rng),
+        "status": status,
+        "created_at": created_at,
+        "published_at": None if status == PostStatus.unpublished.value else random_date(rng, created_at),
+        "category": rng.choice(CATEGORIES),
+    }
+
+
+def laptop_row(rng: random.Random) -> Row:
+    return {
+        "brand": rng.choice(BRANDS),
+        "year": rng.randint(2015, 2024),
+        "memory": rng.choice(MEMORY_SIZES),
+        "disk": rng.choice(DISK_SIZES),
+        "price": round(rng.uniform(300, 4000), 2),
+        "count": rng.choice([0, rng.randint(1, 50)]),
+        "created_at": random_date(rng),
+    }
+
+
+def book_row(rng: random.Random) -> Row:
+    return {
+        "title": lorem_sentence(rng, 2, 5),
+        "author_full_name": f"{lorem_word(rng).title()} {lorem_word(rng).title()}",
+        "isbn": "".join(rng.choices("0123456789", k=10)),
+    }
+
+
+SEEDERS: dict[str, tuple[type[models.Model], Callable[[random.Random], Row]]] = {
+    "posts": (Post, post_row),
+    "laptops": (Laptop, laptop_row),
+    "books": (Book, book_row),
+}
+
+
+@dataclass
+class SeedReport:
+    model: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.rows} {self.model} in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s)"
+
+
+def generate_rows(kind: str, count: int, seed: int | None) -> list[Row]:
+    rng = random.Random(seed)
+    factory = SEEDERS[kind][1]
+    return [factory(rng) for _ in range(count)]
+
+
+def _chunk_sizes(total: int, chunk_size: int) -> Iterator[int]:
+    for start in range(0, total, chunk_size):
+        yield min(chunk_size, total - start)
+
+
+def iter_row_chunks(kind: str, total: int, chunk_size: int, workers: int = 0,
+                    seed: int | None = None) -> Iterator[list[Row]]:
+    """
+    Yield generated rows in chunks. With workers > 0 chunks are generated in a process pool,
+    keeping at most two chunks per worker in flight so memory stays bounded.
+    """
+    chunk_seeds = (None if seed is None else seed + number for number in range(total))
+    if workers <= 0:
+        for size in _chunk_sizes(total, chunk_size):
+            yield generate_rows(kind, size, next(chunk_seeds))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+        pending: deque[Future] = deque()
+        for size in _chunk_sizes(total, chunk_size):
+            pending.append(executor.submit(generate_rows, kind, size, next(chunk_seeds)))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def write_batch(model: type[models.Model], rows: list[Row], validate: bool = True) -> list[models.Model]:
+    objects = [model(**row) for row in rows]
+    if validate:
+        for obj in objects:
+            obj.full_clean(validate_unique=False)
+    with write_atomic():
+        created = model.objects.bulk_create(objects)
+        if model is Laptop:
+            LaptopBrandInventory.apply_changes(added=[(laptop.brand, laptop.price, laptop.count) for laptop in created])
+    models_changed.send(sender=model)
+    return created
+
+
+def seed(kind: str, total: int, batch_size: int = 5000, workers: int = 0, seed: int | None = None,
+         validate: bool = True, progress: Callable[[SeedReport], None] | None = None) -> SeedReport:
+    model = SEEDERS[kind][0]
+    report = SeedReport(kind, 0, 0.0)
+    started = time.perf_counter()
+    for rows in iter_row_chunks(kind, total, batch_size, workers, seed):
+        write_batch(model, rows, validate)
+        report.rows += len(rows)
+        report.seconds = time.perf_counter() - started
+        if progress is not None:
+            progress(report)
+    report.seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,137 @@
+"""
+Compiled model serializers.
+
+A ModelSerializer resolves the model fields, their column order and a converter per field once; rows are then
+read with values_list() (no model instances are built) and turned into JSON-ready dicts with the precomputed
+converters. The output matches to_json() passed through DjangoJSONEncoder, so JsonResponse bodies are unchanged.
+"""
+import datetime
+from functools import cache
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, Sequence
+
+from asgiref.sync import sync_to_async
+from django.db import models
+from django.db.models import QuerySet
+
+from .instrumentation import timed
+
+Converter = Callable[[Any], Any]
+Row = dict[str, Any]
+
+
+def encode_datetime(value: datetime.datetime | None) -> str | None:
+    # same format as DjangoJSONEncoder: millisecond precision, "Z" for UTC
+    if value is None:
+        return None
+    encoded = value.isoformat()
+    if value.microsecond:
+        encoded = encoded[:23] + encoded[26:]
+    if encoded.endswith("+00:00"):
+        encoded = encoded[:-6] + "Z"
+    return encoded
+
+
+def encode_date(value: datetime.date | None) -> str | None:
+    return None if value is None else value.isoformat()
+
+
+def choice_label_converter(field: models.Field) -> Converter:
+    labels = {value: label for value, label in field.flatchoices}
+    return lambda value: labels.get(value, value)
+
+
+def field_converter(field: models.Field, choice_labels: bool = False) -> Converter | None:
+    if choice_labels and field.choices:
+        return choice_label_converter(field)
+    if isinstance(field, models.DateTimeField):
+        return encode_datetime
+    if isinstance(field, models.DateField):
+        return encode_date
+    return None
+
+
+class ModelSerializer:
+    def __init__(self, model: type[models.Model], fields: Sequence[str] | None = None,
+                 choice_labels: bool = False) -> None:
+        self.model = model
+        concrete_fields = {field.name: field for field in model._meta.concrete_fields}
+        self.fields = tuple(fields) if fields is not None else tuple(concrete_fields)
+        self.attnames = tuple(concrete_fields[name].attname for name in self.fields)
+        self.converters = tuple((index, converter) for index, name in enumerate(self.fields)
+                                if (converter := field_converter(concrete_fields[name], choice_labels)) is not None)
+
+    def encode(self, values: Sequence[Any]) -> Row:
+        if self.converters:
+            values = list(values)
+            for index, converter in self.converters:
+                values[index] = converter(values[index])
+        return dict(zip(self.fields, values))
+
+    def encode_rows(self, rows: Iterable[Sequence[Any]]) -> list[Row]:
+        encode = self.encode
+        with timed("to_json"):
+            return [encode(values) for values in rows]
+
+    def values(self, queryset: QuerySet) -> QuerySet:
+        return queryset.values_list(*self.fields)
+
+    def fetch(self, queryset: QuerySet) -> list[tuple]:
+        with timed("orm"):
+            return list(self.values(queryset))
+
+    def serialize(self, queryset: QuerySet) -> list[Row]:
+        return self.encode_rows(self.fetch(queryset))
+
+    def iterate(self, queryset: QuerySet, chunk_size: int = 2000) -> Iterator[Row]:
+        encode = self.encode
+        return (encode(values) for values in self.values(queryset).iterator(chunk_size=chunk_size))
+
+    def one(self, queryset: QuerySet) -> Row | None:
+        with timed("orm"):
+            values = self.values(queryset).first()
+        return None if values is None else self.encode_rows([values])[0]
+
+    async def afetch(self, queryset: QuerySet) -> list[tuple]:
+        with timed("orm"):
+            return [values async for values in self.values(queryset)]
+
+    async def aserialize(self, queryset: QuerySet) -> list[Row]:
+        return self.encode_rows(await self.afetch(queryset))
+
+    async def aiterate(self, queryset: QuerySet, chunk_size: int = 2000) -> AsyncIterator[Row]:
+        # not QuerySet.aiterator(): on Django 4.2 it runs a values_list() query in the event loop thread
+        rows = self.values(queryset).iterator(chunk_size=chunk_size)
+        next_chunk = sync_to_async(lambda: list(islice(rows, chunk_size)))
+        encode = self.encode
+        while chunk := await next_chunk():
+            for values in chunk:
+                yield encode(values)
+
+    async def aone(self, queryset: QuerySet) -> Row | None:
+        with timed("orm"):
+            values = await self.values(queryset).afirst()
+        return None if values is None else self.encode_rows([values])[0]
+
+    def in_bulk(self, ids: Iterable[Any]) -> dict[Any, Row]:
+        """
+        Serialized rows by primary key; the primary key must be one of the serialized fields.
+        """
+        position = self.fields.index(self.model._meta.pk.name)
+        ids = list(ids)
+        rows: dict[Any, Row] = {}
+        batch_size = 900  # stays below SQLite's default limit of 999 bound parameters
+        for start in range(0, len(ids), batch_size):
+            batch = self.model._default_manager.filter(pk__in=ids[start:start + batch_size]).order_by()
+            fetched = self.fetch(batch)
+            rows.update(zip((values[position] for values in fetched), self.encode_rows(fetched)))
+        return rows
+
+    def from_instance(self, instance: models.Model) -> Row:
+        return self.encode([getattr(instance, attname) for attname in self.attnames])
+
+
+@cache
+def serializer_for(model: type[models.Model], fields: tuple[str, ...] | None = None,
+                   choice_labels: bool = False) -> ModelSerializer:
+    return ModelSerializer(model, fields, choice_labels)
@@ -0,0 +1,27 @@
+from typing import Any
+
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal
+
+from .cache import get_response_cache
+from .models import Book, Laptop, Post
+
+# Sent by write paths that bypass post_save/post_delete (bulk_create, queryset update/delete)
+# with sender=<model class>, and ids=<primary keys of the changed rows> when the writer knows them.
+models_changed = Signal()
+
+CACHED_MODELS = (Book, Laptop, Post)
+
+
+def invalidate_cached_responses(sender: type[models.Model], **kwargs: Any) -> None:
+    # after the commit: bumped earlier, a concurrent request could still read the old rows and cache them
+    # under the new version
+    transaction.on_commit(lambda: get_response_cache().bump(sender), using=kwargs.get("using"))
+
+
+# per model: a receiver without a sender runs for every model in the project and turns off the fast delete path
+# of all of them (sessions, content types, ...)
+for model in CACHED_MODELS:
+    for signal in (post_save, post_delete, models_changed):
+        signal.connect(invalidate_cached_responses, sender=model)
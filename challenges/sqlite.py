@@ -0,0 +1,114 @@
+"""
+SQLite connection profiles.
+
+The pragmas of settings.CHALLENGES_SQLITE_PROFILE are applied to every new SQLite connection (connection_created).
+The setting is the name of a preset or a dict of pragmas; None keeps SQLite's defaults.
+
+    serving    For the web workers. WAL journal: readers do not wait for the writer and the writer does not wait
+               for readers. synchronous=NORMAL: commits do not fsync, the WAL is synced at checkpoints, so a power
+               loss can drop the last transactions but cannot corrupt the database. 64 MiB page cache, 256 MiB
+               memory map, temporary b-trees in memory, and a 5 s wait for a lock instead of "database is locked".
+               Pair it with CONN_MAX_AGE > 0: the page cache and memory map live as long as the connection.
+
+    bulk_load  For seed / import commands while nothing else uses the database, e.g.
+               CHALLENGES_SQLITE_PROFILE=bulk_load manage.py seed posts 1000000. The rollback journal is kept in
+               memory and nothing is fsynced: a crash in the middle of a load can corrupt the database, which is
+               then re-seeded. A database left in WAL mode by the serving profile only leaves it when this is the
+               only open connection; otherwise journal_mode stays WAL and the other pragmas still apply.
+
+journal_mode is persistent in the database file, the other pragmas are per connection.
+
+write_atomic() is transaction.atomic() for transactions that write challenges_post. Its outermost block begins
+with BEGIN IMMEDIATE on SQLite, which takes the write lock up front and waits busy_timeout for it. Under a plain
+BEGIN the lock is only asked for by the first write, and with the FTS5 sync triggers an INSERT into challenges_post
+reads the index before it asks: a transaction that has read cannot wait for the lock, so SQLite fails it at once
+with "database is locked" whenever another connection is writing.
+"""
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, DEFAULT_DB_ALIAS, transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+Pragmas = dict[str, Any]
+
+PRESETS: dict[str, Pragmas] = {
+    "serving": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64 * 1024,  # negative: KiB instead of pages
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "bulk_load": {
+        "journal_mode": "MEMORY",
+        "synchronous": "OFF",
+        "cache_size": -256 * 1024,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+}
+
+SUPPORTED_PRAGMAS = ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "busy_timeout",
+                     "wal_autocheckpoint", "locking_mode")
+
+
+def resolve_profile(profile: str | Pragmas | None) -> Pragmas:
+    if profile is None:
+        return {}
+    if isinstance(profile, str):
+        try:
+            return PRESETS[profile]
+        except KeyError:
+            raise ImproperlyConfigured(f"unknown SQLite profile {profile!r}, "
+                                       f"choose from {', '.join(PRESETS)} or give a dict of pragmas") from None
+    unknown = set(profile) - set(SUPPORTED_PRAGMAS)
+    if unknown:
+        raise ImproperlyConfigured(f"unsupported SQLite pragmas in profile: {', '.join(sorted(unknown))}")
+    return profile
+
+
+def apply_profile(connection: BaseDatabaseWrapper, profile: str | Pragmas | None) -> dict[str, Any]:
+    """
+    Run the profile's pragmas on an open connection; returns the value each pragma reports afterwards.
+    """
+    applied = {}
+    connection.ensure_connection()
+    # on the driver connection: setup statements stay out of query logs and per-request query counts
+    raw = connection.connection
+    # journal_mode first: synchronous=NORMAL is only safe once the connection is in WAL mode
+    for name, value in sorted(resolve_profile(profile).items(), key=lambda item: item[0] != "journal_mode"):
+        raw.execute(f"PRAGMA {name} = {value}")
+        row = raw.execute(f"PRAGMA {name}").fetchone()
+        applied[name] = row[0] if row else None
+    return applied
+
+
+@receiver(connection_created)
+def apply_configured_profile(sender: type, connection: BaseDatabaseWrapper, **kwargs: Any) -> None:
+    if connection.vendor == "sqlite":
+        apply_profile(connection, getattr(settings, "CHALLENGES_SQLITE_PROFILE", None))
+
+
+@contextmanager
+def write_atomic(using: str | None = None) -> Iterator[None]:
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        # nested blocks are savepoints of a transaction that has already begun
+        with transaction.atomic(using=using):
+            yield
+        return
+    # atomic() begins the outermost transaction through this method, whose SQLite version issues a plain BEGIN
+    connection._start_transaction_under_autocommit = lambda: connection.cursor().execute("BEGIN IMMEDIATE")
+    try:
+        with transaction.atomic(using=using):
+            del connection._start_transaction_under_autocommit
+            yield
+    finally:
+        connection.__dict__.pop("_start_transaction_under_autocommit", None)
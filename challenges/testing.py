@@ -0,0 +1,56 @@
+"""
+Test helpers for checking the declared query budgets of the views in orm_challenges/urls.py.
+
+    from challenges.testing import assert_query_budget
+
+    def test_laptop_details(self):
+        assert_query_budget(self.client, f"/laptops/{laptop.pk}/")
+"""
+from typing import Any, Callable, Iterator
+
+from django.http import HttpResponse
+from django.test import Client
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from .instrumentation import instrument, view_query_budget
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def assert_query_budget(client: Client, path: str, method: str = "get", data: Any = None,
+                        **extra: Any) -> HttpResponse:
+    """
+    Request path with the test client and fail if its view runs more queries than it declared with
+    @query_budget. Streamed responses (stream=1 exports) are consumed but not held to the budget.
+    """
+    budget = view_query_budget(path)
+    if budget is None:
+        raise AssertionError(f"{path} is not routed to a view with a declared query budget")
+
+    with instrument(capture_sql=True) as metrics:
+        response = getattr(client, method)(path, data, **extra)
+        if response.streaming:
+            b"".join(response)  # async streaming content too
+
+    if not response.streaming and metrics.queries > budget:
+        statements = "\n".join(f"  {number}. {sql}" for number, sql in enumerate(metrics.statements, start=1))
+        raise QueryBudgetExceeded(f"{method.upper()} {path} ran {metrics.queries} queries, "
+                                  f"budget is {budget}:\n{statements}")
+    return response
+
+
+def iter_views(patterns: list | None = None, prefix: str = "") -> Iterator[tuple[str, Callable]]:
+    """
+    Yield (route, view) for every view reachable from the root URLconf.
+    """
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_views(pattern.url_patterns, prefix + str(pattern.pattern))
+        elif isinstance(pattern, URLPattern):
+            yield prefix + str(pattern.pattern), pattern.callback
+
+
+def views_without_budget() -> list[str]:
+    return [route for route, view in iter_views() if getattr(view, "query_budget", None) is None]
@@ -0,0 +1,62 @@
+import random
+
+from django.test import TransactionTestCase, override_settings
+
+from challenges import feed
+from challenges.models import Post
+from challenges.models_choices import PostStatus
+from challenges.seeding import post_row, random_date, seed
+from challenges.signals import models_changed
+
+RING_SIZE = 20
+
+
+# TransactionTestCase: the ring applies saves and deletes once their transaction commits
+@override_settings(CHALLENGES_REPLICA=None, CHALLENGES_FEED={"RING_SIZE": RING_SIZE, "MAX_AGE": 3600},
+                   CHALLENGES_POST_ARCHIVE={"AFTER_DAYS": None})
+class FeedRingTests(TransactionTestCase):
+    databases = {"default"}
+
+    def setUp(self) -> None:
+        seed("posts", 200, seed=0, validate=False)
+        feed._ring = None
+        self.rng = random.Random(0)
+
+    def random_post(self) -> Post:
+        return Post.objects.order_by("?").first()
+
+    def create(self) -> None:
+        Post(**post_row(self.rng)).save()
+
+    def publish(self) -> None:
+        post = self.random_post()
+        post.status = PostStatus.published.value
+        post.published_at = random_date(self.rng, post.created_at)
+        post.save()
+
+    def unpublish(self) -> None:
+        post = self.random_post()
+        post.status = self.rng.choice([PostStatus.banned.value, PostStatus.unpublished.value])
+        post.save()
+
+    def delete(self) -> None:
+        self.random_post().delete()
+
+    def bulk_publish(self) -> None:
+        ids = [self.random_post().pk for _ in range(5)]
+        Post.objects.filter(pk__in=ids).update(status=PostStatus.published.value)
+        models_changed.send(sender=Post, ids=ids)
+
+    def assert_ring_matches_feed(self, message: str) -> None:
+        ring = feed.get_feed_ring()
+        expected = list(feed.published_feed().values_list("id", flat=True)[:RING_SIZE])
+        for n in (1, RING_SIZE // 2, RING_SIZE):
+            self.assertEqual(ring.latest_ids(n), expected[:n], message)
+
+    def test_ring_follows_random_writes(self) -> None:
+        self.assert_ring_matches_feed("after loading")
+        operations = [self.create, self.publish, self.unpublish, self.delete, self.bulk_publish]
+        for step in range(1, 401):
+            operation = self.rng.choice(operations)
+            operation()
+            self.assert_ring_matches_feed(f"step {step}, after {operation.__name__}")
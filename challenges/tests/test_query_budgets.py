@@ -0,0 +1,57 @@
+import logging
+import random
+
+from django.test import TransactionTestCase, override_settings
+
+from challenges.cache import get_response_cache
+from challenges.instrumentation import view_query_budget
+from challenges.management.commands.bench_routes import ROUTE_CASES, Fixtures
+from challenges.seeding import seed
+from challenges.testing import assert_query_budget, iter_views
+
+
+# the test database is created for default only; TransactionTestCase so that transactions issue BEGIN, not the
+# SAVEPOINT + RELEASE of a block nested in the test's own
+@override_settings(CHALLENGES_REPLICA=None)
+class QueryBudgetTests(TransactionTestCase):
+    databases = {"default"}
+
+    def setUp(self) -> None:
+        request_log = logging.getLogger("challenges.requests")
+        self.addCleanup(request_log.setLevel, request_log.level)
+        request_log.setLevel(logging.WARNING)  # budget warnings only
+        for kind in ("posts", "laptops", "books"):
+            seed(kind, 2500, seed=0, validate=False)
+        self.fixtures = Fixtures(random.Random(0))
+
+    def test_every_route_declares_a_budget_and_has_cases(self) -> None:
+        for route, view in iter_views():
+            with self.subTest(route=route):
+                self.assertIsNotNone(getattr(view, "query_budget", None))
+                self.assertIn(route, ROUTE_CASES)
+
+    def test_routes_stay_within_their_budget(self) -> None:
+        for cases in ROUTE_CASES.values():
+            for name, build in cases.items():
+                with self.subTest(name):
+                    method, path, data = build(self.fixtures)
+                    get_response_cache().clear()  # measure the view, not a cached reply
+                    if isinstance(data, list):
+                        response = assert_query_budget(self.client, path, method, data,
+                                                       content_type="application/json")
+                    elif isinstance(data, bytes):
+                        response = assert_query_budget(self.client, path, method, data,
+                                                       content_type="application/x-ndjson")
+                    else:
+                        response = assert_query_budget(self.client, path, method, data)
+                    self.assertLess(response.status_code, 500)
+
+    def test_stream_exports_are_not_held_to_the_budget(self) -> None:
+        # more matches than one in_bulk chunk: the export runs more queries than the paged search may
+        with self.assertNoLogs("challenges.requests", "WARNING"):
+            response = assert_query_budget(self.client, "/posts/search/", data={"query": "dolor", "stream": "1"})
+        self.assertTrue(response.streaming)
+
+    def test_budget_of_a_path_with_a_query_string(self) -> None:
+        self.assertEqual(view_query_budget("/posts/feed/?n=100"), view_query_budget("/posts/feed/"))
+        assert_query_budget(self.client, "/posts/feed/?n=100")
@@ -9,7 +9,9 @@
 """
 from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest, JsonResponse
 
+from challenges.instrumentation import query_budget
 from challenges.models import Book
+from challenges.views.level_1.b_book_details import BOOK_JSON
 
 
 def create_book(title: str, author_full_name: str, isbn: str) -> Book:
@@ -18,6 +20,7 @@ def create_book(title: str, author_full_name: str, isbn: str) -> Book:
     return new_book
 
 
+@query_budget(1)
 def create_book_handler(request: HttpRequest) -> HttpResponse:
     title = request.POST.get("title")
     author_full_name = request.POST.get("author_full_name")
@@ -28,5 +31,4 @@ def create_book_handler(request: HttpRequest) -> HttpResponse:
     else:
         return HttpResponseBadRequest("One or more of the required parameters are missing")
 
-    return JsonResponse({"id": book.pk, "title": book.title,
-                         "author_full_name": book.author_full_name, "isbn": book.isbn})
+    return JsonResponse(BOOK_JSON.from_instance(book))
@@ -11,7 +11,13 @@
 """
 from django.http import HttpRequest, HttpResponse, JsonResponse, HttpResponseNotFound
 
+from challenges.cache import cache_response
+from challenges.conditional import Validators, conditional_get, row_validators
+from challenges.instrumentation import query_budget
 from challenges.models import Book
+from challenges.serializers import serializer_for
+
+BOOK_JSON = serializer_for(Book)
 
 
 def get_book(book_id: int) -> Book | None:
@@ -21,15 +27,17 @@ def get_book(book_id: int) -> Book | None:
         return None
 
 
+def book_validators(request: HttpRequest, book_id: int) -> Validators | None:
+    return row_validators(Book.objects.filter(pk=book_id))
+
+
+@query_budget(2)  # validators + the row
+@cache_response(Book)
+@conditional_get(book_validators)
 def book_details_handler(request: HttpRequest, book_id: int) -> HttpResponse:
-    book = get_book(book_id)
+    book = BOOK_JSON.one(Book.objects.filter(pk=book_id))
 
     if book is None:
         return HttpResponseNotFound()
 
-    return JsonResponse({
-        "id": book.pk,
-        "title": book.title,
-        "author_full_name": book.author_full_name,
-        "isbn": book.isbn,
-    })
+    return JsonResponse(book)
@@ -6,20 +6,29 @@
 После удаления книги попробуйте получить описание удалённой книги с помощью ручки из предыдущего задания
 и убедитесь, что книга удалена.
 """
+from django.db import connections, router
 from django.http import HttpRequest, HttpResponse, HttpResponseNotFound, HttpResponseNotAllowed
 
-from challenges.views.level_1.b_book_details import get_book
+from challenges.instrumentation import query_budget
+from challenges.models import Book
+from challenges.signals import models_changed
 
 
 def delete_book(book_id: int) -> str:
-    book = get_book(book_id)
-    if book is None:
+    # an explicit single DELETE: QuerySet.delete() would run the collector, which selects the row first to send
+    # post_delete; models_changed below tells the caches instead
+    connection = connections[router.db_for_write(Book)]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {connection.ops.quote_name(Book._meta.db_table)} "
+                       f"WHERE {connection.ops.quote_name(Book._meta.pk.column)} = %s", [book_id])
+        deleted = cursor.rowcount
+    if not deleted:
         return 'not found'
-    else:
-        book.delete()
-        return 'ok'
+    models_changed.send(sender=Book)
+    return 'ok'
 
 
+@query_budget(1)
 def delete_book_handler(request: HttpRequest, book_id: int) -> HttpResponse:
     if request.method != "POST":
         return HttpResponseNotAllowed(["POST"])
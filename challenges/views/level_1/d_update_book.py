@@ -8,22 +8,26 @@
 После обновления книги попробуйте получить описание книги и убедитесь, что вы видите новые значения.
 """
 from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.utils import timezone
 
+from challenges.instrumentation import query_budget
 from challenges.models import Book
+from challenges.signals import models_changed
+from challenges.views.level_1.b_book_details import BOOK_JSON
 
 
 def update_book(book_id: int, new_title: str, new_author_full_name: str, new_isbn: str) -> Book | None:
-    try:
-        book = Book.objects.get(pk=book_id)
-    except Book.DoesNotExist:
+    # every field is overwritten, so the row does not need to be fetched first;
+    # queryset.update() skips auto_now, so updated_at is set here
+    fields = {"title": new_title, "author_full_name": new_author_full_name, "isbn": new_isbn,
+              "updated_at": timezone.now()}
+    if not Book.objects.filter(pk=book_id).update(**fields):
         return None
-    book.title = new_title
-    book.author_full_name = new_author_full_name
-    book.isbn = new_isbn
-    book.save()
-    return book
+    models_changed.send(sender=Book)
+    return Book(pk=book_id, **fields)
 
 
+@query_budget(1)
 def update_book_handler(request: HttpRequest, book_id: int) -> HttpResponse | JsonResponse:
     title = request.POST.get("title")
     author_full_name = request.POST.get("author_full_name")
@@ -37,9 +41,4 @@ def update_book_handler(request: HttpRequest, book_id: int) -> HttpResponse | Js
     if book is None:
         return HttpResponseBadRequest('There is no such record in the database')
 
-    return JsonResponse({
-        "id": book.pk,
-        "title": book.title,
-        "author_full_name": book.author_full_name,
-        "isbn": book.isbn,
-    })
+    return JsonResponse(BOOK_JSON.from_instance(book))
@@ -0,0 +1,167 @@
+"""
+Batch versions of the book handlers. Each takes a JSON array in the request body, applies the whole batch with
+one bulk statement inside one transaction and replies with a result per item, in request order:
+
+    POST /book/batch/create/  [{"title": ..., "author_full_name": ..., "isbn": ...}, ...]
+    POST /book/batch/update/  [{"id": 1, "title": ...}, ...]      (only the given fields are changed)
+    POST /book/batch/delete/  [1, 2, 3]
+
+Invalid items are reported and skipped, the rest of the batch is still applied.
+"""
+import json
+from typing import Any, Callable
+
+from django.core.exceptions import ValidationError
+from django.db import connections, router, transaction
+from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse
+from django.utils import timezone
+
+from challenges.instrumentation import query_budget
+from challenges.models import Book
+from challenges.signals import models_changed
+from challenges.views.level_1.b_book_details import BOOK_JSON
+
+BOOK_FIELDS = ("title", "author_full_name", "isbn")
+MAX_BATCH_SIZE = 300  # keeps a batch within one INSERT and two UPDATE statements under SQLite's parameter limit
+
+ItemResult = dict[str, Any]
+
+
+def parse_batch(request: HttpRequest) -> list[Any] | str:
+    try:
+        items = json.loads(request.body)
+    except ValueError:
+        return "request body should be a JSON array"
+    if not isinstance(items, list):
+        return "request body should be a JSON array"
+    if not 0 < len(items) <= MAX_BATCH_SIZE:
+        return f"a batch should hold between 1 and {MAX_BATCH_SIZE} items"
+    return items
+
+
+def parse_id(value: Any) -> int | None:
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def validation_errors(book: Book) -> dict[str, list[str]] | None:
+    try:
+        book.full_clean()
+    except ValidationError as e:
+        return e.message_dict
+    return None
+
+
+def create_books(items: list[Any]) -> list[ItemResult]:
+    results: list[ItemResult] = []
+    books = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or any(not isinstance(item.get(field), str) for field in BOOK_FIELDS):
+            results.append({"index": index, "status": "invalid", "errors": f"{', '.join(BOOK_FIELDS)} are required"})
+            continue
+        book = Book(**{field: item[field] for field in BOOK_FIELDS})
+        errors = validation_errors(book)
+        if errors:
+            results.append({"index": index, "status": "invalid", "errors": errors})
+            continue
+        results.append({"index": index, "status": "created"})
+        books.append((len(results) - 1, book))
+
+    with transaction.atomic():
+        created = Book.objects.bulk_create([book for _, book in books])
+    for (position, _), book in zip(books, created):
+        results[position]["book"] = BOOK_JSON.from_instance(book)
+    return results
+
+
+def update_books(items: list[Any]) -> list[ItemResult]:
+    results: list[ItemResult] = []
+    with transaction.atomic():
+        ids = [parse_id(item.get("id")) for item in items if isinstance(item, dict)]
+        existing = Book.objects.in_bulk([book_id for book_id in ids if book_id is not None])
+        changed: dict[int, Book] = {}
+        changed_fields: set[str] = {"updated_at"}  # bulk_update() skips auto_now
+        updated_at = timezone.now()
+        seen = set()
+        for index, item in enumerate(items):
+            book_id = parse_id(item.get("id")) if isinstance(item, dict) else None
+            fields = {field: item[field] for field in BOOK_FIELDS if field in item} if book_id is not None else {}
+            if not fields or any(not isinstance(value, str) for value in fields.values()):
+                results.append({"index": index, "status": "invalid",
+                                "errors": f"an integer id and string values of {', '.join(BOOK_FIELDS)} are required"})
+                continue
+            if book_id in seen:
+                results.append({"index": index, "id": book_id, "status": "duplicate"})
+                continue
+            seen.add(book_id)
+            book = existing.get(book_id)
+            if book is None:
+                results.append({"index": index, "id": book_id, "status": "not found"})
+                continue
+            for field, value in fields.items():
+                setattr(book, field, value)
+            book.updated_at = updated_at
+            errors = validation_errors(book)
+            if errors:
+                results.append({"index": index, "id": book_id, "status": "invalid", "errors": errors})
+                continue
+            changed[book_id] = book
+            changed_fields.update(fields)
+            results.append({"index": index, "id": book_id, "status": "updated", "book": BOOK_JSON.from_instance(book)})
+
+        if changed:
+            Book.objects.bulk_update(changed.values(), sorted(changed_fields))
+    return results
+
+
+def delete_books(items: list[Any]) -> list[ItemResult]:
+    results: list[ItemResult] = []
+    ids = [parse_id(item) for item in items]
+    with transaction.atomic():
+        existing = set(Book.objects.filter(pk__in=[book_id for book_id in ids if book_id is not None])
+                       .values_list("pk", flat=True))
+        if existing:
+            # one explicit DELETE rather than QuerySet.delete(), whose collector selects the rows again to send
+            # post_delete; bulk writes announce themselves with models_changed instead
+            connection = connections[router.db_for_write(Book)]
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {connection.ops.quote_name(Book._meta.db_table)} "
+                               f"WHERE {connection.ops.quote_name(Book._meta.pk.column)} "
+                               f"IN ({', '.join(['%s'] * len(existing))})", list(existing))
+
+    seen = set()
+    for index, book_id in enumerate(ids):
+        if book_id is None:
+            results.append({"index": index, "status": "invalid", "errors": "an integer id is required"})
+        elif book_id in seen:
+            results.append({"index": index, "id": book_id, "status": "duplicate"})
+        else:
+            results.append({"index": index, "id": book_id, "status": "deleted" if book_id in existing else "not found"})
+        seen.add(book_id)
+    return results
+
+
+def batch_reply(request: HttpRequest, apply: Callable[[list[Any]], list[ItemResult]]) -> HttpResponse:
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    items = parse_batch(request)
+    if isinstance(items, str):
+        return HttpResponseBadRequest(items)
+    results = apply(items)
+    if any(result["status"] in ("created", "updated", "deleted") for result in results):
+        models_changed.send(sender=Book)
+    return JsonResponse({"results": results})
+
+
+@query_budget(2)  # BEGIN + one multi-row INSERT
+def batch_create_books_handler(request: HttpRequest) -> HttpResponse:
+    return batch_reply(request, create_books)
+
+
+@query_budget(4)  # BEGIN + SELECT + an UPDATE per 199 rows
+def batch_update_books_handler(request: HttpRequest) -> HttpResponse:
+    return batch_reply(request, update_books)
+
+
+@query_budget(3)  # BEGIN + SELECT + DELETE
+def batch_delete_books_handler(request: HttpRequest) -> HttpResponse:
+    return batch_reply(request, delete_books)
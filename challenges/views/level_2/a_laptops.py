@@ -11,17 +11,148 @@
 - реализовать у модели метод to_json, который будет преобразовывать объект ноутбука в json-сериализуемый словарь
 - по очереди реализовать каждую из вьюх в этом файле, проверяя правильность их работу в браузере
 """
-from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest, HttpResponseNotFound, JsonResponse, HttpResponseForbidden
+import json
+from dataclasses import asdict
 
-from challenges.models import Laptop, LaptopBrand
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest, HttpResponseNotFound, JsonResponse, HttpResponseForbidden, \
+    HttpResponseNotAllowed
 
+from challenges.cache import cache_response
+from challenges.columnar import get_laptop_snapshot
+from challenges.conditional import Validators, conditional_get, row_validators
+from challenges.facets import LaptopSearch, facet_counts, parse_laptop_search
+from challenges.instrumentation import query_budget, timed
+from challenges.models import Laptop, LaptopBrand, LaptopBrandInventory
+from challenges.pagination import InvalidCursor, paginate, parse_page_params
+from challenges.reservations import MAX_ORDER_LINES, OrderLine, OutOfStock, merge_lines, reserve
+from challenges.serializers import serializer_for
 
-def laptop_details_view(request: HttpRequest, laptop_id: int) -> JsonResponse | HttpResponse:
+from .utils import STREAM_CHUNK_SIZE, extract_request_body, stream_json_object, wants_stream
+
+LAPTOP_PAGE_KEYS = ['price', 'id']  # cheapest first
+
+LAPTOP_JSON = serializer_for(Laptop)
+
+
+def in_stock_laptops() -> QuerySet:
+    return Laptop.objects.filter(count__gt=0)  # sorting order by default is set in class Laptop Meta
+
+
+def laptops_by_brand(brand: str, min_price: float) -> QuerySet:
+    return Laptop.objects.filter(brand=brand, price__gte=min_price)
+
+
+def latest_laptops() -> QuerySet:
+    return Laptop.objects.order_by('-created_at')
+
+
+INVENTORY_FIELDS = ('brand', 'laptops', 'units', 'price_sum', 'min_price', 'max_price', 'inventory_value')
+
+
+def brand_inventory() -> QuerySet:
+    return LaptopBrandInventory.objects.order_by('brand').values_list(*INVENTORY_FIELDS)
+
+
+def inventory_reply(rows: list[tuple]) -> JsonResponse:
+    brands = []
+    for brand, laptops, units, price_sum, min_price, max_price, value in rows:
+        brands.append({'brand': brand, 'laptops': laptops, 'units': units, 'min_price': min_price,
+                       'avg_price': price_sum / laptops if laptops else None, 'max_price': max_price,
+                       'inventory_value': value})
+    return JsonResponse({'brands': brands})
+
+
+def laptop_validators(request: HttpRequest, laptop_id: int) -> Validators | None:
+    return row_validators(Laptop.objects.filter(id=laptop_id))
+
+
+def parse_laptop_filter(request: HttpRequest) -> tuple[str, float, str | None, int] | HttpResponse:
+    """
+    Brand, min_price and page params of the filter view, or the error response for invalid ones.
+    """
+    request_body = extract_request_body(request)
+    if isinstance(request_body, str):
+        return HttpResponseBadRequest(request_body)
+
+    brand = request_body.get("brand")
+    min_price_str = request_body.get("min_price")
+    query_min_price = None
+
+    if min_price_str is not None and min_price_str != '':
+        try:
+            query_min_price = float(min_price_str)
+            if query_min_price < 0:
+                return HttpResponseForbidden('Invalid min_price - cannot be negative')
+        except ValueError:
+            return HttpResponseForbidden('Invalid min_price - should be positive float value')
+
+    if not brand or query_min_price is None:
+        return HttpResponseBadRequest('One of required parameters is missing')
+
+    if brand not in [brand.value for brand in LaptopBrand]:
+        reply = 'Invalid brand - you shall choose from available options: ' + " ".join([brand.value for brand in LaptopBrand])
+        return HttpResponseForbidden(reply)
+
+    page_params = parse_page_params(request_body)
+    if isinstance(page_params, str):
+        return HttpResponseBadRequest(page_params)
+    cursor, limit = page_params
+    return brand, query_min_price, cursor, limit
+
+
+def parse_order_lines(request: HttpRequest) -> list[OrderLine] | str:
+    """
+    Order lines of the reservation view: a JSON array of {"laptop_id": <int>, "quantity": <positive int>}.
+    """
     try:
-        laptop = Laptop.objects.get(id=laptop_id)
-        return JsonResponse(laptop.to_json())
-    except Laptop.DoesNotExist:
+        items = json.loads(request.body)
+    except ValueError:
+        items = None
+    if not isinstance(items, list) or not 0 < len(items) <= MAX_ORDER_LINES:
+        return f'request body should be a JSON array of 1 to {MAX_ORDER_LINES} order lines'
+    lines = []
+    for item in items:
+        laptop_id = item.get('laptop_id') if isinstance(item, dict) else None
+        quantity = item.get('quantity') if isinstance(item, dict) else None
+        if not all(isinstance(value, int) and not isinstance(value, bool) for value in (laptop_id, quantity)) \
+                or quantity <= 0:
+            return 'every order line needs an integer laptop_id and a positive integer quantity'
+        lines.append(OrderLine(laptop_id, quantity))
+    return lines
+
+
+def reservation_reply(lines: list[OrderLine], remaining: dict[int, int] | OutOfStock) -> JsonResponse:
+    if isinstance(remaining, OutOfStock):
+        shortages = [asdict(shortage) for shortage in remaining.shortages]
+        return JsonResponse({'error': 'out of stock', 'shortages': shortages}, status=409)
+    return JsonResponse({'reserved': [{'laptop_id': laptop_id, 'quantity': quantity, 'remaining': remaining[laptop_id]}
+                                      for laptop_id, quantity in merge_lines(lines).items()]})
+
+
+def parse_search_request(request: HttpRequest) -> tuple[LaptopSearch, str | None, int] | HttpResponse:
+    request_body = extract_request_body(request)
+    if isinstance(request_body, str):
+        return HttpResponseBadRequest(request_body)
+    search = parse_laptop_search(request_body)
+    if isinstance(search, str):
+        return HttpResponseBadRequest(search)
+    page_params = parse_page_params(request_body)
+    if isinstance(page_params, str):
+        return HttpResponseBadRequest(page_params)
+    cursor, limit = page_params
+    return search, cursor, limit
+
+
+@query_budget(2)  # validators + the row
+@cache_response(Laptop)
+@conditional_get(laptop_validators)
+def laptop_details_view(request: HttpRequest, laptop_id: int) -> JsonResponse | HttpResponse:
+    laptop = LAPTOP_JSON.one(Laptop.objects.filter(id=laptop_id))
+    if laptop is None:
         return HttpResponseNotFound(f'There is no record with id {laptop_id}')
+    with timed("encode"):
+        return JsonResponse(laptop)
     """
     В этой вьюхе вам нужно вернуть json-описание ноутбука по его id.
     Если такого id нет, вернуть 404.
@@ -29,17 +160,24 @@ def laptop_details_view(request: HttpRequest, laptop_id: int) -> JsonResponse |
     pass
 
 
+@query_budget(1)
 def laptop_in_stock_list_view(request: HttpRequest) -> JsonResponse | HttpResponse:
     """
     В этой вьюхе вам нужно вернуть json-описание всех ноутбуков, которых на складе больше нуля.
     Отсортируйте ноутбуки по дате добавления, сначала самый новый.
     """
 
-    laptops = Laptop.objects.filter(count__gt=0)  # sorting order by default is set in class Laptop Meta
-    response = {laptop.id: laptop.to_json() for laptop in laptops}
-    return JsonResponse(response)
+    laptops = in_stock_laptops()
+    if wants_stream(request.GET):
+        return stream_json_object((laptop['id'], laptop) for laptop in LAPTOP_JSON.iterate(laptops, STREAM_CHUNK_SIZE))
+    snapshot = get_laptop_snapshot()
+    rows = snapshot.in_stock() if snapshot is not None else LAPTOP_JSON.serialize(laptops)
+    with timed("encode"):
+        response = {laptop['id']: laptop for laptop in rows}
+        return JsonResponse(response)
 
 
+@query_budget(1)
 def laptop_filter_view(request: HttpRequest) -> JsonResponse | HttpResponse:
     """
     В этой вьюхе вам нужно вернуть список ноутбуков с указанным брендом и указанной минимальной ценой.
@@ -47,42 +185,88 @@ def laptop_filter_view(request: HttpRequest) -> JsonResponse | HttpResponse:
     Если бренд не входит в список доступных у вас на сайте или если цена отрицательная, верните 403.
     Отсортируйте ноутбуки по цене, сначала самый дешевый.
     """
-    brand = request.POST.get("brand")
-    min_price_str = request.POST.get("min_price")
-    query_min_price = None
-
-    if min_price_str is not None and min_price_str != '':
-        try:
-            query_min_price = float(min_price_str)
-            if query_min_price < 0:
-                return HttpResponseForbidden('Invalid min_price - cannot be negative')
-        except ValueError:
-            return HttpResponseForbidden('Invalid min_price - should be positive float value')
-
-    if not brand or query_min_price is None:
-        return HttpResponseBadRequest('One of required parameters is missing')
-
-    if brand not in [brand.value for brand in LaptopBrand]:
-        reply = 'Invalid brand - you shall choose from available options: ' + " ".join([brand.value for brand in LaptopBrand])
-        return HttpResponseForbidden(reply)
+    params = parse_laptop_filter(request)
+    if isinstance(params, HttpResponse):
+        return params
+    brand, query_min_price, cursor, limit = params
 
+    snapshot = get_laptop_snapshot()
     try:
-        laptops = Laptop.objects.filter(brand=brand, price__gte=query_min_price).order_by('price')
-        filtered_data = [laptop.to_json() for laptop in laptops]
-        response = {'laptops': filtered_data}
+        if snapshot is not None:
+            page = snapshot.filter_page(brand, query_min_price, cursor, limit)
+        else:
+            laptops = laptops_by_brand(brand, query_min_price)
+            page = paginate(laptops, LAPTOP_PAGE_KEYS, cursor, limit, serializer=LAPTOP_JSON)
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+
+    with timed("encode"):
+        response = {'laptops': page.items, 'next': page.next_cursor}
         return JsonResponse(response)
-    except Laptop.DoesNotExist:
-        return HttpResponseNotFound('Your request resulted in no results')
 
 
+@query_budget(1)
+@cache_response(Laptop)
 def last_laptop_details_view(request: HttpRequest) -> JsonResponse | HttpResponse:
     """
     В этой вьюхе вам нужно вернуть json-описание последнего созданного ноутбука.
     Если ноутбуков нет вообще, вернуть 404.
     """
-    try:
-        last_laptop = Laptop.objects.latest('created_at')
-        response = {'latest_laptop': last_laptop.to_json()}
-        return JsonResponse(response)
-    except Laptop.DoesNotExist:
+    snapshot = get_laptop_snapshot()
+    last_laptop = snapshot.latest() if snapshot is not None else LAPTOP_JSON.one(latest_laptops())
+    if last_laptop is None:
         return HttpResponseNotFound('No db entries found')
+    with timed("encode"):
+        response = {'latest_laptop': last_laptop}
+        return JsonResponse(response)
+
+
+@query_budget(1)
+@cache_response(Laptop)
+def laptop_inventory_view(request: HttpRequest) -> JsonResponse:
+    """
+    Stock totals and prices per brand, from the incrementally maintained LaptopBrandInventory (one row per brand).
+    """
+    rows = list(brand_inventory())
+    with timed("encode"):
+        return inventory_reply(rows)
+
+
+@query_budget(2)  # facet counts + the page
+@cache_response(Laptop)
+def laptop_search_view(request: HttpRequest) -> JsonResponse | HttpResponse:
+    """
+    Faceted search (challenges.facets): laptops matching every given filter, cheapest first, with the number of
+    matches and the facet counts per brand, memory and year bucket.
+    """
+    params = parse_search_request(request)
+    if isinstance(params, HttpResponse):
+        return params
+    search, cursor, limit = params
+
+    try:
+        page = paginate(search.queryset(), LAPTOP_PAGE_KEYS, cursor, limit, serializer=LAPTOP_JSON)
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+    total, facets = facet_counts(search)
+
+    with timed("encode"):
+        return JsonResponse({'total': total, 'facets': facets, 'laptops': page.items, 'next': page.next_cursor})
+
+
+@query_budget(8)  # BEGIN + UPDATE + SELECT + an inventory UPDATE per brand
+def laptop_reserve_view(request: HttpRequest) -> JsonResponse | HttpResponse:
+    """
+    Take an order from stock, all lines or none (challenges.reservations). POST a JSON array of
+    {"laptop_id", "quantity"} lines; replies with the remaining stock, or 409 with the lines that cannot be served.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    lines = parse_order_lines(request)
+    if isinstance(lines, str):
+        return HttpResponseBadRequest(lines)
+    try:
+        remaining = reserve(lines)
+    except OutOfStock as e:
+        return reservation_reply(lines, e)
+    return reservation_reply(lines, remaining)
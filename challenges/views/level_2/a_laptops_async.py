@@ -0,0 +1,123 @@
+"""
+Async versions of the laptop views, served under async/. Under ASGI (orm_challenges.asgi) a request waiting on
+the database no longer holds a worker; under WSGI they run like the sync views.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, \
+    HttpResponseNotFound, JsonResponse
+
+from challenges.cache import cache_response
+from challenges.columnar import get_laptop_snapshot
+from challenges.conditional import conditional_get
+from challenges.facets import facet_counts
+from challenges.instrumentation import query_budget, timed
+from challenges.models import Laptop
+from challenges.pagination import InvalidCursor, apaginate
+from challenges.reservations import OutOfStock, reserve
+
+from .a_laptops import LAPTOP_JSON, LAPTOP_PAGE_KEYS, brand_inventory, in_stock_laptops, inventory_reply, \
+    laptop_validators, laptops_by_brand, latest_laptops, parse_laptop_filter, parse_order_lines, parse_search_request, \
+    reservation_reply
+from .utils import STREAM_CHUNK_SIZE, astream_json_object, wants_stream
+
+
+@query_budget(2)
+@cache_response(Laptop)
+@conditional_get(laptop_validators)
+async def laptop_details_async_view(request: HttpRequest, laptop_id: int) -> JsonResponse | HttpResponse:
+    try:
+        laptop = LAPTOP_JSON.encode(await LAPTOP_JSON.values(Laptop.objects.all()).aget(id=laptop_id))
+    except Laptop.DoesNotExist:
+        return HttpResponseNotFound(f'There is no record with id {laptop_id}')
+    with timed("encode"):
+        return JsonResponse(laptop)
+
+
+@query_budget(1)
+async def laptop_in_stock_list_async_view(request: HttpRequest) -> JsonResponse | HttpResponse:
+    laptops = in_stock_laptops()
+    if wants_stream(request.GET):
+        return astream_json_object((laptop['id'], laptop)
+                                   async for laptop in LAPTOP_JSON.aiterate(laptops, STREAM_CHUNK_SIZE))
+    snapshot = get_laptop_snapshot()
+    if snapshot is not None:
+        rows = await sync_to_async(snapshot.in_stock)()
+    else:
+        rows = await LAPTOP_JSON.aserialize(laptops)
+    with timed("encode"):
+        return JsonResponse({laptop['id']: laptop for laptop in rows})
+
+
+@query_budget(1)
+async def laptop_filter_async_view(request: HttpRequest) -> JsonResponse | HttpResponse:
+    params = parse_laptop_filter(request)
+    if isinstance(params, HttpResponse):
+        return params
+    brand, query_min_price, cursor, limit = params
+
+    snapshot = get_laptop_snapshot()
+    try:
+        if snapshot is not None:
+            page = await sync_to_async(snapshot.filter_page)(brand, query_min_price, cursor, limit)
+        else:
+            page = await apaginate(laptops_by_brand(brand, query_min_price), LAPTOP_PAGE_KEYS, LAPTOP_JSON, cursor,
+                                   limit)
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+
+    with timed("encode"):
+        return JsonResponse({'laptops': page.items, 'next': page.next_cursor})
+
+
+@query_budget(1)
+@cache_response(Laptop)
+async def last_laptop_details_async_view(request: HttpRequest) -> JsonResponse | HttpResponse:
+    snapshot = get_laptop_snapshot()
+    if snapshot is not None:
+        last_laptop = await sync_to_async(snapshot.latest)()
+    else:
+        last_laptop = await LAPTOP_JSON.aone(latest_laptops())
+    if last_laptop is None:
+        return HttpResponseNotFound('No db entries found')
+    with timed("encode"):
+        return JsonResponse({'latest_laptop': last_laptop})
+
+
+@query_budget(1)
+@cache_response(Laptop)
+async def laptop_inventory_async_view(request: HttpRequest) -> JsonResponse:
+    rows = await sync_to_async(list)(brand_inventory())
+    with timed("encode"):
+        return inventory_reply(rows)
+
+
+@query_budget(2)
+@cache_response(Laptop)
+async def laptop_search_async_view(request: HttpRequest) -> JsonResponse | HttpResponse:
+    params = parse_search_request(request)
+    if isinstance(params, HttpResponse):
+        return params
+    search, cursor, limit = params
+
+    try:
+        page = await apaginate(search.queryset(), LAPTOP_PAGE_KEYS, LAPTOP_JSON, cursor, limit)
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+    total, facets = await sync_to_async(facet_counts)(search)
+
+    with timed("encode"):
+        return JsonResponse({'total': total, 'facets': facets, 'laptops': page.items, 'next': page.next_cursor})
+
+
+@query_budget(8)
+async def laptop_reserve_async_view(request: HttpRequest) -> JsonResponse | HttpResponse:
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    lines = parse_order_lines(request)
+    if isinstance(lines, str):
+        return HttpResponseBadRequest(lines)
+    try:
+        remaining = await sync_to_async(reserve)(lines)
+    except OutOfStock as e:
+        return reservation_reply(lines, e)
+    return reservation_reply(lines, remaining)
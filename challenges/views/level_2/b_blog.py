@@ -9,68 +9,174 @@
 - реализовать у модели метод to_json, который будет преобразовывать объект книги в json-сериализуемый словарь
 - по очереди реализовать каждую из вьюх в этом файле, проверяя правильность их работу в браузере
 """
-import random
-import lorem  # type: ignore
 from datetime import datetime, timedelta
+from typing import Any, Iterator
 
 from django.http import HttpRequest, HttpResponse, JsonResponse, HttpResponseBadRequest, HttpResponseNotFound, HttpResponseServerError
+from challenges.archive import post_model, reaches_archive, wants_archive
+from challenges.cache import cache_response
+from challenges.conditional import Validators, conditional_get, list_validators
+from challenges.feed import latest_published, published_feed
+from challenges.histogram import publication_histogram
+from challenges.instrumentation import query_budget, timed
 from challenges.models import LoremCategory, Post, PostStatus
-from django.db.models import Q
+from challenges.pagination import InvalidCursor, decode_cursor, encode_cursor, parse_page_params
+from challenges.search import search_posts
+from challenges.seeding import generate_rows, seed
+from challenges.writebehind import PostWriter, QueueFull, get_post_writer, write_behind_settings
+from django.db.models import Model, Q, QuerySet
 from django.utils import timezone
 
-from .utils import extract_request_body, make_reply, lorem_word, random_date
+from .utils import POST_JSON, STREAM_CHUNK_SIZE, extract_request_body, make_page_reply, make_reply, \
+    make_streaming_reply, page_validators, stream_json_object, wants_stream
 
 
-def create_posts_view(request: HttpRequest) -> HttpResponse:
+# the list helpers read the hot Post table, or PostWithArchive for requests that need archived posts
+# (challenges.archive): archive=1, or a date range reaching past the archive horizon
+
+def published_posts(model: type[Model] = Post) -> QuerySet:
+    return model.objects.filter(status=PostStatus.published.value)
+
+
+def untagged_posts(model: type[Model] = Post) -> QuerySet:
+    return model.objects.filter(category=None).order_by('author', 'created_at')
+
+
+def posts_in_categories(categories: list[str], model: type[Model] = Post) -> QuerySet:
+    return model.objects.filter(category__in=categories).order_by('author', 'created_at')
+
+
+def posts_published_since(since: datetime, model: type[Model] = Post) -> QuerySet:
+    return model.objects.filter(Q(published_at__gt=since) & Q(status=PostStatus.published.value)).order_by('author', 'created_at')
+
+
+def listed_posts_model(request_body: Any, since: datetime | None = None) -> type[Model]:
+    return post_model(wants_archive(request_body) or (since is not None and reaches_archive(since)))
+
+
+CREATED_POSTS = 20
+
+
+def generated_posts(count: int) -> list[Post]:
+    posts = [Post(**row) for row in generate_rows("posts", count, None)]
+    for post in posts:
+        post.full_clean(validate_unique=False)
+    return posts
+
+
+def queue_posts(request: HttpRequest, writer: PostWriter) -> HttpResponse:
+    """
+    Hand generated posts to the write-behind queue (challenges.writebehind). With wait=1 (the default unless
+    CHALLENGES_POST_WRITE_BEHIND['WAIT'] is off) the reply waits until they are committed, otherwise it is 202.
+    """
+    options = write_behind_settings()
+    wait = request.GET.get('wait', '1' if options['WAIT'] else '0').lower() in ('1', 'true', 'yes')
     try:
-        for _ in range(20):
-            created_at = random_date()
-            status = random.choice([status.name for status in PostStatus])
-            if status == PostStatus.unpublished.value:
-                published_at = None
-            else:
-                published_at = random_date(created_at)
-            post = Post(
-                title=lorem.sentence(),
-                content=lorem.paragraph(),
-                author=lorem_word(),
-                status=status,
-                created_at=created_at,
-                published_at=published_at,
-                category=random.choice([category.value for category in LoremCategory]))
-            post.save()
+        ticket = writer.submit(generated_posts(CREATED_POSTS))
+        if wait and ticket.wait(options['WAIT_TIMEOUT']):
+            return HttpResponse("Posts were created successfully", status=200)
+    except QueueFull as e:
+        response = HttpResponse(f"Too many posts waiting to be written ({e}), try again later", status=503)
+        response['Retry-After'] = '1'
+        return response
+    except Exception as e:
+        return HttpResponseServerError(str(e))
+    return HttpResponse("Posts were queued for creation", status=202)
+
 
+@query_budget(2)  # BEGIN + one multi-row INSERT
+def create_posts_view(request: HttpRequest) -> HttpResponse:
+    writer = get_post_writer()
+    if writer is not None:
+        return queue_posts(request, writer)
+    try:
+        seed("posts", CREATED_POSTS)
         return HttpResponse("Posts were created successfully", status=200)
 
     except Exception as e:
         return HttpResponseServerError(str(e))
 
 
+def latest_posts_validators(request: HttpRequest) -> Validators:
+    # the hot feed also validates replies filled from the archive: archiving changes the hot rows
+    return list_validators(published_feed(listed_posts_model(request.GET))[:3])
+
+
+@query_budget(3)  # validators + the posts, again with the archive when the hot ones reach past its horizon
+@cache_response(Post)
+@conditional_get(latest_posts_validators)
 def last_posts_list_view(request: HttpRequest) -> HttpResponse | JsonResponse:
 
     """
     В этой вьюхе вам нужно вернуть 3 последних опубликованных поста.
     """
-    posts = Post.objects.all().filter(status=PostStatus.published.value).order_by('published_at')
+    # newest three from the feed (challenges.feed), back in ascending order
+    posts = latest_published(3, wants_archive(request.GET))[::-1]
+    return latest_posts_reply(posts)
+
+
+MAX_FEED_SIZE = 100
+
+
+def parse_feed_size(request: HttpRequest) -> int | HttpResponse:
+    try:
+        n = int(request.GET.get('n', 10))
+    except ValueError:
+        return HttpResponseBadRequest('n should be an integer')
+    if not 0 < n <= MAX_FEED_SIZE:
+        return HttpResponseBadRequest(f'n should be between 1 and {MAX_FEED_SIZE}')
+    return n
+
+
+def feed_validators(request: HttpRequest) -> Validators | None:
+    n = parse_feed_size(request)
+    return None if isinstance(n, HttpResponse) else list_validators(published_feed(listed_posts_model(request.GET))[:n])
+
+
+def latest_posts_reply(posts: list[dict]) -> HttpResponse:
     posts_len = len(posts)
     if posts_len == 0:
         return HttpResponseNotFound('Your request resulted in no results')
-    elif posts_len == 1:
-        response = {'last published post': [post.to_json() for post in posts]}
-    elif posts_len == 2:
-        response = {'last 2 published posts': [post.to_json() for post in posts]}
-    else:
-        response = {'last 3 published posts': [post.to_json() for post in posts[-3:]]}
-    return JsonResponse(response)
+    with timed("encode"):
+        if posts_len == 1:
+            response = {'last published post': posts}
+        elif posts_len == 2:
+            response = {'last 2 published posts': posts}
+        else:
+            response = {'last 3 published posts': posts}
+        return JsonResponse(response)
 
 
-def posts_search_view(request: HttpRequest) -> HttpResponse | JsonResponse:
+@query_budget(3)  # validators + the posts, again with the archive when the hot ones reach past its horizon
+@cache_response(Post)
+@conditional_get(feed_validators)
+def posts_feed_view(request: HttpRequest) -> HttpResponse | JsonResponse:
     """
-    В этой вьюхе вам нужно вернуть все посты, которые подходят под поисковый запрос.
-    Сам запрос возьмите из get-параметра query.
-    Подходящесть поста можете определять по вхождению запроса в название или текст поста, например.
+    Latest n (?n=, up to MAX_FEED_SIZE, default 10) published posts, newest first; archive=1 includes archived posts.
     """
+    n = parse_feed_size(request)
+    if isinstance(n, HttpResponse):
+        return n
+    posts = latest_published(n, wants_archive(request.GET))
+    with timed("encode"):
+        return JsonResponse({'posts': posts})
+
+
+def iter_ranked_posts(post_ids: list[int], chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[tuple[int, dict]]:
+    for start in range(0, len(post_ids), chunk_size):
+        chunk = post_ids[start:start + chunk_size]
+        posts = POST_JSON.in_bulk(chunk)
+        yield from ((post_id, posts[post_id]) for post_id in chunk if post_id in posts)
+
+
+SearchParams = tuple[list[str], bool, bool, tuple[float, int] | None, int]
+
 
+def parse_search(request: HttpRequest) -> SearchParams | HttpResponse:
+    """
+    Query words, strictness, stream flag, (score, id) to continue after and page size of the search view,
+    or the error response for invalid ones.
+    """
     request_body = extract_request_body(request)
     if isinstance(request_body, str):
         return HttpResponseBadRequest(request_body)
@@ -80,56 +186,102 @@ def posts_search_view(request: HttpRequest) -> HttpResponse | JsonResponse:
     if query_request is None or query_request == "":
         return HttpResponseBadRequest("'query' as required parameter is missing or query is empty")
 
+    if wants_archive(request_body):
+        # the FTS indexes cover the hot table only: refuse rather than return results without the archived posts
+        return HttpResponseBadRequest("search does not cover archived posts, 'archive' is not supported here")
+
     query_words = [query.strip() for query in query_request.split(",")]
     search_behavior = request_body.get("behavior", None)
 
-    try:
-        query_results = Post.objects.all()
-        iterated_query = Post.objects.none()
+    if search_behavior not in (None, 'loose', 'strict'):
+        return HttpResponseBadRequest('please specify search behavior - "behavior" key should be either "strict" or "loose"')
 
-        for word in query_words:
+    strict = search_behavior == 'strict'
 
-            if search_behavior is None or search_behavior == 'loose':
-                iterated_query |= query_results.filter(Q(title__icontains=word) | Q(content__icontains=word))
+    if wants_stream(request_body):
+        return query_words, strict, True, None, 0
 
-            elif search_behavior == 'strict':
-                word = r'\b' + word + r'\b'
-                iterated_query |= query_results.filter(Q(title__iregex=word) | Q(content__iregex=word))
+    page_params = parse_page_params(request_body)
+    if isinstance(page_params, str):
+        return HttpResponseBadRequest(page_params)
+    cursor, limit = page_params
 
-            else:
-                return HttpResponseBadRequest('please specify search behavior - "behavior" key should be either "strict" or "loose"')
+    after = None
+    if cursor:
+        try:
+            score, post_id = decode_cursor(cursor, 2)
+            after = (float(score), int(post_id))
+        except (InvalidCursor, TypeError, ValueError):
+            return HttpResponseBadRequest('cursor does not match this listing')
+    return query_words, strict, False, after, limit
 
-        query_results = iterated_query.order_by('created_at')
 
-        if not query_results.exists():
+def ranked_page(ranked: list[tuple[int, float]], limit: int) -> tuple[list[int], str | None]:
+    """
+    Ids of one page of search results (fetched with limit + 1 rows) and the cursor of the next page.
+    """
+    next_cursor = None
+    if len(ranked) > limit:
+        ranked = ranked[:limit]
+        last_id, last_score = ranked[-1]
+        next_cursor = encode_cursor([last_score, last_id])
+    return [post_id for post_id, _ in ranked], next_cursor
+
+
+@query_budget(2)
+def posts_search_view(request: HttpRequest) -> HttpResponse | JsonResponse:
+    """
+    В этой вьюхе вам нужно вернуть все посты, которые подходят под поисковый запрос.
+    Сам запрос возьмите из get-параметра query.
+    Подходящесть поста можете определять по вхождению запроса в название или текст поста, например.
+    """
+    params = parse_search(request)
+    if isinstance(params, HttpResponse):
+        return params
+    query_words, strict, stream, after, limit = params
+
+    if stream:
+        post_ids = [post_id for post_id, _ in search_posts(query_words, strict=strict)]
+        if not post_ids:
             return HttpResponseNotFound('Your request resulted in no results')
+        return stream_json_object(iter_ranked_posts(post_ids), f'search results - {len(post_ids)} posts found')
 
-        else:
-            response = make_reply(query_results)
-            return JsonResponse(response)
+    # results are ordered by relevance, most relevant first; one extra row tells whether there is a next page
+    ranked = search_posts(query_words, strict=strict, after=after, limit=limit + 1)
 
-    except Post.DoesNotExist:
-        return HttpResponseBadRequest()
+    if not ranked:
+        return HttpResponseNotFound('Your request resulted in no results')
+
+    post_ids, next_cursor = ranked_page(ranked, limit)
+    posts = POST_JSON.in_bulk(post_ids)
+    with timed("encode"):
+        response = make_reply([posts[post_id] for post_id in post_ids if post_id in posts], next_cursor)
+        return JsonResponse(response)
 
 
+def untagged_validators(request: HttpRequest) -> Validators | None:
+    return page_validators(untagged_posts(listed_posts_model(request.GET)), request.GET)
+
+
+@query_budget(2)  # validators + the page, or count + rows when streamed
+@conditional_get(untagged_validators)
 def untagged_posts_list_view(request: HttpRequest) -> JsonResponse | HttpResponse:
     """
     В этой вьюхе вам нужно вернуть все посты без категории, отсортируйте их по автору и дате создания.
     """
     try:
-        posts = Post.objects.filter(category=None).order_by('author', 'created_at')
-        response = make_reply(posts)
-        return JsonResponse(response)
+        posts = untagged_posts(listed_posts_model(request.GET))
+        if wants_stream(request.GET):
+            return make_streaming_reply(posts)
+        return make_page_reply(posts, request.GET)
     except Post.DoesNotExist:
         return HttpResponseNotFound('Your request resulted in no results')
 
 
-def categories_posts_list_view(request: HttpRequest) -> HttpResponse:
+def parse_categories(request: HttpRequest) -> tuple[list[str], Any] | HttpResponse:
     """
-    В этой вьюхе вам нужно вернуть все посты все посты, категория которых принадлежит одной из указанных.
-    Возьмите get-параметр categories, в нём разделённый запятой список выбранных категорий.
+    Requested categories and the request parameters of the categories view, or the error response.
     """
-
     request_body = extract_request_body(request)
     if isinstance(request_body, str):
         return HttpResponseBadRequest(request_body)
@@ -145,20 +297,42 @@ def categories_posts_list_view(request: HttpRequest) -> HttpResponse:
 
     if checked_categories == []:
         return HttpResponseBadRequest('No valid category proivided - you shall choose from available options: '
-                                      + " ".join([name.value for name in LoremCategory]))
+                                      + " ".join([name.value for name in LoremCategory if name.value is not None]))
+    return categories, request_body
+
+
+def categories_validators(request: HttpRequest) -> Validators | None:
+    params = parse_categories(request)
+    if isinstance(params, HttpResponse):
+        return None
+    categories, request_body = params
+    return page_validators(posts_in_categories(categories, listed_posts_model(request_body)), request_body)
+
+
+@query_budget(2)
+@conditional_get(categories_validators)
+def categories_posts_list_view(request: HttpRequest) -> HttpResponse:
+    """
+    В этой вьюхе вам нужно вернуть все посты все посты, категория которых принадлежит одной из указанных.
+    Возьмите get-параметр categories, в нём разделённый запятой список выбранных категорий.
+    """
+    params = parse_categories(request)
+    if isinstance(params, HttpResponse):
+        return params
+    categories, request_body = params
 
     try:
-        posts = Post.objects.filter(category__in=categories).order_by('author', 'created_at')
-        reply = make_reply(posts)
-        return JsonResponse(reply)
+        posts = posts_in_categories(categories, listed_posts_model(request_body))
+        if wants_stream(request_body):
+            return make_streaming_reply(posts)
+        return make_page_reply(posts, request_body)
     except Post.DoesNotExist:
         return HttpResponseNotFound('Your request resulted in no results')
 
 
-def last_days_posts_list_view(request: HttpRequest) -> HttpResponse | JsonResponse:
+def parse_last_days(request: HttpRequest) -> tuple[datetime, Any] | HttpResponse:
     """
-    В этой вьюхе вам нужно вернуть посты, опубликованные за последние last_days дней.
-    Значение last_days возьмите из соответствующего get-параметра.
+    Start of the requested period and the request parameters of the last days view, or the error response.
     """
     request_body = extract_request_body(request)
     if isinstance(request_body, str):
@@ -178,10 +352,60 @@ def last_days_posts_list_view(request: HttpRequest) -> HttpResponse | JsonRespon
 
     query_date = datetime.now() - timedelta(days=last_days)
     query_date = timezone.make_aware(query_date)
+    return query_date, request_body
+
+
+def last_days_validators(request: HttpRequest) -> Validators | None:
+    params = parse_last_days(request)
+    if isinstance(params, HttpResponse):
+        return None
+    query_date, request_body = params
+    posts = posts_published_since(query_date, listed_posts_model(request_body, query_date))
+    return page_validators(posts, request_body)
+
+
+@query_budget(2)
+@conditional_get(last_days_validators)
+def last_days_posts_list_view(request: HttpRequest) -> HttpResponse | JsonResponse:
+    """
+    В этой вьюхе вам нужно вернуть посты, опубликованные за последние last_days дней.
+    Значение last_days возьмите из соответствующего get-параметра.
+    """
+    params = parse_last_days(request)
+    if isinstance(params, HttpResponse):
+        return params
+    query_date, request_body = params
 
     try:
-        posts = Post.objects.filter(Q(published_at__gt=query_date) & Q(status=PostStatus.published.value)).order_by('author', 'created_at')
-        reply = make_reply(posts)
-        return JsonResponse(reply)
+        posts = posts_published_since(query_date, listed_posts_model(request_body, query_date))
+        if wants_stream(request_body):
+            return make_streaming_reply(posts)
+        return make_page_reply(posts, request_body)
     except Post.DoesNotExist:
         return HttpResponseNotFound('Your request resulted in no results')
+
+
+MAX_HISTOGRAM_DAYS = 3650
+
+
+def parse_histogram_days(request: HttpRequest) -> int | HttpResponse:
+    try:
+        days = int(request.GET.get('last_days', 30))
+    except ValueError:
+        return HttpResponseBadRequest("'last_days' should be an integer")
+    if not 0 < days <= MAX_HISTOGRAM_DAYS:
+        return HttpResponseBadRequest(f"'last_days' should be between 1 and {MAX_HISTOGRAM_DAYS}")
+    return days
+
+
+@query_budget(2)  # today + the days missing from the day cache
+def posts_histogram_view(request: HttpRequest) -> HttpResponse | JsonResponse:
+    """
+    Number of posts per publication day, category and status over the last_days days (today included).
+    """
+    days = parse_histogram_days(request)
+    if isinstance(days, HttpResponse):
+        return days
+    buckets = publication_histogram(days)
+    with timed("encode"):
+        return JsonResponse({'last_days': days, 'buckets': buckets})
@@ -0,0 +1,138 @@
+"""
+Async versions of the blog views, served under async/. Full-text search and seeding have no async ORM
+counterpart and run through sync_to_async, in the thread ASGIHandler keeps for the request.
+"""
+from typing import AsyncIterator
+
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest, HttpResponse, HttpResponseNotFound, HttpResponseServerError, JsonResponse
+
+from challenges.archive import wants_archive
+from challenges.cache import cache_response
+from challenges.conditional import conditional_get
+from challenges.feed import latest_published
+from challenges.histogram import publication_histogram
+from challenges.instrumentation import query_budget, timed
+from challenges.models import Post
+from challenges.search import search_posts
+from challenges.seeding import seed
+from challenges.writebehind import get_post_writer
+
+from .b_blog import CREATED_POSTS, categories_validators, feed_validators, last_days_validators, latest_posts_reply, \
+    latest_posts_validators, listed_posts_model, parse_categories, parse_feed_size, parse_histogram_days, \
+    parse_last_days, parse_search, posts_in_categories, posts_published_since, queue_posts, ranked_page, \
+    untagged_posts, untagged_validators
+from .utils import POST_JSON, STREAM_CHUNK_SIZE, amake_page_reply, amake_streaming_reply, astream_json_object, \
+    make_reply, wants_stream
+
+
+@query_budget(2)
+async def create_posts_async_view(request: HttpRequest) -> HttpResponse:
+    writer = get_post_writer()
+    if writer is not None:
+        # waits for the commit in a thread of its own, the shared sync thread stays free for other requests
+        return await sync_to_async(queue_posts, thread_sensitive=False)(request, writer)
+    try:
+        await sync_to_async(seed)("posts", CREATED_POSTS)
+        return HttpResponse("Posts were created successfully", status=200)
+    except Exception as e:
+        return HttpResponseServerError(str(e))
+
+
+@query_budget(3)
+@cache_response(Post)
+@conditional_get(latest_posts_validators)
+async def last_posts_list_async_view(request: HttpRequest) -> HttpResponse | JsonResponse:
+    posts = await sync_to_async(latest_published)(3, wants_archive(request.GET))
+    return latest_posts_reply(posts[::-1])
+
+
+@query_budget(3)
+@cache_response(Post)
+@conditional_get(feed_validators)
+async def posts_feed_async_view(request: HttpRequest) -> HttpResponse | JsonResponse:
+    n = parse_feed_size(request)
+    if isinstance(n, HttpResponse):
+        return n
+    posts = await sync_to_async(latest_published)(n, wants_archive(request.GET))
+    with timed("encode"):
+        return JsonResponse({'posts': posts})
+
+
+async def aiter_ranked_posts(post_ids: list[int], chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[tuple[int, dict]]:
+    for start in range(0, len(post_ids), chunk_size):
+        chunk = post_ids[start:start + chunk_size]
+        posts = await sync_to_async(POST_JSON.in_bulk)(chunk)
+        for post_id in chunk:
+            if post_id in posts:
+                yield post_id, posts[post_id]
+
+
+@query_budget(2)
+async def posts_search_async_view(request: HttpRequest) -> HttpResponse | JsonResponse:
+    params = parse_search(request)
+    if isinstance(params, HttpResponse):
+        return params
+    query_words, strict, stream, after, limit = params
+
+    if stream:
+        post_ids = [post_id for post_id, _ in await sync_to_async(search_posts)(query_words, strict=strict)]
+        if not post_ids:
+            return HttpResponseNotFound('Your request resulted in no results')
+        return astream_json_object(aiter_ranked_posts(post_ids), f'search results - {len(post_ids)} posts found')
+
+    ranked = await sync_to_async(search_posts)(query_words, strict=strict, after=after, limit=limit + 1)
+    if not ranked:
+        return HttpResponseNotFound('Your request resulted in no results')
+
+    post_ids, next_cursor = ranked_page(ranked, limit)
+    posts = await sync_to_async(POST_JSON.in_bulk)(post_ids)
+    with timed("encode"):
+        return JsonResponse(make_reply([posts[post_id] for post_id in post_ids if post_id in posts], next_cursor))
+
+
+@query_budget(2)
+@conditional_get(untagged_validators)
+async def untagged_posts_list_async_view(request: HttpRequest) -> JsonResponse | HttpResponse:
+    posts = untagged_posts(listed_posts_model(request.GET))
+    if wants_stream(request.GET):
+        return await amake_streaming_reply(posts)
+    return await amake_page_reply(posts, request.GET)
+
+
+@query_budget(2)
+@conditional_get(categories_validators)
+async def categories_posts_list_async_view(request: HttpRequest) -> HttpResponse:
+    params = parse_categories(request)
+    if isinstance(params, HttpResponse):
+        return params
+    categories, request_body = params
+
+    posts = posts_in_categories(categories, listed_posts_model(request_body))
+    if wants_stream(request_body):
+        return await amake_streaming_reply(posts)
+    return await amake_page_reply(posts, request_body)
+
+
+@query_budget(2)
+@conditional_get(last_days_validators)
+async def last_days_posts_list_async_view(request: HttpRequest) -> HttpResponse | JsonResponse:
+    params = parse_last_days(request)
+    if isinstance(params, HttpResponse):
+        return params
+    query_date, request_body = params
+
+    posts = posts_published_since(query_date, listed_posts_model(request_body, query_date))
+    if wants_stream(request_body):
+        return await amake_streaming_reply(posts)
+    return await amake_page_reply(posts, request_body)
+
+
+@query_budget(2)
+async def posts_histogram_async_view(request: HttpRequest) -> HttpResponse | JsonResponse:
+    days = parse_histogram_days(request)
+    if isinstance(days, HttpResponse):
+        return days
+    buckets = await sync_to_async(publication_histogram)(days)
+    with timed("encode"):
+        return JsonResponse({'last_days': days, 'buckets': buckets})
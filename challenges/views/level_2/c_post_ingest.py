@@ -0,0 +1,84 @@
+"""
+Bulk post upload:
+
+    POST /posts/ingest/   application/x-ndjson, one post per line:
+    {"title": ..., "content": ..., "author": ..., "created_at": "2024-01-01T10:00:00Z",
+     "status": "published", "published_at": ..., "category": "modi"}
+
+The body is read and validated in chunks (challenges.ingest) and the valid rows of every chunk are inserted with
+bulk_create, all in one transaction. Invalid rows are skipped and reported by line number:
+
+    {"created": 998, "rejected": 2, "errors": [{"line": 7, "errors": {"status": ["draft is not a valid status"]}}]}
+"""
+import json
+import math
+from itertools import islice
+from typing import Any, Iterator
+
+from django.core.exceptions import NON_FIELD_ERRORS
+from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse
+
+from challenges.ingest import validate_posts
+from challenges.instrumentation import query_budget
+from challenges.models import Post
+from challenges.signals import models_changed
+from challenges.sqlite import write_atomic
+
+INGEST_CHUNK_ROWS = 1000
+MAX_INGEST_ROWS = 10_000
+# Django's SQLite bulk_create batch under the 999 parameter limit: every column but id, updated_at included
+POSTS_PER_INSERT = 999 // (len(Post._meta.concrete_fields) - 1)
+INVALID_JSON = object()
+
+
+class TooManyRows(Exception):
+    pass
+
+
+def iter_lines(request: HttpRequest) -> Iterator[tuple[int, bytes]]:
+    # the request is a file-like object: lines are read as they are consumed, not as one body
+    for number, line in enumerate(request, start=1):
+        if line.strip():
+            yield number, line
+
+
+def parse_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return INVALID_JSON
+
+
+def ingest_posts(lines: Iterator[tuple[int, bytes]]) -> tuple[int, list[dict[str, Any]]]:
+    created = 0
+    rows_seen = 0
+    report = []
+    with write_atomic():
+        while chunk := list(islice(lines, INGEST_CHUNK_ROWS)):
+            rows_seen += len(chunk)
+            if rows_seen > MAX_INGEST_ROWS:
+                raise TooManyRows
+            rows = [parse_line(line) for _, line in chunk]
+            valid, errors = validate_posts(rows)
+            for index, row in enumerate(rows):
+                if row is INVALID_JSON:
+                    errors[index] = {NON_FIELD_ERRORS: ["invalid JSON"]}
+            report.extend({"line": chunk[index][0], "errors": errors[index]} for index in sorted(errors))
+            if valid:
+                created += len(Post.objects.bulk_create([post for _, post in valid]))
+    return created, report
+
+
+@query_budget(1 + math.ceil(MAX_INGEST_ROWS / POSTS_PER_INSERT))  # BEGIN + the multi-row INSERTs
+def ingest_posts_view(request: HttpRequest) -> HttpResponse:
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    try:
+        created, report = ingest_posts(iter_lines(request))
+    except TooManyRows:
+        return HttpResponseBadRequest(f"at most {MAX_INGEST_ROWS} posts per upload, nothing was created")
+    if not created and not report:
+        return HttpResponseBadRequest("request body should hold one JSON object per line")
+    if created:
+        models_changed.send(sender=Post)
+    return JsonResponse({"created": created, "rejected": len(report), "errors": report})
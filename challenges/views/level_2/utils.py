@@ -1,10 +1,21 @@
-from typing import Any
-import random
-from datetime import datetime, timedelta
-import lorem  # type: ignore
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, Sequence
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db.models.query import QuerySet
-from django.http import HttpRequest
+from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+
+from challenges.conditional import Validators, list_validators
+from challenges.instrumentation import timed
+from challenges.models import Post
+from challenges.pagination import InvalidCursor, Page, apaginate, page_queryset, paginate, parse_page_params
+from challenges.serializers import serializer_for
+
+STREAM_CHUNK_SIZE = 2000  # rows fetched from the database per round trip when streaming
+STREAM_BUFFER_SIZE = 64 * 1024  # bytes of encoded JSON collected before a chunk is sent
+
+POST_PAGE_KEYS = ['author', 'created_at', 'id']  # post list views are ordered by author and creation date
+
+POST_JSON = serializer_for(Post)
 
 
 def extract_request_body(request: HttpRequest) -> dict[str, str] | str:
@@ -16,20 +27,137 @@ def extract_request_body(request: HttpRequest) -> dict[str, str] | str:
         return 'incorrect request method'
 
 
-def make_reply(query_results: QuerySet) -> dict[str, dict[int, dict[str, Any]]]:
-    posts_serialized = {post.id: post.to_json() for post in query_results}
-    return {f'search results - {len(query_results)} posts found': posts_serialized}
+def wants_stream(request_body: Any) -> bool:
+    return request_body.get("stream", "").lower() in ("1", "true", "yes")
+
+
+def make_reply(posts_json: Sequence[dict[str, Any]], next_cursor: str | None = None) -> dict[str, Any]:
+    # one page of the results: counting every match would cost a query the keyset pagination avoids, so the key
+    # gives the page size and does not claim a total (streamed replies, which read every match, still do)
+    posts_serialized = {post['id']: post for post in posts_json}
+    return {f'search results - {len(posts_json)} posts on this page': posts_serialized, 'next': next_cursor}
+
+
+def make_page_reply(query_results: QuerySet, request_body: Any, keys: Sequence[str] = POST_PAGE_KEYS) -> HttpResponse:
+    """
+    Reply with one keyset-paginated page of posts; the 'next' key holds the cursor of the following page.
+    """
+    page_params = parse_page_params(request_body)
+    if isinstance(page_params, str):
+        return HttpResponseBadRequest(page_params)
+    cursor, limit = page_params
+    try:
+        page = paginate(query_results, keys, cursor, limit, serializer=POST_JSON)
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+    return page_reply(page)
+
+
+def page_validators(query_results: QuerySet, request_body: Any, keys: Sequence[str] = POST_PAGE_KEYS) -> Validators | None:
+    """
+    Validators of the page make_page_reply() sends, None for streamed replies and invalid page parameters.
+    """
+    if wants_stream(request_body):
+        return None
+    page_params = parse_page_params(request_body)
+    if isinstance(page_params, str):
+        return None
+    cursor, limit = page_params
+    try:
+        return list_validators(page_queryset(query_results, keys, cursor, limit))
+    except InvalidCursor:
+        return None
+
+
+async def amake_page_reply(query_results: QuerySet, request_body: Any,
+                           keys: Sequence[str] = POST_PAGE_KEYS) -> HttpResponse:
+    page_params = parse_page_params(request_body)
+    if isinstance(page_params, str):
+        return HttpResponseBadRequest(page_params)
+    cursor, limit = page_params
+    try:
+        page = await apaginate(query_results, keys, POST_JSON, cursor, limit)
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+    return page_reply(page)
+
+
+def page_reply(page: Page) -> JsonResponse:
+    with timed("encode"):
+        return JsonResponse(make_reply(page.items, page.next_cursor))
+
+
+class JsonObjectChunks:
+    """
+    Incremental encoder of one JSON object, in the same format JsonResponse produces. add() returns a chunk
+    whenever STREAM_BUFFER_SIZE bytes are buffered, close() the rest. With wrap_key the object is nested as
+    {wrap_key: {...}}.
+    """
+
+    def __init__(self, wrap_key: str | None = None) -> None:
+        self.encoder = DjangoJSONEncoder()
+        self.wrap_key = wrap_key
+        self.buffer = ["{" + self.encoder.encode(wrap_key) + ": {" if wrap_key is not None else "{"]
+        self.buffered = 0
+        self.separator = ""
+
+    def add(self, key: Any, value: Any) -> bytes | None:
+        piece = self.separator + self.encoder.encode(str(key)) + ": " + self.encoder.encode(value)
+        self.buffer.append(piece)
+        self.buffered += len(piece)
+        self.separator = ", "
+        if self.buffered < STREAM_BUFFER_SIZE:
+            return None
+        chunk = "".join(self.buffer).encode()
+        self.buffer, self.buffered = [], 0
+        return chunk
+
+    def close(self) -> bytes:
+        self.buffer.append("}}" if self.wrap_key is not None else "}")
+        return "".join(self.buffer).encode()
+
+
+def iter_json_object(items: Iterable[tuple[Any, Any]], wrap_key: str | None = None) -> Iterator[bytes]:
+    chunks = JsonObjectChunks(wrap_key)
+    for key, value in items:
+        chunk = chunks.add(key, value)
+        if chunk is not None:
+            yield chunk
+    yield chunks.close()
+
+
+async def aiter_json_object(items: AsyncIterable[tuple[Any, Any]], wrap_key: str | None = None) -> AsyncIterator[bytes]:
+    chunks = JsonObjectChunks(wrap_key)
+    async for key, value in items:
+        chunk = chunks.add(key, value)
+        if chunk is not None:
+            yield chunk
+    yield chunks.close()
+
+
+def stream_json_object(items: Iterable[tuple[Any, Any]], wrap_key: str | None = None) -> StreamingHttpResponse:
+    return StreamingHttpResponse(iter_json_object(items, wrap_key), content_type="application/json")
+
+
+def astream_json_object(items: AsyncIterable[tuple[Any, Any]], wrap_key: str | None = None) -> StreamingHttpResponse:
+    return StreamingHttpResponse(aiter_json_object(items, wrap_key), content_type="application/json")
+
 
+def make_streaming_reply(query_results: QuerySet, count: int | None = None,
+                         chunk_size: int = STREAM_CHUNK_SIZE) -> StreamingHttpResponse:
+    """
+    Streaming counterpart of make_reply: rows are read with QuerySet.iterator() and encoded as they arrive,
+    so memory use does not depend on the number of matching posts.
+    """
+    if count is None:
+        count = query_results.count()
+    posts = ((post['id'], post) for post in POST_JSON.iterate(query_results, chunk_size=chunk_size))
+    return stream_json_object(posts, f'search results - {count} posts found')
 
-def lorem_word():
-    words = lorem.text().split(" ")
-    length = len(words)
-    choice = random.randint(0, length - 1)
-    return words[choice]
 
-def random_date(start=datetime.strptime('1/1/2018 1:30 PM', '%m/%d/%Y %I:%M %p')):
-    end = datetime.strptime('1/3/2024 4:50 AM', '%m/%d/%Y %I:%M %p')
-    delta = end - start
-    int_delta = (delta.days * 24 * 60) + (delta.seconds / 60)
-    random_minute = random.randrange(int_delta)
-    return start + timedelta(minutes=random_minute)
\ No newline at end of file
+async def amake_streaming_reply(query_results: QuerySet, count: int | None = None,
+                                chunk_size: int = STREAM_CHUNK_SIZE) -> StreamingHttpResponse:
+    if count is None:
+        count = await query_results.acount()
+    posts = ((post['id'], post) async for post in POST_JSON.aiterate(query_results, chunk_size=chunk_size))
+    return astream_json_object(posts, f'search results - {count} posts found')
@@ -0,0 +1,22 @@
+from django.http import HttpRequest, JsonResponse
+
+from challenges.cache import get_response_cache
+from challenges.instrumentation import query_budget
+from challenges.writebehind import get_post_writer
+
+
+@query_budget(0)
+def response_cache_stats_view(request: HttpRequest) -> JsonResponse:
+    """
+    Hit/miss counters of the response cache in this worker process.
+    """
+    return JsonResponse(get_response_cache().stats())
+
+
+@query_budget(0)
+def post_writer_stats_view(request: HttpRequest) -> JsonResponse:
+    """
+    Queue depth, batches and flush / commit latencies of the post write-behind queue in this worker process.
+    """
+    writer = get_post_writer()
+    return JsonResponse({"enabled": writer is not None, **(writer.stats() if writer is not None else {})})
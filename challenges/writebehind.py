@@ -0,0 +1,235 @@
+"""
+Write-behind (group commit) queue for post creation.
+
+With settings.CHALLENGES_POST_WRITE_BEHIND["ENABLED"] the post-creating views validate their posts and hand them
+to the process's PostWriter instead of inserting them. A background thread writes the queued posts with one
+bulk_create in one transaction per batch. It flushes once MAX_BATCH posts wait, or MAX_DELAY seconds after the
+oldest of them was queued. SQLite admits one writer at a time: direct inserts queue for the write lock one commit
+each (they wait busy_timeout for it, see challenges.sqlite.write_atomic), while queued posts share one commit per
+batch. bench_post_writes compares both: write-behind raises throughput and bounds the tail latency of the lock
+queue, at the price of a higher median latency: a request waits for its batch to fill or age, then to flush.
+
+    ticket = writer.submit(posts)   # queued, not written yet
+    ticket.wait(timeout)            # True once the batch holding the posts committed; raises its error
+
+A caller that replies without waiting trades durability for latency: posts still queued when the process dies
+are lost (at most MAX_QUEUE of them). The queue is bounded: submit() waits up to ENQUEUE_TIMEOUT seconds for room
+and then raises QueueFull, which the views answer with 503.
+
+stats() reports the queue depth, batches and posts written or failed, the flush latency (one bulk_create and
+commit) and the commit latency (queued to committed) over the last LATENCY_SAMPLES batches.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from .benchmarks import summarize
+from .models import Post
+from .signals import models_changed
+from .sqlite import write_atomic
+
+DEFAULT_SETTINGS = {"ENABLED": False, "MAX_BATCH": 500, "MAX_DELAY": 0.05, "MAX_QUEUE": 10_000,
+                    "ENQUEUE_TIMEOUT": 1.0, "WAIT": True, "WAIT_TIMEOUT": 5.0}
+LATENCY_SAMPLES = 1000
+
+logger = logging.getLogger("challenges.writebehind")
+
+
+def write_behind_settings() -> dict[str, Any]:
+    return {**DEFAULT_SETTINGS, **getattr(settings, "CHALLENGES_POST_WRITE_BEHIND", {})}
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Ticket:
+    """
+    Completion of one submit(): set when the batch holding its posts committed or failed.
+    """
+
+    def __init__(self) -> None:
+        self._done = threading.Event()
+        self.error: BaseException | None = None
+
+    def _finish(self, error: BaseException | None) -> None:
+        self.error = error
+        self._done.set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Wait until the posts are committed; False on timeout, the flush error is raised.
+        """
+        if not self._done.wait(timeout):
+            return False
+        if self.error is not None:
+            raise self.error
+        return True
+
+
+@dataclass
+class Submission:
+    posts: list[Post]
+    ticket: Ticket = field(default_factory=Ticket)
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+class PostWriter:
+    def __init__(self, max_batch: int, max_delay: float, max_queue: int, enqueue_timeout: float) -> None:
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_queue = max_queue
+        self.enqueue_timeout = enqueue_timeout
+        self._pending: deque[Submission] = deque()
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+
+        self.depth = 0  # posts queued, not yet taken by a flush
+        self.max_depth = 0
+        self.rejected = 0  # submissions refused with QueueFull
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+        self._flush_latency: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._commit_latency: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def start(self) -> None:
+        with self._condition:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="post-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """
+        Flush what is queued and stop the writer thread.
+        """
+        with self._condition:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._condition.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+
+    def submit(self, posts: list[Post]) -> Ticket:
+        """
+        Queue validated posts for the next batch. Waits up to enqueue_timeout for room in the queue, then raises
+        QueueFull; a submission larger than the whole queue is taken once the queue is empty.
+        """
+        submission = Submission(posts)
+        if not posts:
+            submission.ticket._finish(None)
+            return submission.ticket
+        self.start()
+        with self._condition:
+            has_room = self._condition.wait_for(
+                lambda: self.depth == 0 or self.depth + len(posts) <= self.max_queue, self.enqueue_timeout)
+            if not has_room:
+                self.rejected += 1
+                raise QueueFull(f"{self.depth} posts are waiting to be written")
+            submission.queued_at = time.monotonic()
+            self._pending.append(submission)
+            self.depth += len(posts)
+            self.max_depth = max(self.max_depth, self.depth)
+            self._condition.notify_all()
+        return submission.ticket
+
+    def _take_batch(self) -> list[Submission]:
+        # called holding the condition: wait for a full batch or the deadline of the oldest submission
+        while not self._pending and not self._stopping:
+            self._condition.wait()
+        while self._pending and self.depth < self.max_batch and not self._stopping:
+            remaining = self._pending[0].queued_at + self.max_delay - time.monotonic()
+            if remaining <= 0:
+                break
+            self._condition.wait(remaining)
+        batch: list[Submission] = []
+        size = 0
+        while self._pending and (not batch or size + len(self._pending[0].posts) <= self.max_batch):
+            submission = self._pending.popleft()
+            batch.append(submission)
+            size += len(submission.posts)
+        self.depth -= size
+        self._condition.notify_all()  # room for blocked submit() calls
+        return batch
+
+    def _run(self) -> None:
+        try:
+            while True:
+                with self._condition:
+                    batch = self._take_batch()
+                    if not batch and self._stopping:
+                        return
+                self._flush(batch)
+        finally:
+            connection.close()
+
+    def _flush(self, batch: list[Submission]) -> None:
+        posts = [post for submission in batch for post in submission.posts]
+        close_old_connections()  # what request_started does for a request thread
+        started = time.monotonic()
+        error: BaseException | None = None
+        try:
+            with write_atomic():
+                Post.objects.bulk_create(posts)
+        except Exception as e:
+            logger.exception("writing a batch of %d posts failed", len(posts))
+            error = e
+        else:
+            models_changed.send(sender=Post, ids=[post.pk for post in posts])
+        finished = time.monotonic()
+
+        with self._condition:
+            self.batches += 1
+            if error is None:
+                self.written += len(posts)
+                self._flush_latency.append(finished - started)
+                self._commit_latency.extend(finished - submission.queued_at for submission in batch)
+            else:
+                self.failed += len(posts)
+        for submission in batch:
+            submission.ticket._finish(error)
+
+    def stats(self) -> dict[str, Any]:
+        with self._condition:
+            return {
+                "depth": self.depth,
+                "max_depth": self.max_depth,
+                "max_queue": self.max_queue,
+                "rejected": self.rejected,
+                "batches": self.batches,
+                "written": self.written,
+                "failed": self.failed,
+                "mean_batch": round(self.written / self.batches, 1) if self.batches else None,
+                "flush_latency": summarize(list(self._flush_latency)),
+                "commit_latency": summarize(list(self._commit_latency)),
+            }
+
+
+_writer: PostWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def get_post_writer() -> PostWriter | None:
+    global _writer
+    options = write_behind_settings()
+    if not options["ENABLED"]:
+        return None
+    with _writer_lock:
+        if _writer is None:
+            _writer = PostWriter(options["MAX_BATCH"], options["MAX_DELAY"], options["MAX_QUEUE"],
+                                 options["ENQUEUE_TIMEOUT"])
+            atexit.register(_writer.stop)
+        return _writer
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -20,6 +21,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'challenges.instrumentation.InstrumentationMiddleware',
+    'challenges.profiling.ProfilingMiddleware',
+    'challenges.replica.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -47,12 +51,112 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'orm_challenges.wsgi.application'
+ASGI_APPLICATION = 'orm_challenges.asgi.application'
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # keep connections, and with them SQLite's page cache and memory map, for ten minutes instead of
+        # reconnecting on every request; a broken connection is replaced before it is reused
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    },
+    # read-only copy of default, refreshed by `manage.py refresh_replica --every 5` (see challenges/replica.py)
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DATABASE_ROUTERS = ['challenges.replica.ReplicaRouter']
+
+# Reads of these models go to the replica unless it lags more than MAX_LAG seconds or the client wrote within
+# MAX_LAG seconds; None sends everything to default.
+CHALLENGES_REPLICA = {
+    'ALIAS': 'replica',
+    'MODELS': ['challenges.Book', 'challenges.Laptop', 'challenges.Post'],
+    'MAX_LAG': 10,
+}
+
+# Pragmas run on every new SQLite connection (see challenges/sqlite.py): a preset name ("serving", "bulk_load"),
+# a dict of pragmas, or None for SQLite's defaults. Loads can switch with CHALLENGES_SQLITE_PROFILE=bulk_load.
+CHALLENGES_SQLITE_PROFILE = os.environ.get('CHALLENGES_SQLITE_PROFILE', 'serving')
+
+# Response cache of the read endpoints (see challenges/cache.py).
+# BACKEND "lru" keeps a bounded LRU per process; "django" stores entries in CACHES[ALIAS] shared by all workers.
+CHALLENGES_RESPONSE_CACHE = {
+    'BACKEND': 'lru',
+    'ALIAS': 'default',
+    'MAX_ENTRIES': 1024,
+    'TTL': 60,
+}
+
+# Latest-posts feed (see challenges/feed.py). RING_SIZE > 0 makes each process keep the ids of that many newest
+# published posts, reloaded at least every MAX_AGE seconds; off by default, the bounded index query is as fast.
+CHALLENGES_FEED = {
+    'RING_SIZE': 0,
+    'MAX_AGE': 5,
+}
+
+# Columnar in-memory Laptop snapshot (see challenges/columnar.py): each process answers the laptop filter,
+# in-stock and latest views from memory, applying its own writes incrementally and reloading every MAX_AGE seconds.
+CHALLENGES_LAPTOP_SNAPSHOT = {
+    'ENABLED': os.environ.get('CHALLENGES_LAPTOP_SNAPSHOT') == '1',
+    'MAX_AGE': 60,
+    'MAX_INCREMENTAL': 500,
+}
+
+# Write-behind queue of post creation (see challenges/writebehind.py): a background thread writes the posts of
+# concurrent requests with one bulk_create per batch of MAX_BATCH, or after MAX_DELAY seconds. Requests wait for
+# the commit (up to WAIT_TIMEOUT) unless WAIT is off or they pass wait=0; a full queue (MAX_QUEUE posts) answers 503.
+CHALLENGES_POST_WRITE_BEHIND = {
+    'ENABLED': os.environ.get('CHALLENGES_POST_WRITE_BEHIND') == '1',
+    'MAX_BATCH': 500,
+    'MAX_DELAY': 0.05,
+    'MAX_QUEUE': 10_000,
+    'ENQUEUE_TIMEOUT': 1.0,
+    'WAIT': True,
+    'WAIT_TIMEOUT': 5.0,
+}
+
+# Hot/archive partitioning of posts (see challenges/archive.py): manage.py archive_posts moves posts last active
+# more than AFTER_DAYS days ago to the archive table, BATCH_SIZE per transaction. The blog views read the archive
+# too for archive=1 or date ranges older than AFTER_DAYS days; None: posts are not archived.
+CHALLENGES_POST_ARCHIVE = {
+    'AFTER_DAYS': int(os.environ.get('CHALLENGES_POST_ARCHIVE_DAYS', 0)) or None,
+    'BATCH_SIZE': 500,
+}
+
+# On-demand profiling (see challenges/profiling.py): a request runs under cProfile when it carries HEADER with
+# TOKEN (any value with DEBUG and no token) or is sampled at SAMPLE_RATE; pstats dumps are written to DIRECTORY.
+CHALLENGES_PROFILING = {
+    'DIRECTORY': BASE_DIR / 'profiles',
+    'SAMPLE_RATE': float(os.environ.get('CHALLENGES_PROFILE_SAMPLE_RATE', 0)),
+    'HEADER': 'X-Profile',
+    'TOKEN': os.environ.get('CHALLENGES_PROFILE_TOKEN'),
+    'MAX_FILES': 1000,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # one JSON line per request: queries, SQL time, rows fetched and view/serialization timings
+        'challenges.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -4,10 +4,21 @@ from challenges.views.level_1.a_create_book import create_book_handler
 from challenges.views.level_1.b_book_details import book_details_handler
 from challenges.views.level_1.c_delete_book import delete_book_handler
 from challenges.views.level_1.d_update_book import update_book_handler
+from challenges.views.level_1.e_batch_books import batch_create_books_handler, batch_delete_books_handler, \
+    batch_update_books_handler
 from challenges.views.level_2.a_laptops import laptop_details_view, laptop_in_stock_list_view, laptop_filter_view, \
-    last_laptop_details_view
+    last_laptop_details_view, laptop_inventory_view, laptop_search_view, laptop_reserve_view
 from challenges.views.level_2.b_blog import last_posts_list_view, posts_search_view, untagged_posts_list_view, \
-    categories_posts_list_view, last_days_posts_list_view, create_posts_view
+    categories_posts_list_view, last_days_posts_list_view, create_posts_view, posts_feed_view, \
+    posts_histogram_view
+from challenges.views.level_2.c_post_ingest import ingest_posts_view
+from challenges.views.level_2.a_laptops_async import laptop_details_async_view, laptop_in_stock_list_async_view, \
+    laptop_filter_async_view, last_laptop_details_async_view, laptop_inventory_async_view, laptop_search_async_view, \
+    laptop_reserve_async_view
+from challenges.views.level_2.b_blog_async import last_posts_list_async_view, posts_search_async_view, \
+    untagged_posts_list_async_view, categories_posts_list_async_view, last_days_posts_list_async_view, \
+    create_posts_async_view, posts_feed_async_view, posts_histogram_async_view
+from challenges.views.stats import post_writer_stats_view, response_cache_stats_view
 
 urlpatterns = [
     # level 1
@@ -15,16 +26,46 @@ urlpatterns = [
     path('book/<int:book_id>/', book_details_handler),
     path('book/<int:book_id>/delete/', delete_book_handler),
     path('book/<int:book_id>/update/', update_book_handler),
+    path('book/batch/create/', batch_create_books_handler),
+    path('book/batch/update/', batch_update_books_handler),
+    path('book/batch/delete/', batch_delete_books_handler),
 
     # level 2
     path('laptops/<int:laptop_id>/', laptop_details_view),
     path('laptops/in-stock/', laptop_in_stock_list_view),
     path('laptops/', laptop_filter_view),
     path('laptops/last/', last_laptop_details_view),
+    path('laptops/inventory/', laptop_inventory_view),
+    path('laptops/search/', laptop_search_view),
+    path('laptops/reserve/', laptop_reserve_view),
     path('posts/create/', create_posts_view),
     path('posts/latest/', last_posts_list_view),
+    path('posts/feed/', posts_feed_view),
     path('posts/search/', posts_search_view),
     path('posts/untagged/', untagged_posts_list_view),
     path('posts/by-categories/', categories_posts_list_view),
     path('posts/last-published/', last_days_posts_list_view),
+    path('posts/histogram/', posts_histogram_view),
+    path('posts/ingest/', ingest_posts_view),
+
+    # level 2, async views (concurrent under orm_challenges.asgi)
+    path('async/laptops/<int:laptop_id>/', laptop_details_async_view),
+    path('async/laptops/in-stock/', laptop_in_stock_list_async_view),
+    path('async/laptops/', laptop_filter_async_view),
+    path('async/laptops/last/', last_laptop_details_async_view),
+    path('async/laptops/inventory/', laptop_inventory_async_view),
+    path('async/laptops/search/', laptop_search_async_view),
+    path('async/laptops/reserve/', laptop_reserve_async_view),
+    path('async/posts/create/', create_posts_async_view),
+    path('async/posts/latest/', last_posts_list_async_view),
+    path('async/posts/feed/', posts_feed_async_view),
+    path('async/posts/search/', posts_search_async_view),
+    path('async/posts/untagged/', untagged_posts_list_async_view),
+    path('async/posts/by-categories/', categories_posts_list_async_view),
+    path('async/posts/last-published/', last_days_posts_list_async_view),
+    path('async/posts/histogram/', posts_histogram_async_view),
+
+    # service
+    path('stats/response-cache/', response_cache_stats_view),
+    path('stats/post-writer/', post_writer_stats_view),
 ]